@@ -0,0 +1,146 @@
+# benchmarks/bench_e2e.py
+"""
+End-to-end throughput of `main.py` against the local mock sites, as the
+per-site thread count varies.
+
+    python -m benchmarks.bench_e2e BIGBEAR HDTURBO [--threads 1 2 4 8] [--pages 5]
+        [--latency-ms 50] [--error-rate 0] [--throttle-rps 0] [--popup-rate 0]
+        [--fetch http|selenium] [--rate 100]
+
+Each site and thread count is one `python main.py CODE` run in a fresh
+DATA_DIR, with MOCK_SITE_URL pointing at an in-process benchmarks.mock_site
+server. Catalog mode and incremental recrawl are off, so every item goes
+through listing + item pages. --fetch forces every page type of the site to
+HTTP or Selenium (Selenium needs Chrome); without it the .env modes apply.
+--rate sets the rate limiter's starting and maximum requests/second, so the
+limiter only shapes the run when the mock throttles.
+
+Reports rows, wall time, items/s, p50/p99 item latency (upper bound of the
+metrics histogram bucket, see utils/metrics.py), peak RSS of the run's process
+tree (Unix) and what the mock server answered.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks.mock_site import MockSite, serve, PAGE_SIZE
+from config.settings import BASE_DIR
+from main import SITE_REGISTRY
+
+# Page types each site fetches, for --fetch
+FETCH_SETTINGS = {
+    "FSS": ("LISTING", "ITEM"), "GOECM": ("LISTING", "ITEM"), "BIGBEAR": ("LISTING", "ITEM"),
+    "DPF": ("LISTING", "ITEM"), "BOSTECH": ("LISTING", "ITEM"), "FINDIT": ("ITEM",),
+    "HDTURBO": ("LISTING", "ITEM"), "AGKITS": ("LISTING", "ITEM"), "VANDERHAAGS": ("LISTING", "ITEM"),
+    "BULLETPROOF": ("LISTING", "ITEM"),
+}
+
+def findit_input(folder: Path, pages: int) -> Path:
+    """FindIt reads its item URLs from a workbook; write one with a listing's worth per page."""
+    path = folder / "findit_items.xlsx"
+    urls = [f"https://www.finditparts.com/products/{n}/mock-turbocharger" for n in range(pages * PAGE_SIZE)]
+    pd.DataFrame({"item_url": urls}).to_excel(path, sheet_name="item url", index=False)
+    return path
+
+def run_env(code, threads, folder, mock_url, args):
+    env = dict(os.environ)
+    env.update({
+        "MOCK_SITE_URL": mock_url,
+        "DATA_DIR": str(folder / "data"),
+        "LOG_DIR": str(folder / "logs"),
+        "RUN_MONTH": "bench",
+        "INCREMENTAL_RECRAWL": "false",
+        "RATE_INITIAL": str(args.rate),
+        "RATE_MAX": str(args.rate),
+        "RATE_BURST": str(max(2, args.rate)),
+        f"{code}_THREADS": str(threads),
+        f"{code}_CATALOG_MODE": "false",
+    })
+    if args.fetch:
+        for page_type in FETCH_SETTINGS[code]:
+            env[f"{code}_{page_type}_FETCH"] = args.fetch
+    if code == "FINDIT":
+        env["FINDIT_INPUT_FILE"] = str(findit_input(folder, args.pages))
+    return env
+
+def run_once(code, threads, mock_url, args):
+    folder = Path(tempfile.mkdtemp(prefix=f"bench_{code.lower()}_{threads}_"))
+    log = (folder / "run.log").open("w", encoding="utf-8")
+    start = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "main.py", code], cwd=BASE_DIR,
+                            env=run_env(code, threads, folder, mock_url, args), stdout=log, stderr=subprocess.STDOUT)
+    if hasattr(os, "wait4"):
+        # Peak RSS of the run and every process it waited for (pool workers, drivers)
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        rss_mb = usage.ru_maxrss / 1024
+    else:
+        proc.wait()
+        rss_mb = None
+    wall = time.perf_counter() - start
+    log.close()
+
+    summaries = list((folder / "data" / "metrics").glob("*.json"))
+    summary = json.loads(summaries[0].read_text(encoding="utf-8")) if summaries else {}
+    item = summary.get("stages", {}).get("item", {})
+    rows = summary.get("rows", 0)
+    return {
+        "site": code,
+        "threads": threads,
+        "exit": proc.returncode,
+        "rows": rows,
+        "wall_s": round(wall, 1),
+        "items_s": round(rows / wall, 2) if wall else 0,
+        "p50_s": item.get("p50_s"),
+        "p99_s": item.get("p99_s"),
+        "item_errors": summary.get("error_rates", {}).get("item", 0),
+        "rss_mb": round(rss_mb) if rss_mb is not None else None,
+        "folder": str(folder),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end scraper throughput against the mock sites")
+    parser.add_argument("sites", nargs="+", type=str.upper)
+    parser.add_argument("--threads", nargs="+", type=int, default=[1, 2, 4, 8])
+    parser.add_argument("--pages", type=int, default=5, help="listing pages per category")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rps", type=float, default=0.0)
+    parser.add_argument("--popup-rate", type=float, default=0.0)
+    parser.add_argument("--fetch", choices=("http", "selenium"))
+    parser.add_argument("--rate", type=float, default=100, help="rate limiter start/max, requests/second")
+    args = parser.parse_args()
+
+    invalid = [s for s in args.sites if s not in SITE_REGISTRY]
+    if invalid:
+        raise SystemExit(f"Invalid site code(s): {invalid}")
+
+    site = MockSite(args.pages, args.latency_ms, args.error_rate, args.throttle_rps, args.popup_rate)
+    server, mock_url = serve(site)
+    print(f"mock sites on {mock_url}: {args.pages} pages/category, {args.latency_ms:g} ms latency, "
+          f"{args.error_rate:g} errors, {args.throttle_rps:g} rps throttle, {args.popup_rate:g} popups")
+    print(f"{'site':12} {'threads':>7} {'rows':>6} {'wall s':>7} {'items/s':>8} {'p50 s':>6} {'p99 s':>6} "
+          f"{'err':>6} {'RSS MB':>7}  mock responses")
+    try:
+        for code in args.sites:
+            for threads in args.threads:
+                site.reset_stats()
+                r = run_once(code, threads, mock_url, args)
+                responses = ", ".join(f"{k}:{v}" for host in site.stats().values() for k, v in sorted(host.items()))
+                print(f"{code:12} {threads:>7} {r['rows']:>6} {r['wall_s']:>7} {r['items_s']:>8} "
+                      f"{r['p50_s'] if r['p50_s'] is not None else '-':>6} {r['p99_s'] if r['p99_s'] is not None else '-':>6} "
+                      f"{r['item_errors']:>6} {r['rss_mb'] if r['rss_mb'] is not None else '-':>7}  {responses}")
+                if r["exit"]:
+                    print(f"   exit code {r['exit']}, see {r['folder']}/run.log")
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+# benchmarks/bench_extract.py
+"""
+Times each scraper's parse + extract step on saved pages, plus the text helpers
+its rows go through.
+
+    python -m benchmarks.bench_extract [--rounds N] [--site CODE ...]
+
+Pages live in fixtures/pages/<site>/listing.html and item.html (FINDIT has no
+listing page: its item URLs come from the input workbook). A case parses the
+bytes with lxml the way PageFetcher does and runs the scraper's own
+parse_listing / parse_cards / parse_item on the tree, so XPath, Extractor and
+matcher changes all show up here. Every case must produce links or a row with
+values before anything is timed.
+
+Reports ops/s and, from a separate tracemalloc pass, the peak Python memory
+one operation allocates (libxml2's own tree memory is not traced).
+"""
+import argparse
+import time
+import tracemalloc
+
+from lxml import html
+
+from config.settings import BASE_DIR
+from main import SITE_REGISTRY, load_site_config
+from utils.constants import oem_list, c_c_p_all, dis_all
+from utils.utils import clean_oem_from_text, extract_part_number, match_from_description
+
+PAGES = BASE_DIR / "fixtures" / "pages"
+RAW_DATA = BASE_DIR / "fixtures" / "raw_data.txt"
+
+ITEM_URL = "https://example.com/products/fixture"
+CAT_URL = "https://example.com/collections/fixture"
+
+# How each scraper turns a listing tree into links (or cards), and an item tree into a row
+LISTING = {
+    "FSS": lambda s, tree: s.parse_cards(tree),
+    "BOSTECH": lambda s, tree: s.parse_cards(tree),
+    "VANDERHAAGS": lambda s, tree: s.parse_listing(tree),
+}
+ITEM = {
+    "FSS": lambda s, tree: s.parse_item(tree, ITEM_URL, CAT_URL, CAT_URL + "/"),
+    "DPF": lambda s, tree: s.parse_item(tree, ITEM_URL, CAT_URL, "Cummins"),
+    "FINDIT": lambda s, tree: s.parse_item(tree, ITEM_URL),
+}
+# Fields that must not come back empty from the item fixture
+ITEM_CHECK = {
+    "FSS": ("SKU", "Price"), "GOECM": ("Item description", "Price"), "BIGBEAR": ("Sku", "Price"),
+    "DPF": ("Item Number", "Price"), "BOSTECH": ("SKU", "Price"), "FINDIT": ("Item description", "Price"),
+    "HDTURBO": ("Part Number", "Price"), "AGKITS": ("Item Number", "Price"), "VANDERHAAGS": ("Item #", "Price"),
+    "BULLETPROOF": ("SKU", "Price"),
+}
+
+def listing_case(scraper, code, data):
+    parse = LISTING.get(code, lambda s, tree: s.parse_listing(tree))
+    return lambda: parse(scraper, html.fromstring(data))
+
+def item_case(scraper, code, data):
+    parse = ITEM.get(code, lambda s, tree: s.parse_item(tree, ITEM_URL, CAT_URL))
+    return lambda: parse(scraper, html.fromstring(data))
+
+def load_texts():
+    with RAW_DATA.open("r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def measure(fn, rounds, ops_per_call=1):
+    """(ops/s, peak KiB allocated by one call)."""
+    fn()  # warm caches (compiled XPaths, matcher automata) outside the timing
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+    return rounds * ops_per_call / elapsed, peak / 1024 / ops_per_call
+
+def report(name, fn, rounds, ops_per_call=1):
+    ops, peak = measure(fn, rounds, ops_per_call)
+    print(f"{name:38} {ops:10.1f} ops/s {1e6 / ops:10.1f} us/op {peak:9.1f} KiB peak/op")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-site parse + extract on saved HTML")
+    parser.add_argument("--rounds", type=int, default=50)
+    parser.add_argument("--site", nargs="*", default=list(SITE_REGISTRY), type=str.upper)
+    args = parser.parse_args()
+
+    invalid = [s for s in args.site if s not in SITE_REGISTRY]
+    if invalid:
+        raise SystemExit(f"Invalid site code(s): {invalid}")
+
+    config = load_site_config()
+    cases = []
+    for code in args.site:
+        scraper = SITE_REGISTRY[code](config)
+        folder = PAGES / code.lower()
+        if (folder / "listing.html").exists():
+            listing = listing_case(scraper, code, (folder / "listing.html").read_bytes())
+            if not listing():
+                raise SystemExit(f"{code}: listing fixture produced no links")
+            cases.append((f"{code} listing", listing))
+
+        item = item_case(scraper, code, (folder / "item.html").read_bytes())
+        missing = [k for k in ITEM_CHECK[code] if not item().get(k)]
+        if missing:
+            raise SystemExit(f"{code}: item fixture produced no {missing}")
+        cases.append((f"{code} item", item))
+
+    print(f"{len(args.site)} sites from {PAGES}, {args.rounds} rounds")
+    for name, fn in cases:
+        report(name, fn, args.rounds)
+
+    texts = load_texts()
+    print(f"\ntext helpers over {len(texts)} texts from {RAW_DATA}")
+    helpers = [
+        ("match_from_description / c_c_p_all", lambda t: match_from_description(t, c_c_p_all)),
+        ("match_from_description / dis_all", lambda t: match_from_description(t, dis_all)),
+        ("clean_oem_from_text / oem_list", lambda t: clean_oem_from_text(t, oem_list)),
+        ("extract_part_number", extract_part_number),
+    ]
+    for name, helper in helpers:
+        report(name, lambda: [helper(t) for t in texts], args.rounds, ops_per_call=len(texts))
+
+if __name__ == "__main__":
+    main()
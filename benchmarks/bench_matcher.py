@@ -0,0 +1,96 @@
+# benchmarks/bench_matcher.py
+"""
+Compares the Aho-Corasick matchers against the linear scans they replaced.
+
+    python -m benchmarks.bench_matcher [--rounds N]
+
+Texts come from the "Raw Data" column of the batch CSVs under DATA_DIR; when no
+run has produced any yet, fixtures/raw_data.txt is used instead. Every text is
+checked for identical results before anything is timed.
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from config.settings import BASE_DIR, DATA_DIR
+from utils.constants import oem_list, c_c_p_all, dis_all
+from utils.matcher import get_matcher
+from utils.utils import clean_oem_from_text, match_from_description
+
+FIXTURE = BASE_DIR / "fixtures" / "raw_data.txt"
+
+def legacy_clean_oem_from_text(text, oem_list):
+    if not text:
+        return ""
+    text_lower = text.lower()
+    for oem in oem_list:
+        oem_lower = oem.lower()
+        if oem_lower in text_lower and "volvo/mack" in text_lower:
+            return "Volvo/Mack"
+        if oem == "Mercedes" and oem_lower in text_lower:
+            return "Mercedes-Benz"
+        if oem_lower in text_lower:
+            return oem
+    return ""
+
+def legacy_match_from_description(description, candidates):
+    if not description:
+        return ""
+    for c in candidates:
+        if str(c) in description:
+            return str(c)
+    return ""
+
+def load_texts():
+    texts = []
+    for path in sorted(DATA_DIR.glob("*/batch_*.csv")):
+        try:
+            df = pd.read_csv(path, usecols=lambda c: c == "Raw Data", dtype=str)
+        except Exception:
+            continue
+        if "Raw Data" in df:
+            texts.extend(t for t in df["Raw Data"].dropna().tolist() if t)
+    if texts:
+        return texts, f"{DATA_DIR} (Raw Data)"
+    with FIXTURE.open("r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()], str(FIXTURE)
+
+def timed(fn, texts, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for text in texts:
+            fn(text)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark candidate matching on Raw Data text")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    texts, source = load_texts()
+    print(f"{len(texts)} texts from {source}, {args.rounds} rounds")
+
+    start = time.perf_counter()
+    for candidates, ignore_case in ((oem_list, True), (c_c_p_all, False), (dis_all, False)):
+        get_matcher(candidates, ignore_case)
+    print(f"automaton build: {(time.perf_counter() - start) * 1000:.1f} ms (once per process)")
+
+    cases = [
+        ("clean_oem_from_text / oem_list", lambda t: legacy_clean_oem_from_text(t, oem_list), lambda t: clean_oem_from_text(t, oem_list)),
+        ("match_from_description / c_c_p_all", lambda t: legacy_match_from_description(t, c_c_p_all), lambda t: match_from_description(t, c_c_p_all)),
+        ("match_from_description / dis_all", lambda t: legacy_match_from_description(t, dis_all), lambda t: match_from_description(t, dis_all)),
+    ]
+
+    for name, legacy, current in cases:
+        mismatches = [t for t in texts if legacy(t) != current(t)]
+        if mismatches:
+            raise SystemExit(f"{name}: {len(mismatches)} results differ, e.g. {mismatches[0][:80]!r}")
+
+        old = timed(legacy, texts, args.rounds)
+        new = timed(current, texts, args.rounds)
+        calls = len(texts) * args.rounds
+        print(f"{name:38} legacy {old / calls * 1e6:8.1f} us/call | automaton {new / calls * 1e6:8.1f} us/call | x{old / new:.1f}")
+
+if __name__ == "__main__":
+    main()
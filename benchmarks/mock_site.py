@@ -0,0 +1,307 @@
+# benchmarks/mock_site.py
+"""
+Local stand-in for the ten target sites, for end-to-end runs without network.
+
+    python -m benchmarks.mock_site [--port 8765] [--pages 5] [--latency-ms 50]
+                                   [--error-rate 0.0] [--throttle-rps 0] [--popup-rate 0.0]
+
+Point the scrapers at it with MOCK_SITE_URL=http://127.0.0.1:8765: PageFetcher
+then requests http://127.0.0.1:8765/<original host>/<original path>, and this
+server answers with the pages in fixtures/pages/<site>/ shaped like that site:
+
+- listing pages paginate the way the scraper asks (?page=N, ?product-page=N,
+  /page/N/) and 404 past --pages; every page gets its own item URLs
+- Bostech's category pages have the items-per-page dropdown and an AJAX
+  "nextPage" button that swaps the product grid in place; its home page lists
+  the categories
+- Bulletproof's collection shows the product count its page math reads
+- VanderHaags' single search page lists every truck at once
+- --popup-rate injects the modal each site's close_modals() looks for
+
+Every response waits --latency-ms (+-50%), fails with a 500 at --error-rate,
+and a host asked for more than --throttle-rps gets 429 + Retry-After. Store
+JSON APIs (products.json, wp-json) answer 404, so catalog mode falls back to
+pages. GET /__stats returns request counts per host and status.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from config.settings import BASE_DIR
+
+PAGES = BASE_DIR / "fixtures" / "pages"
+
+# Items on one listing page of the fixtures
+PAGE_SIZE = 24
+
+
+class Shape:
+    """
+    How one site lays out its URLs. `link` matches the item hrefs in the listing
+    fixture; each match is replaced with `item` formatted with a key unique to
+    the category, page and position.
+    """
+
+    def __init__(self, code, host, item_prefix, link, item, paged=True, popup=None):
+        self.code = code
+        self.host = host
+        self.item_prefix = item_prefix
+        self.link = re.compile(link)
+        self.item = item
+        self.paged = paged
+        self.popup = popup or ('<div class="mock-popup newsletter-popup"><button aria-label="Close" '
+                               'onclick="this.parentNode.style.display=\'none\'">&times;</button></div>')
+        folder = PAGES / code.lower()
+        self.item_html = (folder / "item.html").read_text(encoding="utf-8")
+        listing = folder / "listing.html"
+        self.listing_html = listing.read_text(encoding="utf-8") if listing.exists() else None
+
+    def is_item(self, path: str) -> bool:
+        return self.listing_html is None or path.startswith(self.item_prefix)
+
+
+SHAPES = [
+    Shape("FSS", "www.filterserviceandsupply.com", "/products/",
+          r"https://www\.filterservice\.com/products/fs-\d+/", "https://www.filterserviceandsupply.com/products/fs-{key}/"),
+    Shape("GOECM", "goecm.com", "/products/", r'/products/[^"?]+', "/products/mock-{key}"),
+    Shape("BIGBEAR", "shop.4btengines.com", "/product/",
+          r"https://example\.com/product/[a-z0-9.-]+/", "https://shop.4btengines.com/product/mock-{key}/"),
+    Shape("DPF", "www.dpfpartsdirect.com", "/products/", r"/products/dpf-\d+", "/products/dpf-{key}"),
+    Shape("BOSTECH", "bostechauto.com", "/products/", r"/products/bt-\d+/", "/products/bt-{key}/",
+          popup='<div class="modal mock-popup" style="position:fixed;top:20%;left:30%;z-index:99;background:#fff">'
+                '<button class="modal-close" aria-label="Close dialog" '
+                'onclick="this.parentNode.style.display=\'none\'">&times;</button><p>Sign up for 10% off</p></div>'),
+    Shape("FINDIT", "www.finditparts.com", "/products/", r"$^", ""),
+    Shape("HDTURBO", "hdturbo.com", "/product/",
+          r"https://example\.com/product/[a-z0-9.-]+/", "https://hdturbo.com/product/mock-{key}/",
+          popup='<div class="pum mock-popup" style="position:fixed;top:20%;z-index:99;background:#fff">'
+                '<button class="pum-close" onclick="this.parentNode.style.display=\'none\'">&times;</button></div>'),
+    Shape("AGKITS", "www.agkits.com", "/p/", r"/p/\d+/[a-z0-9.-]+", "/p/{key}/mock-kit"),
+    Shape("VANDERHAAGS", "www.vanderhaags.com", "/inventory/", r"/inventory/truck/\d+", "/inventory/truck/{key}",
+          paged=False),
+    Shape("BULLETPROOF", "bulletproofdiesel.com", "/products/", r"/products/bp-\d+", "/products/bp-{key}"),
+]
+SHAPES_BY_HOST = {s.host: s for s in SHAPES}
+
+BOSTECH_CATEGORIES = [
+    "/product/oil-systems/hpop-high-pressure-oil-pump/", "/product/emission-systems/egr-cooler/",
+    "/product/fuel-air-system/fuel-injector-1/", "/product/coolant/water-pumps/",
+]
+
+# Grid controls and the script that pages it in place, like Bostech's parts finder
+BOSTECH_CONTROLS = """<select class="select_limit"><option value="12">12</option><option value="24" selected>24</option></select>
+<a class="APAbtn nextPage{disabled}" href="#" data-page="{next}">Next</a>"""
+BOSTECH_SCRIPT = """<script>
+function mockLoad(page) {
+  fetch(location.pathname + '?fragment=1&page=' + page).then(function (r) { return r.text(); }).then(function (h) {
+    document.querySelector('.section-content').innerHTML = h;
+  });
+}
+document.addEventListener('click', function (e) {
+  var btn = e.target.closest('.nextPage');
+  if (!btn || btn.classList.contains('APAbtn-disabled')) return;
+  e.preventDefault();
+  mockLoad(btn.getAttribute('data-page'));
+});
+document.addEventListener('change', function (e) { if (e.target.matches('.select_limit')) mockLoad(1); });
+</script>"""
+
+def page_number(path: str, query: dict) -> int:
+    for key in ("page", "product-page"):
+        if key in query:
+            try:
+                return max(1, int(query[key][0]))
+            except ValueError:
+                return 1
+    m = re.search(r"/page/(\d+)/?$", path)
+    return int(m.group(1)) if m else 1
+
+def category_path(path: str) -> str:
+    return re.sub(r"/page/\d+/?$", "/", path)
+
+
+class MockSite:
+    """The pages, faults and counters behind the HTTP handler; one instance per server."""
+
+    def __init__(self, pages=5, latency_ms=50.0, error_rate=0.0, throttle_rps=0.0, popup_rate=0.0, seed=None):
+        self.pages = pages
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.throttle_rps = throttle_rps
+        self.popup_rate = popup_rate
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.counts = {}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {host: dict(statuses) for host, statuses in self.counts.items()}
+
+    def _count(self, host, status):
+        with self._lock:
+            statuses = self.counts.setdefault(host, {})
+            statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    def _throttled(self, host) -> bool:
+        """Per-host token bucket of throttle_rps with a one-second burst."""
+        if not self.throttle_rps:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated = self._buckets.get(host, (self.throttle_rps, now))
+            tokens = min(self.throttle_rps, tokens + (now - updated) * self.throttle_rps)
+            if tokens < 1:
+                self._buckets[host] = (tokens, now)
+                return True
+            self._buckets[host] = (tokens - 1, now)
+            return False
+
+    def _items(self, shape, html, path, page):
+        """The listing with every item href replaced by one unique to this category and page."""
+        cat = zlib.crc32(category_path(path).encode()) % 100000
+        keys = {}
+
+        def replace(m):
+            if m.group(0) not in keys:
+                keys[m.group(0)] = shape.item.format(key=f"{cat}-{page}-{len(keys)}")
+            return keys[m.group(0)]
+        return shape.link.sub(replace, html)
+
+    def _popup(self, shape, html):
+        if self.popup_rate and self.random.random() < self.popup_rate:
+            return html.replace('<main id="main-content">', '<main id="main-content">' + shape.popup, 1)
+        return html
+
+    def render(self, host, path, query):
+        """(status, content type, body) for a request to the original `host` and `path`."""
+        shape = SHAPES_BY_HOST.get(host)
+        if shape is None or path.endswith(".json") or "/wp-json/" in path:
+            return 404, "text/plain", "not found"
+
+        if shape.is_item(path):
+            return 200, "text/html", self._popup(shape, shape.item_html)
+
+        if shape.code == "BOSTECH" and path == "/":
+            links = "".join(f'<li><a href="{c}">{c.strip("/").split("/")[-1]}</a></li>' for c in BOSTECH_CATEGORIES)
+            html = shape.listing_html
+            start, end = html.index('<main id="main-content">'), html.index("</main>")
+            home = f'<main id="main-content"><div class="section-content"><ul>{links}</ul></div>'
+            return 200, "text/html", self._popup(shape, html[:start] + home + html[end:])
+
+        page = page_number(path, query)
+        if page > self.pages:
+            return 404, "text/html", "<html><head><title>404 Not Found</title></head><body></body></html>"
+
+        html = shape.listing_html
+        if not shape.paged:
+            # Everything on one page: repeat the grid once per configured page
+            start, end = html.index('<main id="main-content">') + len('<main id="main-content">'), html.index("</main>")
+            grids = "".join(self._items(shape, html[start:end], path, p) for p in range(1, self.pages + 1))
+            return 200, "text/html", self._popup(shape, html[:start] + grids + html[end:])
+
+        html = self._items(shape, html, path, page)
+        if shape.code == "BOSTECH":
+            controls = BOSTECH_CONTROLS.format(next=page + 1, disabled=" APAbtn-disabled" if page >= self.pages else "")
+            start = html.index('<div class="section-content">') + len('<div class="section-content">')
+            end = html.index("</main>")
+            grid = html[start:end].rsplit("</div>", 1)[0]
+            if "fragment" in query:
+                return 200, "text/html", grid + controls
+            html = html[:start] + grid + controls + "</div>" + BOSTECH_SCRIPT + html[end:]
+        elif shape.code == "BULLETPROOF":
+            count = (f'<p class="boost-pfs-filter-total-product collection__products-count text--small hidden-desk">'
+                     f'Showing {self.pages * PAGE_SIZE} products</p>')
+            html = html.replace('<main id="main-content">', '<main id="main-content">' + count, 1)
+        return 200, "text/html", self._popup(shape, html)
+
+    def handle(self, raw_path):
+        parts = urlsplit(raw_path)
+        segments = parts.path.lstrip("/").split("/", 1)
+        host = segments[0].lower()
+        path = "/" + (segments[1] if len(segments) > 1 else "")
+        query = parse_qs(parts.query)
+
+        if self.latency:
+            time.sleep(self.latency * self.random.uniform(0.5, 1.5))
+        if self._throttled(host):
+            self._count(host, 429)
+            return 429, "text/plain", "too many requests", {"Retry-After": "1"}
+        if self.error_rate and self.random.random() < self.error_rate:
+            self._count(host, 500)
+            return 500, "text/plain", "internal server error", {}
+
+        status, content_type, body = self.render(host, path, query)
+        self._count(host, status)
+        return status, content_type, body, {}
+
+
+def make_handler(site: MockSite):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, head_only=False):
+            if self.path == "/__stats":
+                status, content_type, body, headers = 200, "application/json", json.dumps(site.stats()), {}
+            else:
+                status, content_type, body, headers = site.handle(self.path)
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            if not head_only:
+                self.wfile.write(data)
+
+        def do_GET(self):
+            self._respond()
+
+        def do_HEAD(self):
+            self._respond(head_only=True)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+def serve(site: MockSite, port: int = 0, host: str = "127.0.0.1"):
+    """Starts the server on a daemon thread; returns (server, base URL)."""
+    server = ThreadingHTTPServer((host, port), make_handler(site))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-site", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve fixture-shaped catalogs for the target sites")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=5, help="listing pages per category")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rps", type=float, default=0.0, help="per host; 0 disables")
+    parser.add_argument("--popup-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    site = MockSite(args.pages, args.latency_ms, args.error_rate, args.throttle_rps, args.popup_rate)
+    server, url = serve(site, args.port)
+    print(f"Mock sites on {url} (MOCK_SITE_URL={url}); Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(json.dumps(site.stats(), indent=2))
+
+if __name__ == "__main__":
+    main()
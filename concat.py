@@ -1,17 +1,27 @@
 import os
-import pandas as pd
 import glob
+import hashlib
+import sqlite3
+import tempfile
+import pandas as pd
 
 # =========================
 # CONFIGURATION
 # =========================
 DATA_DIR = "data"
-FINAL_CONCAT_DIR = "final_data" 
+FINAL_CONCAT_DIR = "final_data"
 RUN_MONTH = "Jan_2026"
 
 # Column names (Case sensitive - double check your CSV headers!)
-URL_COL = "Item URL" 
+URL_COL = "Item URL"
 PRICE_COL = "Price"
+# Parsed by the scrapers since utils/records.py; batches written before it only have the text
+PRICE_VALUE_COL = "Price Value"
+
+# Rows read per chunk; memory stays around one chunk plus the dedup index
+CHUNK_SIZE = 20_000
+# "memory": 8-byte URL digests in a set | "disk": same digests in a temporary SQLite file
+DEDUP_INDEX = os.getenv("CONCAT_DEDUP_INDEX", "memory")
 
 WEBSITES = [
     # "ag_kits",
@@ -20,6 +30,127 @@ WEBSITES = [
     "goecm", "hd_turbo", "vander_haags"
 ]
 
+def url_digest(value) -> int:
+    # Missing URLs all share one key, the same way drop_duplicates treats NaN
+    key = b"\x00missing" if pd.isna(value) else str(value).encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big", signed=True)
+
+class MemoryDedupIndex:
+    def __init__(self):
+        self._seen = set()
+
+    def first_seen(self, values) -> list:
+        mask = []
+        for value in values:
+            digest = url_digest(value)
+            if digest in self._seen:
+                mask.append(False)
+            else:
+                self._seen.add(digest)
+                mask.append(True)
+        return mask
+
+    def close(self):
+        self._seen.clear()
+
+class DiskDedupIndex:
+    def __init__(self, output_path):
+        # A fresh file per run, next to the output: a killed run's leftover is never read back
+        fd, self.path = tempfile.mkstemp(prefix=os.path.basename(output_path) + ".",
+                                         suffix=".dedup.sqlite", dir=os.path.dirname(output_path) or ".")
+        os.close(fd)
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("CREATE TABLE seen (digest INTEGER PRIMARY KEY)")
+
+    def first_seen(self, values) -> list:
+        mask = []
+        for value in values:
+            cursor = self._db.execute("INSERT OR IGNORE INTO seen (digest) VALUES (?)", (url_digest(value),))
+            mask.append(cursor.rowcount == 1)
+        self._db.commit()
+        return mask
+
+    def close(self):
+        self._db.close()
+        os.remove(self.path)
+
+def read_columns(file):
+    if file.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        return pq.read_schema(file).names
+    return list(pd.read_csv(file, nrows=0).columns)
+
+def iter_chunks(file):
+    # Values stay text so they are copied through exactly as the scrapers wrote them
+    if file.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(file).iter_batches(batch_size=CHUNK_SIZE):
+            yield batch.to_pandas().astype(object)
+    else:
+        yield from pd.read_csv(file, dtype=str, chunksize=CHUNK_SIZE)
+
+def concat_site(all_files, output_path):
+    """Streams every batch into output_path, keeping the first row per URL. Returns the stats."""
+    # 1. Union of the batch headers, in order of first appearance (what pd.concat produced)
+    columns = []
+    readable = []
+    for file in all_files:
+        try:
+            columns.extend(c for c in read_columns(file) if c not in columns)
+            readable.append(file)
+        except Exception as e:
+            print(f"  --> Error reading {file}: {e}")
+
+    if not readable:
+        return None
+
+    has_url = URL_COL in columns
+    has_price_value = PRICE_VALUE_COL in columns
+    index = DiskDedupIndex(output_path) if DEDUP_INDEX == "disk" else MemoryDedupIndex()
+    total_raw_rows = rows_after_dedup = valid_price_count = parsed_price_count = 0
+    tmp_path = output_path + ".tmp"
+
+    try:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as out:
+            pd.DataFrame(columns=columns).to_csv(out, index=False)
+
+            for file in readable:
+                try:
+                    for chunk in iter_chunks(file):
+                        total_raw_rows += len(chunk)
+                        chunk = chunk.reindex(columns=columns)
+
+                        # 2. REMOVE DUPLICATES (Keeping the first occurrence)
+                        if has_url:
+                            chunk = chunk[index.first_seen(chunk[URL_COL].tolist())]
+                        rows_after_dedup += len(chunk)
+
+                        # 3. COUNT VALID PRICES (on the deduplicated data)
+                        if PRICE_COL in columns:
+                            prices = chunk[PRICE_COL]
+                            valid_price_count += int((prices.notna() & (prices.astype(str).str.strip() != "")).sum())
+                        # Prices with an amount in them; rows from older batches have no Price Value
+                        if has_price_value:
+                            parsed_price_count += int(pd.to_numeric(chunk[PRICE_VALUE_COL], errors="coerce").notna().sum())
+
+                        # 4. APPEND TO FINAL FILE
+                        chunk.to_csv(out, header=False, index=False)
+                except Exception as e:
+                    print(f"  --> Error reading {file}: {e}")
+        os.replace(tmp_path, output_path)
+    finally:
+        index.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return {
+        "Raw Total": total_raw_rows,
+        "Duplicates Removed": total_raw_rows - rows_after_dedup if has_url else "N/A",
+        "Final Unique Items": rows_after_dedup,
+        "With Price": valid_price_count,
+        "With Parsed Price": parsed_price_count if has_price_value else "N/A"
+    }
+
 def run_concatenation_process():
     if not os.path.exists(FINAL_CONCAT_DIR):
         os.makedirs(FINAL_CONCAT_DIR)
@@ -33,69 +164,33 @@ def run_concatenation_process():
         if not os.path.exists(folder_path):
             continue
 
-        all_files = glob.glob(os.path.join(folder_path, "*.csv"))
-        all_files = [f for f in all_files if "final_concat" not in f]
+        # CSV batches and/or Parquet parts, depending on OUTPUT_FORMAT when the site ran.
+        # Sorted so "first occurrence" follows batch write order.
+        all_files = glob.glob(os.path.join(folder_path, "*.csv")) + glob.glob(os.path.join(folder_path, "*.parquet"))
+        all_files = sorted(f for f in all_files if "final_concat" not in f)
 
         if not all_files:
             continue
 
         print(f"Processing: {site}...")
 
-        df_list = []
-        for file in all_files:
-            try:
-                df = pd.read_csv(file, low_memory=False)
-                df_list.append(df)
-            except Exception as e:
-                print(f"  --> Error reading {file}: {e}")
-
-        if df_list:
-            # 1. Combine all batches
-            combined_df = pd.concat(df_list, ignore_index=True)
-            total_raw_rows = len(combined_df)
-
-            # 2. REMOVE DUPLICATES (Keeping the first occurrence)
-            if URL_COL in combined_df.columns:
-                # This line removes the duplicates from the dataframe
-                combined_df.drop_duplicates(subset=[URL_COL], keep='first', inplace=True)
-                rows_after_dedup = len(combined_df)
-                duplicate_count = total_raw_rows - rows_after_dedup
-            else:
-                duplicate_count = "N/A"
-                rows_after_dedup = total_raw_rows
-
-            # 3. COUNT VALID PRICES (on the deduplicated data)
-            valid_price_count = 0
-            if PRICE_COL in combined_df.columns:
-                valid_prices = combined_df[
-                    combined_df[PRICE_COL].notna() & 
-                    (combined_df[PRICE_COL].astype(str).str.strip() != "")
-                ]
-                valid_price_count = len(valid_prices)
-
-            # 4. SAVE TO FINAL FOLDER
-            output_filename = f"{site}_final_concat_{RUN_MONTH}.csv"
-            output_path = os.path.join(FINAL_CONCAT_DIR, output_filename)
-            combined_df.to_csv(output_path, index=False)
-
-            summary_stats.append({
-                "Website": site,
-                "Raw Total": total_raw_rows,
-                "Duplicates Removed": duplicate_count,
-                "Final Unique Items": rows_after_dedup,
-                "With Price": valid_price_count
-            })
+        output_filename = f"{site}_final_concat_{RUN_MONTH}.csv"
+        output_path = os.path.join(FINAL_CONCAT_DIR, output_filename)
+        stats = concat_site(all_files, output_path)
+
+        if stats:
+            summary_stats.append({"Website": site, **stats})
 
     # --- FINAL REPORT ---
     if summary_stats:
         print("\n" + "="*85)
-        print(f"{'WEBSITE':<22} | {'RAW':<7} | {'DUPS':<7} | {'UNIQUE':<8} | {'W/ PRICE':<8}")
+        print(f"{'WEBSITE':<22} | {'RAW':<7} | {'DUPS':<7} | {'UNIQUE':<8} | {'W/ PRICE':<8} | {'PARSED':<8}")
         print("-" * 85)
         for stat in summary_stats:
             print(f"{stat['Website']:<22} | {stat['Raw Total']:<7} | {stat['Duplicates Removed']:<7} | "
-                  f"{stat['Final Unique Items']:<8} | {stat['With Price']:<8}")
+                  f"{stat['Final Unique Items']:<8} | {stat['With Price']:<8} | {stat['With Parsed Price']:<8}")
         print("="*85)
         print(f"Success! All deduplicated files are in: {FINAL_CONCAT_DIR}")
 
 if __name__ == "__main__":
-    run_concatenation_process()
\ No newline at end of file
+    run_concatenation_process()
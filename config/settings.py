@@ -18,10 +18,108 @@ LOG_DIR.mkdir(parents=True, exist_ok=True)
 RUN_MONTH = os.getenv("RUN_MONTH", "Jan_2026")
 MAX_WORKERS = int(os.getenv("MAX_WORKERS", 3))
 
+# BATCH WRITER CONFIG
+# Rows are handed to a background writer thread; add_row blocks once this many are waiting
+WRITER_QUEUE_SIZE = int(os.getenv("WRITER_QUEUE_SIZE", 1000))
+# "csv" (one file per batch) or "parquet" (one file per run, needs pyarrow)
+OUTPUT_FORMAT = os.getenv("OUTPUT_FORMAT", "csv").lower()
+PARQUET_ROW_GROUP_BYTES = int(os.getenv("PARQUET_ROW_GROUP_BYTES", 8 * 1024 * 1024))
+
+# ITEM PIPELINE CONFIG
+# Listing pages queue item jobs for persistent worker threads; pagination pauses once this
+# many items are waiting
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", 100))
+
+# DRIVER POOL CONFIG
+# Drivers run with an implicit wait of 0. The per-site *_WAIT values (including
+# FILTER_SERVICE_SUPPLY_SELENIUM_IMPLICIT_WAIT / GOECM_SELENIUM_IMPLICIT_WAIT) are the longest
+# explicit wait for a page's content.
+# Drivers are quit and replaced after this many pages to keep Chrome memory in check
+DRIVER_POOL_MAX_PAGES = int(os.getenv("DRIVER_POOL_MAX_PAGES", 50))
+# "lean" (eager page load, no images/fonts/CSS/trackers) or "full"; *_DRIVER_PROFILE overrides per site
+DRIVER_PROFILE = os.getenv("DRIVER_PROFILE", "lean").lower()
+# Extra comma-separated URL patterns a lean driver blocks, e.g. *cdn.example.com/widgets*
+LEAN_BLOCKED_URLS = [u.strip() for u in os.getenv("LEAN_BLOCKED_URLS", "").split(",") if u.strip()]
+# Pages in a row whose content never appears before a lean pool switches to the full profile
+LEAN_FALLBACK_FAILURES = int(os.getenv("LEAN_FALLBACK_FAILURES", 5))
+# Chrome instances allowed across all site processes; 0 derives it from available memory
+BROWSER_BUDGET = int(os.getenv("BROWSER_BUDGET", 0))
+# Memory one Chrome instance is assumed to need when deriving BROWSER_BUDGET
+BROWSER_MEMORY_MB = int(os.getenv("BROWSER_MEMORY_MB", 500))
+# Browsers every running site is guaranteed; each site's *_THREADS is its maximum
+BROWSER_SITE_MIN = int(os.getenv("BROWSER_SITE_MIN", 1))
+
+# HTTP FETCH CONFIG
+# Per-site *_LISTING_FETCH / *_ITEM_FETCH pick "http" or "selenium" for each page type.
+# HTTP pages that lack the expected nodes are re-fetched with Selenium automatically.
+HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", 30))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 10))
+# Benchmarks only: send every page and HTTP request to this server instead of the real site,
+# e.g. http://127.0.0.1:8765 (see benchmarks/mock_site.py). Leave empty for real runs.
+MOCK_SITE_URL = os.getenv("MOCK_SITE_URL", "").rstrip("/")
+
+# RATE LIMIT CONFIG
+# Every request to a host takes a token from that host's bucket. The rate (requests/second)
+# grows by RATE_INCREASE per healthy response and is multiplied by RATE_DECREASE on a
+# 403/429/5xx, a block page or an error; responses slower than RATE_LATENCY_TARGET seconds
+# also slow it down.
+RATE_INITIAL = float(os.getenv("RATE_INITIAL", 1.0))
+RATE_MIN = float(os.getenv("RATE_MIN", 0.1))
+RATE_MAX = float(os.getenv("RATE_MAX", 8.0))
+RATE_BURST = float(os.getenv("RATE_BURST", 2))
+RATE_INCREASE = float(os.getenv("RATE_INCREASE", 0.05))
+RATE_DECREASE = float(os.getenv("RATE_DECREASE", 0.5))
+RATE_LATENCY_TARGET = float(os.getenv("RATE_LATENCY_TARGET", 10))
+
+# CATALOG MODE CONFIG
+# *_CATALOG_MODE sites read the store's product JSON (Shopify products.json, WooCommerce
+# Store API) instead of rendering every product page.
+# Point CATALOG_REPLAY_DIR at saved JSON pages to run it offline.
+CATALOG_REPLAY_DIR = BASE_DIR / os.getenv("CATALOG_REPLAY_DIR") if os.getenv("CATALOG_REPLAY_DIR") else None
+SHOPIFY_PAGE_SIZE = int(os.getenv("SHOPIFY_PAGE_SIZE", 250))
+WOOCOMMERCE_PAGE_SIZE = int(os.getenv("WOOCOMMERCE_PAGE_SIZE", 100))
+
+# LISTING CARD CONFIG
+# *_CARD_MODE sites build rows from listing cards and only open a product page when its
+# card is new or changed; detail fields are cached per URL under DATA_DIR/listing_cache.
+LISTING_CACHE_MAX_AGE_DAYS = int(os.getenv("LISTING_CACHE_MAX_AGE_DAYS", 30))
+
+# INCREMENTAL RECRAWL CONFIG
+# Item pages are requested with last run's ETag / Last-Modified; a 304 carries the previous
+# row forward instead of scraping the page. State lives under DATA_DIR/recrawl.
+INCREMENTAL_RECRAWL = os.getenv("INCREMENTAL_RECRAWL", "true").lower() == "true"
+# Rows older than this are scraped in full even if the server says "not modified"
+INCREMENTAL_MAX_AGE_DAYS = int(os.getenv("INCREMENTAL_MAX_AGE_DAYS", 90))
+
+# PAGE CACHE CONFIG
+# Raw page bodies are kept under DATA_DIR/page_cache (zstd-compressed when zstandard is
+# installed) so a rerun, or `python main.py --cache-only ...`, can extract again without
+# the network. Entries older than the TTL are fetched again on a normal run.
+PAGE_CACHE = os.getenv("PAGE_CACHE", "true").lower() == "true"
+PAGE_CACHE_TTL_DAYS = float(os.getenv("PAGE_CACHE_TTL_DAYS", 20))
+# Least recently used pages are dropped once the compressed bodies pass this size
+PAGE_CACHE_MAX_MB = int(os.getenv("PAGE_CACHE_MAX_MB", 4096))
+PAGE_CACHE_LEVEL = int(os.getenv("PAGE_CACHE_LEVEL", 6))
+
+# FETCH ARCHIVE CONFIG
+# `main.py --fetch-only` writes item pages to DATA_DIR/archive/<SITE>_<RUN_MONTH>.warc.gz
+# instead of extracting them; `main.py --extract` parses the archive in a process pool.
+ARCHIVE_LEVEL = int(os.getenv("ARCHIVE_LEVEL", 6))
+# Extraction processes per site; 0 uses every core
+ARCHIVE_WORKERS = int(os.getenv("ARCHIVE_WORKERS", 0))
+# Pages handed to an extraction process at a time
+ARCHIVE_CHUNK = int(os.getenv("ARCHIVE_CHUNK", 25))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 500))
+
 # FSS CONFIG (Using your exact .env keys)
 FSS_HEADLESS = os.getenv("FILTER_SERVICE_SUPPLY_SELENIUM_HEADLESS", "true").lower() == "true"
 FSS_WAIT = int(os.getenv("FILTER_SERVICE_SUPPLY_SELENIUM_IMPLICIT_WAIT", 30))
 FSS_BATCH_SIZE = int(os.getenv("FSS_BATCH_SIZE", 12))
+FSS_LISTING_FETCH = os.getenv("FSS_LISTING_FETCH", "http").lower()
+FSS_ITEM_FETCH = os.getenv("FSS_ITEM_FETCH", "http").lower()
+FSS_DRIVER_PROFILE = os.getenv("FSS_DRIVER_PROFILE", DRIVER_PROFILE).lower()
+FSS_CARD_MODE = os.getenv("FSS_CARD_MODE", "true").lower() == "true"
 
 
 # GOECM CONFIG (Using your exact .env keys)
@@ -29,6 +127,10 @@ GOECM_HEADLESS = os.getenv("GOECM_SELENIUM_HEADLESS", "false").lower() == "true"
 GOECM_WAIT = int(os.getenv("GOECM_SELENIUM_IMPLICIT_WAIT", 30))
 GOECM_BATCH_SIZE = int(os.getenv("GOECM_BATCH_SIZE", 12))
 GOECM_THREADS = int(os.getenv("GOECM_THREADS", 4))
+GOECM_LISTING_FETCH = os.getenv("GOECM_LISTING_FETCH", "selenium").lower()
+GOECM_ITEM_FETCH = os.getenv("GOECM_ITEM_FETCH", "selenium").lower()
+GOECM_DRIVER_PROFILE = os.getenv("GOECM_DRIVER_PROFILE", DRIVER_PROFILE).lower()
+GOECM_CATALOG_MODE = os.getenv("GOECM_CATALOG_MODE", "true").lower() == "true"
 
 
 # BIGBEAR CONFIG
@@ -36,6 +138,10 @@ BIGBEAR_HEADLESS = os.getenv("BIGBEAR_HEADLESS", "true").lower() == "true"
 BIGBEAR_WAIT = int(os.getenv("BIGBEAR_WAIT", 30))
 BIGBEAR_BATCH_SIZE = int(os.getenv("BIGBEAR_BATCH_SIZE", 12))
 BIGBEAR_THREADS = int(os.getenv("BIGBEAR_THREADS", 4))
+BIGBEAR_LISTING_FETCH = os.getenv("BIGBEAR_LISTING_FETCH", "http").lower()
+BIGBEAR_ITEM_FETCH = os.getenv("BIGBEAR_ITEM_FETCH", "http").lower()
+BIGBEAR_DRIVER_PROFILE = os.getenv("BIGBEAR_DRIVER_PROFILE", DRIVER_PROFILE).lower()
+BIGBEAR_CATALOG_MODE = os.getenv("BIGBEAR_CATALOG_MODE", "true").lower() == "true"
 
 
 # DPF PARTS DIRECT CONFIG
@@ -43,6 +149,10 @@ DPF_HEADLESS = os.getenv("DPF_HEADLESS", "true").lower() == "true"
 DPF_WAIT = int(os.getenv("DPF_WAIT", 30))
 DPF_BATCH_SIZE = int(os.getenv("DPF_BATCH_SIZE", 12))
 DPF_THREADS = int(os.getenv("DPF_THREADS", 4))
+DPF_LISTING_FETCH = os.getenv("DPF_LISTING_FETCH", "selenium").lower()
+DPF_ITEM_FETCH = os.getenv("DPF_ITEM_FETCH", "selenium").lower()
+DPF_DRIVER_PROFILE = os.getenv("DPF_DRIVER_PROFILE", DRIVER_PROFILE).lower()
+DPF_CATALOG_MODE = os.getenv("DPF_CATALOG_MODE", "true").lower() == "true"
 
 
 # BOSTECH CONFIG
@@ -50,6 +160,11 @@ BOSTECH_HEADLESS = os.getenv("BOSTECH_HEADLESS", "true").lower() == "true"
 BOSTECH_WAIT = int(os.getenv("BOSTECH_WAIT", 30))
 BOSTECH_BATCH_SIZE = int(os.getenv("BOSTECH_BATCH_SIZE", 12))
 BOSTECH_THREADS = int(os.getenv("BOSTECH_THREADS", 4))
+BOSTECH_LISTING_FETCH = os.getenv("BOSTECH_LISTING_FETCH", "selenium").lower()
+BOSTECH_ITEM_FETCH = os.getenv("BOSTECH_ITEM_FETCH", "selenium").lower()
+# Modal and dropdown handling on the nav driver checks visibility, which needs the stylesheets: full, whatever DRIVER_PROFILE says
+BOSTECH_DRIVER_PROFILE = os.getenv("BOSTECH_DRIVER_PROFILE", "full").lower()
+BOSTECH_CARD_MODE = os.getenv("BOSTECH_CARD_MODE", "true").lower() == "true"
 
 
 # FINDITPARTS CONFIG
@@ -57,6 +172,8 @@ FINDIT_HEADLESS = os.getenv("FINDIT_HEADLESS", "true").lower() == "true"
 FINDIT_WAIT = int(os.getenv("FINDIT_WAIT", 30))
 FINDIT_BATCH_SIZE = int(os.getenv("FINDIT_BATCH_SIZE", 100))
 FINDIT_THREADS = int(os.getenv("FINDIT_THREADS", 5))
+FINDIT_ITEM_FETCH = os.getenv("FINDIT_ITEM_FETCH", "selenium").lower()
+FINDIT_DRIVER_PROFILE = os.getenv("FINDIT_DRIVER_PROFILE", DRIVER_PROFILE).lower()
 FINDIT_INPUT_FILE = os.getenv("FINDIT_INPUT_FILE", "Find it Parts.xlsx")
 
 
@@ -65,6 +182,10 @@ HDTURBO_HEADLESS = os.getenv("HDTURBO_HEADLESS", "true").lower() == "true"
 HDTURBO_WAIT = int(os.getenv("HDTURBO_WAIT", 30))
 HDTURBO_BATCH_SIZE = int(os.getenv("HDTURBO_BATCH_SIZE", 12))
 HDTURBO_THREADS = int(os.getenv("HDTURBO_THREADS", 4))
+HDTURBO_LISTING_FETCH = os.getenv("HDTURBO_LISTING_FETCH", "http").lower()
+HDTURBO_ITEM_FETCH = os.getenv("HDTURBO_ITEM_FETCH", "http").lower()
+HDTURBO_DRIVER_PROFILE = os.getenv("HDTURBO_DRIVER_PROFILE", DRIVER_PROFILE).lower()
+HDTURBO_CATALOG_MODE = os.getenv("HDTURBO_CATALOG_MODE", "true").lower() == "true"
 
 
 
@@ -73,6 +194,9 @@ AGKITS_HEADLESS = os.getenv("AGKITS_HEADLESS", "true").lower() == "true"
 AGKITS_WAIT = int(os.getenv("AGKITS_WAIT", 30))
 AGKITS_BATCH_SIZE = int(os.getenv("AGKITS_BATCH_SIZE", 12))
 AGKITS_THREADS = int(os.getenv("AGKITS_THREADS", 4))
+AGKITS_LISTING_FETCH = os.getenv("AGKITS_LISTING_FETCH", "selenium").lower()
+AGKITS_ITEM_FETCH = os.getenv("AGKITS_ITEM_FETCH", "selenium").lower()
+AGKITS_DRIVER_PROFILE = os.getenv("AGKITS_DRIVER_PROFILE", DRIVER_PROFILE).lower()
 
 
 
@@ -81,10 +205,17 @@ VANDERHAAGS_HEADLESS = os.getenv("VANDERHAAGS_HEADLESS", "true").lower() == "tru
 VANDERHAAGS_WAIT = int(os.getenv("VANDERHAAGS_WAIT", 30))
 VANDERHAAGS_BATCH_SIZE = int(os.getenv("VANDERHAAGS_BATCH_SIZE", 12))
 VANDERHAAGS_THREADS = int(os.getenv("VANDERHAAGS_THREADS", 5))
+VANDERHAAGS_LISTING_FETCH = os.getenv("VANDERHAAGS_LISTING_FETCH", "http").lower()
+VANDERHAAGS_ITEM_FETCH = os.getenv("VANDERHAAGS_ITEM_FETCH", "selenium").lower()
+VANDERHAAGS_DRIVER_PROFILE = os.getenv("VANDERHAAGS_DRIVER_PROFILE", DRIVER_PROFILE).lower()
 
 
 # BULLETPROOF CONFIG
 BULLETPROOF_HEADLESS = os.getenv("BULLETPROOF_HEADLESS", "true").lower() == "true"
 BULLETPROOF_WAIT = int(os.getenv("BULLETPROOF_WAIT", 30))
 BULLETPROOF_BATCH_SIZE = int(os.getenv("BULLETPROOF_BATCH_SIZE", 12))
-BULLETPROOF_THREADS = int(os.getenv("BULLETPROOF_THREADS", 4))
\ No newline at end of file
+BULLETPROOF_THREADS = int(os.getenv("BULLETPROOF_THREADS", 4))
+BULLETPROOF_LISTING_FETCH = os.getenv("BULLETPROOF_LISTING_FETCH", "selenium").lower()
+BULLETPROOF_ITEM_FETCH = os.getenv("BULLETPROOF_ITEM_FETCH", "selenium").lower()
+BULLETPROOF_DRIVER_PROFILE = os.getenv("BULLETPROOF_DRIVER_PROFILE", DRIVER_PROFILE).lower()
+BULLETPROOF_CATALOG_MODE = os.getenv("BULLETPROOF_CATALOG_MODE", "true").lower() == "true"
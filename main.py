@@ -2,33 +2,51 @@
 
 import sys
 import json
+import importlib
+from collections.abc import Mapping
 from pathlib import Path
 from concurrent.futures import ProcessPoolExecutor
 
 from config.settings import MAX_WORKERS
-from src.scraper_filter_service_supply import FilterServiceAndSupplyScraper
-from src.scraper_goecm import GoecmScraper # Import the new scraper
-from src.scraper_bigbear import BigBearScraper
-from src.scraper_dpf import DpfScraper
-from src.scraper_bostech import BostechScraper
-from src.scraper_finditparts import FindItPartsScraper
-from src.scraper_hdturbo import HDTurboScraper
-from src.scraper_agkits import AgKitsScraper
-from src.scraper_vanderhaags import VanderHaagsScraper
-from src.scraper_bulletproof import BulletproofScraper
-
-SITE_REGISTRY = {
-     "FSS": FilterServiceAndSupplyScraper,
-     "GOECM": GoecmScraper,
-     "BIGBEAR": BigBearScraper,
-     "DPF": DpfScraper, 
-     "BOSTECH": BostechScraper, 
-     "FINDIT": FindItPartsScraper,
-     "HDTURBO": HDTurboScraper,
-     "AGKITS": AgKitsScraper,
-     "VANDERHAAGS": VanderHaagsScraper,
-     "BULLETPROOF": BulletproofScraper,
-}
+from utils.budget import BudgetManager, attach_budget, browser_budget
+from utils.page_cache import page_cache
+from utils.archive import PageArchive, attach_archive
+
+class SiteRegistry(Mapping):
+    """
+    Site code -> scraper class, from "module:Class" strings. A scraper's module
+    (and Selenium, pandas and the lookup tables with it) is only imported when
+    its class is looked up, which happens in the worker process running it.
+    """
+
+    def __init__(self, specs: dict):
+        self._specs = dict(specs)
+
+    def __getitem__(self, code):
+        module, _, name = self._specs[code].partition(":")
+        return getattr(importlib.import_module(module), name)
+
+    def __contains__(self, code):
+        return code in self._specs
+
+    def __iter__(self):
+        return iter(self._specs)
+
+    def __len__(self):
+        return len(self._specs)
+
+SITE_REGISTRY = SiteRegistry({
+     "FSS": "src.scraper_filter_service_supply:FilterServiceAndSupplyScraper",
+     "GOECM": "src.scraper_goecm:GoecmScraper",
+     "BIGBEAR": "src.scraper_bigbear:BigBearScraper",
+     "DPF": "src.scraper_dpf:DpfScraper",
+     "BOSTECH": "src.scraper_bostech:BostechScraper",
+     "FINDIT": "src.scraper_finditparts:FindItPartsScraper",
+     "HDTURBO": "src.scraper_hdturbo:HDTurboScraper",
+     "AGKITS": "src.scraper_agkits:AgKitsScraper",
+     "VANDERHAAGS": "src.scraper_vanderhaags:VanderHaagsScraper",
+     "BULLETPROOF": "src.scraper_bulletproof:BulletproofScraper",
+})
 
 def load_site_config():
     config_path = Path("config") / "config.json"
@@ -39,33 +57,74 @@ def load_site_config():
     with config_path.open("r", encoding="utf-8") as f:
         return json.load(f)
 
-def run_scraper(scraper_cls, config):
-    scraper = scraper_cls(config)
-    scraper.run()
+def run_scraper(site_code, config, resume=False, budget=None, cache_only=False, fetch_only=False, extract=False):
+    scraper_cls = SITE_REGISTRY[site_code]
+    if cache_only:
+        page_cache.replay_only()
+
+    if fetch_only or not extract:
+        if budget is not None:
+            # DriverPools created in this process take their browsers from the shared budget
+            attach_budget(budget, site_code)
+        # Fetch stage: item pages and finished rows go to the archive, nothing is extracted
+        archive = PageArchive(site_code, resume) if fetch_only else None
+        attach_archive(archive)
+        try:
+            scraper = scraper_cls(config)
+            scraper.run(resume=resume)
+        finally:
+            attach_archive(None)
+            if archive is not None:
+                archive.close()
+                print(f"🗄️ {site_code}: archived {archive.counts['pages']} pages and {archive.counts['rows']} rows "
+                      f"to {archive.path}")
+            if budget is not None:
+                budget.finish(site_code)
+
+    if extract:
+        # Imported here, like the scrapers, to keep pandas out of the parent process
+        from utils.archive_extract import ArchiveExtractor
+        from utils.logger import get_logger
+
+        site_name = importlib.import_module(scraper_cls.__module__).SITE_NAME
+        ArchiveExtractor(scraper_cls, config, site_code, site_name, get_logger(site_name)).run()
 
 def main():
     config = load_site_config()
 
-    cli_sites = [arg.upper() for arg in sys.argv[1:]]
+    # --resume picks up this RUN_MONTH's frontier instead of starting over
+    resume = "--resume" in sys.argv[1:]
+    # --cache-only re-extracts from the page cache without touching the network
+    cache_only = "--cache-only" in sys.argv[1:]
+    # --fetch-only archives item pages; --extract parses the archive on every core (both: one after the other)
+    fetch_only = "--fetch-only" in sys.argv[1:]
+    extract = "--extract" in sys.argv[1:]
+    flags = ("--resume", "--cache-only", "--fetch-only", "--extract")
+    cli_sites = [arg.upper() for arg in sys.argv[1:] if arg not in flags]
 
     if not cli_sites:
-        print("❌ Usage: python main.py FSS [CAT BPD]")
+        print("❌ Usage: python main.py [--resume] [--cache-only] [--fetch-only] [--extract] FSS [CAT BPD]")
         return
 
     invalid = [s for s in cli_sites if s not in SITE_REGISTRY]
     if invalid:
         raise ValueError(f"Invalid site code(s): {invalid}")
 
-    scrapers_to_run = [SITE_REGISTRY[code] for code in cli_sites]
+    # One browser budget for the whole machine, split across the sites running at any moment
+    with BudgetManager() as manager:
+        budget = manager.BrowserBudget(browser_budget())
+        print(f"🧭 Browser budget: {budget.snapshot()['total']} Chrome instances across all sites")
+        if cache_only:
+            print(f"📦 Cache-only: pages come from {page_cache.root}, nothing is fetched")
 
-    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
-        futures = [
-            executor.submit(run_scraper, scraper_cls, config)
-            for scraper_cls in scrapers_to_run
-        ]
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [
+                executor.submit(run_scraper, code, config, resume, budget, cache_only, fetch_only, extract)
+                for code in cli_sites
+            ]
 
-        for f in futures:
-            f.result()
+            for f in futures:
+                f.result()
 
 if __name__ == "__main__":
     main()
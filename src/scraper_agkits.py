@@ -1,116 +1,159 @@
 # src/scraper_agkits.py
 import time
-from lxml import html
-from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-from utils.selenium_factory import create_driver
+from utils.selenium_factory import DriverPool
+from utils.waits import wait_until
+from utils.fetcher import PageFetcher
+from utils.pipeline import ItemPipeline
+from utils.cleaning import Cleaner, col_first_match, col_unique_map
+from utils.extractor import Extractor, first, combined
 from utils.base_scraper import BaseScraper
+from utils.frontier import Frontier
+from utils.recrawl import RecrawlIndex
 from utils.logger import get_logger
 from utils.utils import (
-    get_xpath_combined, get_xpath_first, 
-    random_sleep, match_from_description, remove_punctuation
+    match_from_description
 )
-from config.settings import AGKITS_HEADLESS, AGKITS_WAIT, AGKITS_BATCH_SIZE, AGKITS_THREADS
-from utils.constants import oem_list, c_c_p_all, dis_all 
+from config.settings import (
+    AGKITS_HEADLESS, AGKITS_WAIT, AGKITS_BATCH_SIZE, AGKITS_THREADS,
+    AGKITS_LISTING_FETCH, AGKITS_ITEM_FETCH, AGKITS_DRIVER_PROFILE
+)
+from utils.constants import oem_list, c_c_p_all, dis_all
 
 SITE_CODE = "AGKITS"
 SITE_NAME = "ag_kits"
 BASE_URL = "https://www.agkits.com"
 PAGINATION_URL = "https://www.agkits.com/cummins-engines.aspx?size=200&page={}"
 
+# Nodes that prove an HTTP response holds the rendered page
+LISTING_READY_XPATH = '//div[contains(@class, "product-list-item")]'
+ITEM_READY_XPATH = "//span[contains(@id, 'lblProductSKU')] | //span[contains(@class, 'product-detail-cost-value')]"
+
+# Engine page fields; the storefront has no stable product wrapper, so they run on the document
+ITEM_FIELDS = Extractor(
+    title=first('//h1/text()'),
+    sku=first('//span[contains(@id, "lblProductSKU")]/text()', '//span[contains(@class, "product-sku")]/text()'),
+    price=combined('//span[contains(@class, "product-detail-cost-value")]//text()',
+                   '//span[contains(@id, "lblProductPrice")]//text()'),
+    # --- Quantity Extraction (ID from your screenshot) ---
+    quantity=first('//input[@id="ctl00_pageContent_txtQuantity"]/@value', default="1"),
+    raw_desc=combined('//div[contains(@class, "product-detail-text")]//text()'),
+)
+
+def legacy_get_part(description):
+    """Original script logic preserved."""
+    if not description: return ""
+    out = ""
+    parts = description.split(",")
+    for p in parts:
+        if 'RP' in p and 'RPM' not in p:
+            out = p.strip()
+    if out and "-" not in out:
+        return out
+    elif out:
+        return out.split("-")[0].strip()
+    return ""
+
+def clean_columns(f):
+    full_data = [f"{title} {desc}" for title, desc in zip(f["Item Description"], f["Raw Data"])]
+    part = col_unique_map(full_data, legacy_get_part)
+    return {
+        "Clean Part Number": [p if p else sku for p, sku in zip(part, f["Item Number"])],
+        "Clean OEM": col_first_match(full_data, oem_list),
+        "Clean Part Description": f["Item Description"],
+    }
+
+CLEANER = Cleaner(clean_columns, "Item Description", "Raw Data", "Item Number")
+
 class AgKitsScraper:
+    cleaner = CLEANER
+
     def __init__(self, config):
         self.config = config
 
-    def legacy_get_part(self, description):
-        """Original script logic preserved."""
-        if not description: return ""
-        out = ""
-        parts = description.split(",")
-        for p in parts:
-            if 'RP' in p and 'RPM' not in p:
-                out = p.strip()
-        if out and "-" not in out:
-            return out
-        elif out:
-            return out.split("-")[0].strip()
-        return ""
+    def wait_for_item(self, driver):
+        # 1. Broader Wait: Wait for either the Title or the SKU to appear
+        ready = EC.presence_of_element_located((By.XPATH, "//h1 | //span[contains(@id, 'lblProductSKU')]"))
+        wait_until(driver, 20, ready, "item_ready")
+
+    def parse_item(self, tree, item_url, cat_url):
+        """Builds the output row from an engine page tree."""
+        # 2. Robust Extraction
+        f = ITEM_FIELDS.extract(tree)
+        title, sku, price, quantity, raw_desc = f["title"], f["sku"], f["price"], f["quantity"], f["raw_desc"]
+        full_data = f"{title} {raw_desc}"
+
+        # Legacy matching logic; the Clean columns are filled per batch by CLEANER
+        engine_model = match_from_description(full_data, c_c_p_all)
+        displacement = match_from_description(full_data, dis_all)
+
+        return {
+            "Page URL": cat_url,
+            "Item URL": item_url,
+            "OEM Name": "AG Kits (Reviva)",
+            "Item Number": sku,
+            "Item Description": title,
+            "Price": price,
+            "Quantity": quantity,
+            "Currency": "USD",
+            "Clean Part Number": "",
+            "Clean OEM": "",
+            "Clean Part Description": "",
+            "Engine Model": engine_model,
+            "Displacement": displacement,
+            "Source Name": "AG Kits (Reviva)",
+            "Raw Data": raw_desc
+        }
 
     def scrape_item_worker(self, item_url, cat_url, scraper, logger):
         """Worker thread for individual engine page scraping."""
-        driver = create_driver(headless=AGKITS_HEADLESS, wait_time=AGKITS_WAIT)
+        if not self.frontier.claim(item_url):
+            return
         try:
             logger.info(f"ITEM URL: {item_url}")
-            driver.get(item_url)
-            
-            # 1. Broader Wait: Wait for either the Title or the SKU to appear
             try:
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.XPATH, "//h1 | //span[contains(@id, 'lblProductSKU')]"))
-                )
+                tree = self.fetcher.fetch_item(item_url, scraper, self.frontier, logger, mode=AGKITS_ITEM_FETCH,
+                                               ready_xpath=ITEM_READY_XPATH, on_driver=self.wait_for_item,
+                                               recrawl=self.recrawl, archive_args=(cat_url,))
             except TimeoutException:
                 logger.error(f"Timeout: Product components did not load for {item_url}. The site may be blocking.")
+                self.frontier.failed(item_url, "timeout")
                 return
-            
-            tree = html.fromstring(driver.page_source)
-
-            # 2. Robust Extraction
-            title = get_xpath_first(tree, '//h1/text()')
-            sku = get_xpath_first(tree, '//span[contains(@id, "lblProductSKU")]/text()') or \
-                  get_xpath_first(tree, '//span[contains(@class, "product-sku")]/text()')
-            
-            price = get_xpath_combined(tree, '//span[contains(@class, "product-detail-cost-value")]//text()') or \
-                    get_xpath_combined(tree, '//span[contains(@id, "lblProductPrice")]//text()')
-
-            # --- Quantity Extraction (ID from your screenshot) ---
-            quantity = get_xpath_first(tree, '//input[@id="ctl00_pageContent_txtQuantity"]/@value') or "1"
-            
-            raw_desc = get_xpath_combined(tree, '//div[contains(@class, "product-detail-text")]//text()')
-            full_data = f"{title} {raw_desc}"
-
-            # Legacy matching logic
-            clean_oem = ""
-            for oem in oem_list:
-                if oem.lower() in full_data.lower():
-                    clean_oem = oem
-                    break
-            
-            clean_part = self.legacy_get_part(full_data)
-            engine_model = match_from_description(full_data, c_c_p_all)
-            displacement = match_from_description(full_data, dis_all)
-
-            scraper.add_row({
-                "Page URL": cat_url,
-                "Item URL": item_url,
-                "OEM Name": "AG Kits (Reviva)",
-                "Item Number": sku,
-                "Item Description": title,
-                "Price": price,
-                "Quantity": quantity,
-                "Currency": "USD",
-                "Clean Part Number": clean_part if clean_part else sku,
-                "Clean OEM": clean_oem,
-                "Clean Part Description": title,
-                "Engine Model": engine_model,
-                "Displacement": displacement,
-                "Source Name": "AG Kits (Reviva)",
-                "Raw Data": raw_desc
-            })
-            logger.info(f"   SUCCESS -> SKU: {sku} | Price: {price} | Qty: {quantity}")
+
+            if tree is None:
+                return
+
+            row = self.parse_item(tree, item_url, cat_url)
+            scraper.add_row(row)
+            logger.info(f"   SUCCESS -> SKU: {row['Item Number']} | Price: {row['Price']} | Qty: {row['Quantity']}")
 
         except Exception as e:
             logger.error(f"Error at {item_url}: {str(e)[:100]}")
-        finally:
-            driver.quit()
+            self.frontier.failed(item_url, e)
+
+    def listing_links(self, url):
+        tree = self.fetcher.fetch_tree(url, mode=AGKITS_LISTING_FETCH, ready_xpath=LISTING_READY_XPATH)
+        return self.parse_listing(tree) if tree is not None else []
 
-    def run(self):
+    def parse_listing(self, tree):
+        """Product URLs on a listing page tree."""
+        # Broader product link discovery
+        links = tree.xpath('//div[contains(@class, "product-list-item")]//h5/a/@href')
+        return [BASE_URL + l if l.startswith('/') else l for l in links]
+
+    def run(self, resume=False):
         logger = get_logger(SITE_NAME)
-        scraper = BaseScraper(SITE_NAME, AGKITS_BATCH_SIZE, logger)
-        nav_driver = create_driver(headless=AGKITS_HEADLESS, wait_time=AGKITS_WAIT)
+        self.frontier = Frontier(SITE_NAME, resume, logger=logger)
+        self.recrawl = RecrawlIndex(SITE_NAME, logger=logger)
+        scraper = BaseScraper(SITE_NAME, AGKITS_BATCH_SIZE, logger, frontier=self.frontier, recrawl=self.recrawl,
+                              cleaner=CLEANER)
+        self.pool = DriverPool(AGKITS_THREADS, AGKITS_HEADLESS, AGKITS_WAIT, logger=logger,
+                               profile=AGKITS_DRIVER_PROFILE)
+        self.fetcher = PageFetcher(self.pool, logger)
+        self.items = ItemPipeline(AGKITS_THREADS, SITE_NAME, logger)
 
         logger.info(f"STARTING MULTI-THREADED AG KITS SCRAPER")
 
@@ -119,27 +162,23 @@ class AgKitsScraper:
             while True:
                 url = PAGINATION_URL.format(page)
                 logger.info(f"FETCHING PAGE: {url}")
-                nav_driver.get(url)
-                random_sleep(3, 5)
-
-                tree = html.fromstring(nav_driver.page_source)
-                # Broader product link discovery
-                links = tree.xpath('//div[contains(@class, "product-list-item")]//h5/a/@href')
+                full_urls = self.frontier.listing(url, lambda: self.listing_links(url))
 
-                if not links:
+                if not full_urls:
                     logger.info("No more engines found. Finalizing.")
                     break
 
-                logger.info(f"Found {len(links)} engines. Processing via {AGKITS_THREADS} threads...")
-                
-                full_urls = [BASE_URL + l if l.startswith('/') else l for l in links]
+                logger.info(f"Found {len(full_urls)} engines. Processing via {AGKITS_THREADS} threads...")
+
+                for item_url in full_urls:
+                    self.items.submit(self.scrape_item_worker, item_url, url, scraper, logger)
+                logger.info(f"ITEM QUEUE DEPTH: {self.items.depth()}")
 
-                with ThreadPoolExecutor(max_workers=AGKITS_THREADS) as executor:
-                    for item_url in full_urls:
-                        executor.submit(self.scrape_item_worker, item_url, url, scraper, logger)
-                
                 page += 1
                 if page > 50: break
         finally:
-            nav_driver.quit()
-            scraper.finalize()
\ No newline at end of file
+            self.items.close()
+            self.pool.close()
+            scraper.finalize()
+            self.frontier.close()
+            self.recrawl.close()
\ No newline at end of file
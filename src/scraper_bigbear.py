@@ -1,25 +1,68 @@
 # src/scraper_bigbear.py
 import time
-from lxml import html
-from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-from utils.selenium_factory import create_driver
+from utils.selenium_factory import DriverPool
+from utils.waits import wait_until
+from utils.fetcher import PageFetcher
+from utils.pipeline import ItemPipeline
+from utils.extractor import Extractor, first, combined, joined
+from utils.woocommerce import (
+    iter_categories, iter_store_products, html_text, product_price,
+    product_currency, product_stock, product_categories, attribute_value
+)
+from utils.cleaning import Cleaner, col_token
 from utils.base_scraper import BaseScraper
+from utils.frontier import Frontier
+from utils.recrawl import RecrawlIndex
 from utils.logger import get_logger
 from utils.utils import (
-    get_xpath_combined, get_xpath_first, 
-    random_sleep, match_from_description
+    get_xpath_first,
+    match_from_description, normalize_text
+)
+from config.settings import (
+    BIGBEAR_HEADLESS, BIGBEAR_WAIT, BIGBEAR_BATCH_SIZE, BIGBEAR_THREADS,
+    BIGBEAR_LISTING_FETCH, BIGBEAR_ITEM_FETCH, BIGBEAR_CATALOG_MODE, BIGBEAR_DRIVER_PROFILE
 )
-from config.settings import BIGBEAR_HEADLESS, BIGBEAR_WAIT, BIGBEAR_BATCH_SIZE, BIGBEAR_THREADS
-from utils.constants import oem_list, c_c_p_all, dis_all 
+from utils.constants import oem_list, c_c_p_all, dis_all
 
 SITE_CODE = "BIGBEAR"
 SITE_NAME = "big_bear_engine"
+STORE_URL = "https://shop.4btengines.com"
+
+# Nodes that prove an HTTP response holds the rendered page
+LISTING_READY_XPATH = "//ul[contains(@class, 'products')] | //li[contains(@class, 'product')]"
+ITEM_READY_XPATH = '//*[contains(@class, "product_title")] | //*[contains(@class, "entry-summary")]'
+
+# Product page fields, scoped to the WooCommerce product block
+ITEM_FIELDS = Extractor(
+    container='//div[contains(@class, "type-product")]',
+    title=first('.//h1[contains(@class, "product_title")]/text()', './/section[@class="title-section"]//h1/text()'),
+    sku=first('.//span[@class="sku"]/text()'),
+    price=combined('.//p[contains(@class, "price")]//span[contains(@class, "amount")]//text()'),
+    quantity=first('.//input[@name="quantity"]/@value', default="1"),
+    # Any "...summary" div on the page counted before scoping (mini-cart, order summary widgets)
+    raw_data=combined('//div[contains(@class, "summary")]//text()', document=True),
+    hp=first('.//tr[contains(@class, "horsepower")]//td//text()'),
+    displacement=first('.//tr[contains(@class, "displacement")]//td//text()'),
+    stock=first('.//p[contains(@class, "stock")]//text()', default="In Stock"),
+    category=joined('.//span[@class="posted_in"]/a/text()'),
+)
+
+def clean_columns(f):
+    title = f["Item description"]
+    return {
+        "Clean Part Description": title,
+        "Clean OEM": col_token(title, 0),
+        "Clean Part Number": f["Sku"],
+    }
+
+CLEANER = Cleaner(clean_columns, "Item description", "Sku")
 
 class BigBearScraper:
+    cleaner = CLEANER
+
     def __init__(self, config):
         self.base_urls = [
             'https://shop.4btengines.com/product-category/diesel-engines/complete-engines/',
@@ -32,11 +75,10 @@ class BigBearScraper:
     def get_sub_categories(self, logger):
         """Discovers sub-category links from the components page."""
         logger.info("Discovering sub-categories from Engine Components...")
-        driver = create_driver(headless=BIGBEAR_HEADLESS, wait_time=BIGBEAR_WAIT)
         try:
-            driver.get(self.component_url)
-            random_sleep(4, 6)
-            tree = html.fromstring(driver.page_source)
+            tree = self.fetcher.fetch_tree(self.component_url, mode=BIGBEAR_LISTING_FETCH, ready_xpath=LISTING_READY_XPATH)
+            if tree is None:
+                return []
             links = tree.xpath('//li[contains(@class, "product-category")]//a/@href')
             if not links:
                 links = tree.xpath('//ul[contains(@class, "products")]//a[contains(@href, "product-category")]/@href')
@@ -46,71 +88,141 @@ class BigBearScraper:
         except Exception as e:
             logger.error(f"Error discovering sub-categories: {e}")
             return []
-        finally:
-            driver.quit()
+
+    def wait_for_item(self, driver):
+        ready = EC.presence_of_element_located((By.CSS_SELECTOR, ".product_title, .entry-summary"))
+        wait_until(driver, 15, ready, "item_ready")
+
+    def parse_item(self, tree, item_url, cat_url):
+        """Builds the output row from a product page tree."""
+        f = ITEM_FIELDS.extract(tree)
+        return self.build_row(f["title"], f["sku"], f["price"], f["quantity"], f["raw_data"], f["hp"],
+                              f["displacement"], f["stock"], f["category"], "USD", item_url, cat_url)
+
+    def row_from_product(self, product, cat_url):
+        """Maps a Store API product onto the same row parse_item builds."""
+        title = html_text(product.get("name", ""))
+        sku = product.get("sku") or ""
+        price = product_price(product)
+        category = product_categories(product)
+        # The summary block carries title, price, short description, SKU and categories
+        raw_data = normalize_text(" ".join([
+            title, price, html_text(product.get("short_description", "")),
+            f"SKU: {sku}" if sku else "", f"Categories: {category}" if category else ""
+        ]))
+        return self.build_row(
+            title, sku, price, "1", raw_data,
+            attribute_value(product, "horsepower"), attribute_value(product, "displacement"),
+            product_stock(product), category, product_currency(product) or "USD",
+            product.get("permalink", ""), cat_url
+        )
+
+    def build_row(self, title, sku, price, quantity, raw_data, hp, displacement, stock, category, currency, item_url, cat_url):
+        engine_model = match_from_description(title + " " + raw_data, c_c_p_all)
+
+        return {
+            "Page URL": cat_url,
+            "Item URL": item_url,
+            "Item description": title,
+            "Sku": sku,
+            "Price": price,
+            "Quantity": quantity, # Added field
+            "OEM Name": title,
+            "Engine Model": engine_model,
+            "Horse Power": hp,
+            "Displacement": displacement,
+            "Stock Availability": stock,
+            "Category": category,
+            "Currency": currency,
+            "Clean Part Description": "",
+            "Clean OEM": "",
+            "Clean Part Number": "",
+            "Source Name": "Big Bear Engine Company",
+            "Raw Data": raw_data
+        }
 
     def scrape_item_worker(self, item_url, cat_url, scraper, logger):
-        driver = create_driver(headless=BIGBEAR_HEADLESS, wait_time=BIGBEAR_WAIT)
+        if not self.frontier.claim(item_url):
+            return
         try:
-            driver.get(item_url)
-            WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, ".product_title, .entry-summary")))
-            
-            tree = html.fromstring(driver.page_source)
-            
-            title = get_xpath_first(tree, '//h1[contains(@class, "product_title")]/text()') or \
-                    get_xpath_first(tree, '//section[@class="title-section"]//h1/text()')
-            
-            sku = get_xpath_first(tree, '//span[@class="sku"]/text()')
-            price = get_xpath_combined(tree, '//p[contains(@class, "price")]//span[contains(@class, "amount")]//text()')
-            
-            # --- NEW: Quantity Extraction ---
-            # Targets the input field shown in your screenshot
-            quantity = get_xpath_first(tree, '//input[@name="quantity"]/@value') or "1"
-            
-            raw_data = get_xpath_combined(tree, '//div[contains(@class, "summary")]//text()')
-            hp = get_xpath_first(tree, '//tr[contains(@class, "horsepower")]//td//text()')
-            displacement = get_xpath_first(tree, '//tr[contains(@class, "displacement")]//td//text()')
-            stock = get_xpath_first(tree, '//p[contains(@class, "stock")]//text()') or "In Stock"
-
-            engine_model = match_from_description(title + " " + raw_data, c_c_p_all)
-            clean_oem = title.split()[0] if title else ""
-
-            scraper.add_row({
-                "Page URL": cat_url,
-                "Item URL": item_url,
-                "Item description": title,
-                "Sku": sku,
-                "Price": price,
-                "Quantity": quantity, # Added field
-                "OEM Name": title,
-                "Engine Model": engine_model,
-                "Horse Power": hp,
-                "Displacement": displacement,
-                "Stock Availability": stock,
-                "Currency": "USD",
-                "Clean Part Description": title,
-                "Clean OEM": clean_oem,
-                "Clean Part Number": sku,
-                "Source Name": "Big Bear Engine Company",
-                "Raw Data": raw_data
-            })
-            logger.info(f"   SUCCESS -> SKU: {sku} | Qty: {quantity} | Price: {price}")
+            tree = self.fetcher.fetch_item(item_url, scraper, self.frontier, logger, mode=BIGBEAR_ITEM_FETCH,
+                                           ready_xpath=ITEM_READY_XPATH, on_driver=self.wait_for_item,
+                                           recrawl=self.recrawl, archive_args=(cat_url,))
+            if tree is None:
+                return
+
+            row = self.parse_item(tree, item_url, cat_url)
+            scraper.add_row(row)
+            logger.info(f"   SUCCESS -> SKU: {row['Sku']} | Qty: {row['Quantity']} | Price: {row['Price']}")
         except Exception as e:
             logger.error(f"Error scraping product: {item_url} | {e}")
-        finally:
-            driver.quit()
+            self.frontier.failed(item_url, e)
 
-    def run(self):
+    def catalog_categories(self, logger):
+        """The four base categories plus every direct child of Engine Components."""
+        wanted = {u.rstrip('/').split('/')[-1] for u in self.base_urls}
+        parent_slug = self.component_url.rstrip('/').split('/')[-1]
+
+        categories = list(iter_categories(STORE_URL, logger=logger))
+        parent_ids = {c["id"] for c in categories if c.get("slug") == parent_slug}
+        return [c for c in categories if c.get("slug") in wanted or c.get("parent") in parent_ids]
+
+    def run_catalog(self, scraper, logger):
+        """Store API mode: paged product JSON per category, no listing pages or browsers."""
+        count = 0
+        for category in self.catalog_categories(logger):
+            cat_url = category.get("permalink") or f"{STORE_URL}/product-category/{category.get('slug')}/"
+            for product in iter_store_products(STORE_URL, category["id"], logger=logger):
+                try:
+                    row = self.row_from_product(product, cat_url)
+                    if self.frontier.claim(row["Item URL"]):
+                        scraper.add_row(row)
+                    count += 1
+                except Exception as e:
+                    logger.error(f"Error mapping catalog product {product.get('permalink')}: {e}")
+        logger.info(f"CATALOG MODE: {count} products")
+        return count > 0
+
+    def listing_links(self, url):
+        tree = self.fetcher.fetch_tree(url, mode=BIGBEAR_LISTING_FETCH, ready_xpath=LISTING_READY_XPATH)
+        return self.parse_listing(tree) if tree is not None else []
+
+    def parse_listing(self, tree):
+        """Product URLs on a listing page tree."""
+        if "404" in get_xpath_first(tree, '//title/text()'):
+            return []
+
+        links = tree.xpath("//li[contains(@class, 'product')]//a[contains(@class, 'link')]/@href")
+        if not links:
+            links = tree.xpath("//ul[contains(@class, 'products')]//li/a[1]/@href")
+
+        return [l for l in links if "product-category" not in l]
+
+    def run(self, resume=False):
         logger = get_logger(SITE_NAME)
-        scraper = BaseScraper(SITE_NAME, BIGBEAR_BATCH_SIZE, logger)
-        
-        sub_cats = self.get_sub_categories(logger)
-        all_categories = self.base_urls + sub_cats
+        self.frontier = Frontier(SITE_NAME, resume, logger=logger)
+        self.recrawl = RecrawlIndex(SITE_NAME, logger=logger)
+        scraper = BaseScraper(SITE_NAME, BIGBEAR_BATCH_SIZE, logger, frontier=self.frontier, recrawl=self.recrawl,
+                              cleaner=CLEANER)
+        self.pool = DriverPool(BIGBEAR_THREADS, BIGBEAR_HEADLESS, BIGBEAR_WAIT, logger=logger,
+                               profile=BIGBEAR_DRIVER_PROFILE)
+        self.fetcher = PageFetcher(self.pool, logger)
+        self.items = ItemPipeline(BIGBEAR_THREADS, SITE_NAME, logger)
 
-        nav_driver = create_driver(headless=BIGBEAR_HEADLESS, wait_time=BIGBEAR_WAIT)
         logger.info(f"STARTING MULTI-THREADED SCRAPER: {SITE_NAME}")
 
         try:
+            if BIGBEAR_CATALOG_MODE:
+                try:
+                    if self.run_catalog(scraper, logger):
+                        return
+                    logger.warning("Catalog returned no products. Falling back to page scraping.")
+                except Exception as e:
+                    logger.error(f"Catalog mode failed ({e}). Falling back to page scraping.")
+
+            sub_cats = self.get_sub_categories(logger)
+            all_categories = self.base_urls + sub_cats
+
             for cat_base_url in all_categories:
                 page = 1
                 while True:
@@ -120,30 +232,22 @@ class BigBearScraper:
                         url = f"{cat_base_url.rstrip('/')}/page/{page}/"
 
                     logger.info(f"FETCHING CATEGORY PAGE: {url}")
-                    nav_driver.get(url)
-                    random_sleep(3, 5)
-
-                    if "404" in nav_driver.title:
-                        break
-
-                    tree = html.fromstring(nav_driver.page_source)
-                    links = tree.xpath("//li[contains(@class, 'product')]//a[contains(@class, 'link')]/@href")
-                    if not links:
-                        links = tree.xpath("//ul[contains(@class, 'products')]//li/a[1]/@href")
-                    
-                    links = [l for l in links if "product-category" not in l]
+                    links = self.frontier.listing(url, lambda: self.listing_links(url))
 
                     if not links:
                         break
 
                     logger.info(f"Processing {len(links)} products...")
-                    
-                    with ThreadPoolExecutor(max_workers=BIGBEAR_THREADS) as executor:
-                        for item_url in links:
-                            executor.submit(self.scrape_item_worker, item_url, url, scraper, logger)
-                    
+
+                    for item_url in links:
+                        self.items.submit(self.scrape_item_worker, item_url, url, scraper, logger)
+                    logger.info(f"ITEM QUEUE DEPTH: {self.items.depth()}")
+
                     page += 1
                     if page > 50: break
         finally:
-            nav_driver.quit()
-            scraper.finalize()
\ No newline at end of file
+            self.items.close()
+            self.pool.close()
+            scraper.finalize()
+            self.frontier.close()
+            self.recrawl.close()
\ No newline at end of file
@@ -1,26 +1,54 @@
 # src/scraper_bostech.py
-import time
 from lxml import html
-from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait, Select
+from selenium.webdriver.support.ui import Select
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, ElementClickInterceptedException
 
-from utils.selenium_factory import create_driver
+from utils.selenium_factory import DriverPool
+from utils.waits import wait_until, probe
+from utils.fetcher import PageFetcher, ARCHIVED, paced_get
+from utils.pipeline import ItemPipeline
+from utils.extractor import Extractor, first, combined
+from utils.listing_cache import ListingCache
+from utils.page_cache import page_cache
+from utils.ratelimit import host_limiter
 from utils.base_scraper import BaseScraper
+from utils.frontier import Frontier
 from utils.logger import get_logger
-from utils.utils import (
-    get_xpath_combined, get_xpath_first, 
-    random_sleep, match_from_description
+from utils.utils import match_from_description
+from config.settings import (
+    BOSTECH_HEADLESS, BOSTECH_WAIT, BOSTECH_BATCH_SIZE, BOSTECH_THREADS,
+    BOSTECH_LISTING_FETCH, BOSTECH_ITEM_FETCH, BOSTECH_CARD_MODE, BOSTECH_DRIVER_PROFILE
 )
-from config.settings import BOSTECH_HEADLESS, BOSTECH_WAIT, BOSTECH_BATCH_SIZE, BOSTECH_THREADS
 from utils.constants import oem_list, c_c_p_all, dis_all 
 
 SITE_CODE = "BOSTECH"
 SITE_NAME = "bostech_auto"
 BASE_URL = "https://bostechauto.com"
 
+# Nodes that prove an HTTP response holds the rendered page
+HOME_READY_XPATH = "//div[contains(@class, 'section-content')]//a"
+ITEM_READY_XPATH = '//h1[contains(@class, "productView-title")]'
+
+# Listing card fields, evaluated against each APAcol card
+CARD_FIELDS = Extractor(
+    title=first('.//*[self::h3 or self::h4 or contains(@class, "title")]//text()'),
+    price=combined('.//*[contains(@class, "price")]//text()'),
+    sku=first('.//*[contains(@class, "sku") or contains(@class, "partNumber")]//text()'),
+)
+
+# Product page fields, scoped to the BigCommerce productView block (tabs sit below it)
+DETAIL_FIELDS = Extractor(
+    container='//div[contains(@class, "productView")]',
+    title=first('.//h1[contains(@class, "productView-title")]//text()'),
+    sku=first('.//dd[contains(@class, "productView-info-value")]//text()'),
+    price=first('.//span[contains(@class, "price--withoutTax")]//text()'),
+    # Extraction of Quantity from value attribute
+    quantity=first('.//input[@id="qty[]"]/@value', default="1"),
+    raw_data=combined('//div[contains(@class, "tab-content") and contains(@class, "is-active")]//text()', document=True),
+)
+
 class BostechScraper:
     def __init__(self, config):
         self.config = config
@@ -45,138 +73,216 @@ class BostechScraper:
                 "//span[contains(text(), '×')]"
             ]
             for selector in close_selectors:
-                buttons = driver.find_elements(By.XPATH, selector)
+                buttons = probe(driver, selector, "popup_probe")
                 for btn in buttons:
                     if btn.is_displayed():
                         btn.click()
-                        time.sleep(1)
+                        try:
+                            wait_until(driver, 2, EC.invisibility_of_element(btn), "popup_close")
+                        except TimeoutException:
+                            pass
         except:
             pass
 
     def get_category_urls(self, logger):
         """Discovers category links from the home page with broad XPaths."""
         logger.info("Attempting to discover categories from home page...")
-        driver = create_driver(headless=BOSTECH_HEADLESS, wait_time=BOSTECH_WAIT)
+        # Wait for any category link to appear instead of a specific class
         try:
-            driver.get(BASE_URL)
-            self.close_modals(driver)
-            
-            # Wait for any category link to appear instead of a specific class
+            tree = self.fetcher.fetch_tree(BASE_URL, mode=BOSTECH_LISTING_FETCH, ready_xpath=HOME_READY_XPATH,
+                                           on_driver=self.wait_for_home)
+        except TimeoutException:
+            logger.warning("Home page category section timed out. Using fallback list.")
+            return self.fallback_categories
+
+        if tree is None:
+            return self.fallback_categories
+
+        # Find links inside the category section or any link containing '/product/'
+        links = tree.xpath('//div[contains(@class, "section-content")]//a/@href')
+
+        if not links:
+            return self.fallback_categories
+
+        # Resolve relative paths
+        full_links = list(set([BASE_URL + l if l.startswith('/') else l for l in links if '/product/' in l]))
+        logger.info(f"Discovered {len(full_links)} categories.")
+        return full_links
+
+    def wait_for_home(self, driver):
+        self.close_modals(driver)
+        ready = EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'section-content')]//a"))
+        wait_until(driver, 15, ready, "home_ready")
+
+    def wait_for_reload(self, driver):
+        """Waits for an AJAX reload to replace the current product grid."""
+        cards = driver.find_elements(By.XPATH, '//div[contains(@class, "APAcol")]//a')
+        if cards:
             try:
-                WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'section-content')]//a"))
-                )
+                wait_until(driver, 20, EC.staleness_of(cards[0]), "ajax_reload")
             except TimeoutException:
-                logger.warning("Home page category section timed out. Using fallback list.")
-                return self.fallback_categories
-
-            tree = html.fromstring(driver.page_source)
-            # Find links inside the category section or any link containing '/product/'
-            links = tree.xpath('//div[contains(@class, "section-content")]//a/@href')
-            
-            if not links:
-                return self.fallback_categories
-
-            # Resolve relative paths
-            full_links = list(set([BASE_URL + l if l.startswith('/') else l for l in links if '/product/' in l]))
-            logger.info(f"Discovered {len(full_links)} categories.")
-            return full_links
-        finally:
-            driver.quit()
+                pass
+
+    def wait_for_item(self, driver):
+        self.close_modals(driver)
+
+        # Wait for any core product element
+        ready = EC.presence_of_element_located((By.CSS_SELECTOR, ".productView-title, h1"))
+        wait_until(driver, 15, ready, "item_ready")
+
+    def parse_cards(self, tree):
+        """Returns (item_url, card) for every product card in the current result view."""
+        cards = []
+        for link in tree.xpath('//div[contains(@class, "APAcol")]//a[contains(@class, "details")]'):
+            href = link.get("href")
+            if not href:
+                continue
+            root = link.xpath('ancestor::div[contains(@class, "APAcol")][1]')[0]
+            cards.append((BASE_URL + href if href.startswith('/') else href, CARD_FIELDS.extract(root)))
+        return cards
+
+    def parse_detail(self, tree):
+        """Fields only the product page has (plus its own view of title/price/sku)."""
+        return DETAIL_FIELDS.extract(tree)
+
+    def parse_item(self, tree, item_url, cat_url, card=None):
+        """Builds the output row from a product page tree (and its listing card, when known)."""
+        return self.build_row(card or {}, self.parse_detail(tree), item_url, cat_url)
 
-    def scrape_item_worker(self, item_url, cat_url, scraper, logger):
+    def build_row(self, card, detail, item_url, cat_url):
+        # The detail page wins where both have a value so rows match a full page scrape
+        title = detail.get("title") or card.get("title", "")
+        sku = detail.get("sku") or card.get("sku", "")
+        price = detail.get("price") or card.get("price", "")
+        quantity = detail.get("quantity", "1")
+        raw_data = detail.get("raw_data", "")
+
+        found_oem = match_from_description(title + " " + raw_data, oem_list)
+        found_eng = match_from_description(raw_data, c_c_p_all)
+
+        return {
+            "Page URL": cat_url,
+            "Item URL": item_url,
+            "Item description": title,
+            "SKU": sku,
+            "Price": price,
+            "Quantity": quantity,
+            "OEM Name": found_oem,
+            "Engine Model": found_eng,
+            "Currency": "USD",
+            "Source Name": "Bostech Auto",
+            "Raw Data": raw_data
+        }
+
+    def scrape_item_worker(self, item_url, cat_url, card, scraper, logger):
         """Worker thread for individual product pages."""
-        driver = create_driver(headless=BOSTECH_HEADLESS, wait_time=BOSTECH_WAIT)
+        if not self.frontier.claim(item_url):
+            return
         try:
-            logger.info(f"ITEM URL: {item_url}")
-            driver.get(item_url)
-            self.close_modals(driver)
-            
-            # Wait for any core product element
-            WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CSS_SELECTOR, ".productView-title, h1")))
-            
-            tree = html.fromstring(driver.page_source)
-            
-            title = get_xpath_first(tree, '//h1[contains(@class, "productView-title")]//text()')
-            sku = get_xpath_first(tree, '//dd[contains(@class, "productView-info-value")]//text()')
-            price = get_xpath_first(tree, '//span[contains(@class, "price--withoutTax")]//text()')
-            
-            # Extraction of Quantity from value attribute
-            quantity = get_xpath_first(tree, '//input[@id="qty[]"]/@value') or "1"
-            
-            raw_data = get_xpath_combined(tree, '//div[contains(@class, "tab-content") and contains(@class, "is-active")]//text()')
-
-            found_oem = match_from_description(title + " " + raw_data, oem_list)
-            found_eng = match_from_description(raw_data, c_c_p_all)
-
-            scraper.add_row({
-                "Page URL": cat_url,
-                "Item URL": item_url,
-                "Item description": title,
-                "SKU": sku,
-                "Price": price,
-                "Quantity": quantity,
-                "OEM Name": found_oem,
-                "Engine Model": found_eng,
-                "Currency": "USD",
-                "Source Name": "Bostech Auto",
-                "Raw Data": raw_data
-            })
-            logger.info(f"   SUCCESS -> SKU: {sku} | Qty: {quantity}")
+            # Only an unchanged card with a price is trusted to stand in for its detail page
+            detail = self.cache.get(item_url, card) if BOSTECH_CARD_MODE and card["price"] else None
+
+            if detail is None:
+                logger.info(f"ITEM URL: {item_url}")
+                tree = self.fetcher.fetch_tree(item_url, mode=BOSTECH_ITEM_FETCH, ready_xpath=ITEM_READY_XPATH,
+                                               on_driver=self.wait_for_item, archive_args=(cat_url, card))
+                if tree is ARCHIVED:
+                    self.frontier.done(item_url)
+                    return
+                if tree is None:
+                    logger.error(f"Product not found: {item_url}")
+                    self.frontier.failed(item_url, "not found")
+                    return
+                detail = self.parse_detail(tree)
+                self.cache.put(item_url, card, detail)
+
+            row = self.build_row(card, detail, item_url, cat_url)
+            scraper.add_row(row)
+            logger.info(f"   SUCCESS -> SKU: {row['SKU']} | Qty: {row['Quantity']}")
         except Exception as e:
             logger.error(f"Error scraping {item_url}: {str(e)[:100]}")
-        finally:
-            driver.quit()
+            self.frontier.failed(item_url, e)
 
-    def run(self):
-        logger = get_logger(SITE_NAME)
-        scraper = BaseScraper(SITE_NAME, BOSTECH_BATCH_SIZE, logger)
-        
-        categories = self.get_category_urls(logger)
-        nav_driver = create_driver(headless=BOSTECH_HEADLESS, wait_time=BOSTECH_WAIT)
+    def submit_cards(self, tree, cat_url, scraper, logger):
+        """Queues the item cards of one listing page; False when the page has none."""
+        cards = self.parse_cards(tree)
+        if not cards:
+            return False
 
-        logger.info(f"STARTING MULTI-THREADED SCRAPER: {SITE_NAME}")
+        logger.info(f"Page found: Processing {len(cards)} products in parallel...")
+        for item_url, card in cards:
+            self.items.submit(self.scrape_item_worker, item_url, cat_url, card, scraper, logger)
+        logger.info(f"ITEM QUEUE DEPTH: {self.items.depth()}")
+        return True
 
+    def replay_category(self, cat_url, scraper, logger):
+        """Cache-only mode: the AJAX pages saved by a live run, in order."""
+        page = 1
+        while True:
+            source = page_cache.get(cat_url, part=f"page-{page}")
+            if source is None or not self.submit_cards(html.fromstring(source), cat_url, scraper, logger):
+                break
+            page += 1
+
+    def run(self, resume=False):
+        logger = get_logger(SITE_NAME)
+        # Pages paginate over AJAX with no URL of their own, so only items are checkpointed
+        self.frontier = Frontier(SITE_NAME, resume, logger=logger)
+        scraper = BaseScraper(SITE_NAME, BOSTECH_BATCH_SIZE, logger, frontier=self.frontier)
+        # One extra driver for listing when live, so the item threads keep BOSTECH_THREADS of their own
+        pool_size = BOSTECH_THREADS + (0 if page_cache.cache_only else 1)
+        self.pool = DriverPool(pool_size, BOSTECH_HEADLESS, BOSTECH_WAIT, logger=logger,
+                               profile=BOSTECH_DRIVER_PROFILE)
+        self.fetcher = PageFetcher(self.pool, logger)
+        self.items = ItemPipeline(BOSTECH_THREADS, SITE_NAME, logger)
+        self.cache = ListingCache(SITE_NAME)
+
+        nav_driver = None
         try:
+            categories = self.get_category_urls(logger)
+            # Category pages paginate over AJAX, so listing stays on one long-lived driver (held from the pool,
+            # so it counts against the browser budget)
+            if not page_cache.cache_only:
+                nav_driver = self.pool.hold()
+
+            logger.info(f"STARTING MULTI-THREADED SCRAPER: {SITE_NAME}")
+
             for cat_url in categories:
+                if nav_driver is None:
+                    self.replay_category(cat_url, scraper, logger)
+                    continue
+
                 logger.info(f"NAVIGATING TO CATEGORY: {cat_url}")
-                nav_driver.get(cat_url)
+                paced_get(nav_driver, cat_url, logger)
                 self.close_modals(nav_driver)
-                random_sleep(3, 5)
 
                 # Set items per page to 12 if dropdown exists
                 try:
                     select_el = nav_driver.find_element(By.XPATH, '//select[@class="select_limit"]')
                     dropdown = Select(select_el)
+                    host_limiter(cat_url).acquire()
                     dropdown.select_by_value("12")
-                    random_sleep(2, 3)
+                    self.wait_for_reload(nav_driver)
                 except:
                     pass
 
+                page = 1
                 while True:
                     # Wait for items to load
                     try:
-                        WebDriverWait(nav_driver, 10).until(
-                            EC.presence_of_element_located((By.XPATH, '//div[contains(@class, "APAcol")]//a'))
-                        )
+                        ready = EC.presence_of_element_located((By.XPATH, '//div[contains(@class, "APAcol")]//a'))
+                        wait_until(nav_driver, 10, ready, "listing_ready")
                     except TimeoutException:
                         logger.warning(f"No products found on view for category: {cat_url}")
                         break
                     
-                    tree = html.fromstring(nav_driver.page_source)
-                    # Extract item links (matching 'see-details' or 'details')
-                    links = tree.xpath('//div[contains(@class, "APAcol")]//a[contains(@class, "details")]/@href')
-                    
-                    if not links:
+                    source = nav_driver.page_source
+                    # Extract item cards (matching 'see-details' or 'details' links)
+                    if not self.submit_cards(html.fromstring(source), cat_url, scraper, logger):
                         break
-
-                    logger.info(f"Page found: Processing {len(links)} products in parallel...")
-                    
-                    full_urls = [BASE_URL + l if l.startswith('/') else l for l in links]
-
-                    with ThreadPoolExecutor(max_workers=BOSTECH_THREADS) as executor:
-                        for item_url in full_urls:
-                            executor.submit(self.scrape_item_worker, item_url, cat_url, scraper, logger)
+                    # AJAX pages have no URL of their own; keep them by position for --cache-only
+                    page_cache.put(cat_url, source, part=f"page-{page}")
+                    page += 1
 
                     # AJAX Pagination
                     try:
@@ -184,10 +290,18 @@ class BostechScraper:
                         # Check if disabled
                         if "APAbtn-disabled" in next_btn.get_attribute("class"):
                             break
+                        # The AJAX request counts against the site's rate like any page load
+                        host_limiter(cat_url).acquire()
                         nav_driver.execute_script("arguments[0].click();", next_btn)
-                        random_sleep(4, 6) # Give extra time for AJAX load
+                        self.wait_for_reload(nav_driver)
                     except:
                         break 
         finally:
-            nav_driver.quit()
-            scraper.finalize()
\ No newline at end of file
+            self.items.close()
+            if nav_driver is not None:
+                self.pool.unhold(nav_driver)
+            self.pool.close()
+            self.cache.save()
+            logger.info(f"LISTING CACHE: {self.cache.hits} cards reused, {self.cache.misses} detail pages needed")
+            scraper.finalize()
+            self.frontier.close()
\ No newline at end of file
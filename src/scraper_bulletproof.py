@@ -1,22 +1,25 @@
 # src/scraper_bulletproof.py
 import time
 import numpy as np
-from lxml import html
-from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-from utils.selenium_factory import create_driver
+from utils.selenium_factory import DriverPool
+from utils.waits import wait_until
+from utils.fetcher import PageFetcher, FETCH_SELENIUM
+from utils.pipeline import ItemPipeline
+from utils.extractor import Extractor, first, combined
+from utils.shopify import iter_collection_products, product_url, first_variant, body_text, format_price
 from utils.base_scraper import BaseScraper
+from utils.frontier import Frontier
+from utils.recrawl import RecrawlIndex
 from utils.logger import get_logger
-from utils.utils import (
-    get_xpath_combined, get_xpath_first, 
-    random_sleep, match_from_description
-)
+from utils.utils import match_from_description, normalize_text
 from config.settings import (
     BULLETPROOF_HEADLESS, BULLETPROOF_WAIT, 
-    BULLETPROOF_BATCH_SIZE, BULLETPROOF_THREADS
+    BULLETPROOF_BATCH_SIZE, BULLETPROOF_THREADS,
+    BULLETPROOF_LISTING_FETCH, BULLETPROOF_ITEM_FETCH, BULLETPROOF_CATALOG_MODE,
+    BULLETPROOF_DRIVER_PROFILE
 )
 from utils.constants import oem_list, c_c_p_all, dis_all 
 
@@ -25,19 +28,40 @@ SITE_NAME = "bullet_proof_diesel"
 BASE_URL = "https://bulletproofdiesel.com"
 COLLECTION_URL = "https://bulletproofdiesel.com/collections/all"
 
+# Nodes that prove an HTTP response holds the rendered page
+LISTING_READY_XPATH = '//a[@class="product-item__title text--strong link"]'
+ITEM_READY_XPATH = '//*[contains(@class, "product-meta")]'
+# Product count rendered by the filter app on the collection page
+PRODUCT_COUNT_XPATH = '//p[@class="boost-pfs-filter-total-product collection__products-count text--small hidden-desk"]'
+
+# Product page fields, scoped to the theme's product block list
+ITEM_FIELDS = Extractor(
+    container='//div[contains(@class, "product-block-list")]',
+    title=first('.//h1[@class="product-meta__title heading h1"]//text()'),
+    sku=first('.//span[@class="product-meta__sku-number"]//text()'),
+    price=combined('.//div[@class="price-list"]//text()'),
+    raw_desc=combined('.//div[@class = "product-block-list__item product-block-list__item--content"]//text()'),
+    # --- Added Quantity (from previous screenshot request) ---
+    quantity=first('.//input[@name="quantity"]/@value', default="1"),
+)
+
 class BulletproofScraper:
     def __init__(self, config):
         self.config = config
 
+    def wait_for_count(self, driver):
+        wait_until(driver, 20, EC.presence_of_element_located((By.XPATH, PRODUCT_COUNT_XPATH)), "product_count")
+
     def get_total_pages(self, logger):
         """Logic to calculate total pages from the category count element."""
-        driver = create_driver(headless=BULLETPROOF_HEADLESS, wait_time=BULLETPROOF_WAIT)
         try:
-            driver.get(COLLECTION_URL)
-            xpath = '//p[@class="boost-pfs-filter-total-product collection__products-count text--small hidden-desk"]'
-            WebDriverWait(driver, 20).until(EC.presence_of_element_located((By.XPATH, xpath)))
-            
-            fill_text = driver.find_element(By.XPATH, xpath).text
+            # The count only exists once the filter app has run, so this page always takes a browser
+            tree = self.fetcher.fetch_tree(COLLECTION_URL, mode=FETCH_SELENIUM, ready_xpath=PRODUCT_COUNT_XPATH,
+                                           on_driver=self.wait_for_count)
+            if tree is None:
+                raise ValueError("collection page not available")
+
+            fill_text = normalize_text(tree.xpath(f"string({PRODUCT_COUNT_XPATH})"))
             # Logic: split and take index -2 as per your snippet
             fill_num = int(fill_text.split()[-2].replace(',', ''))
             
@@ -49,106 +73,142 @@ class BulletproofScraper:
         except Exception as e:
             logger.error(f"Failed to calculate total pages: {e}. Defaulting to 1.")
             return 1
-        finally:
-            driver.quit()
+
+    def wait_for_item(self, driver):
+        # Wait for content meta
+        wait_until(driver, 15, EC.presence_of_element_located((By.CLASS_NAME, "product-meta")), "item_ready")
+
+    def parse_item(self, tree, item_url, cat_url):
+        """Builds the output row from a product page tree."""
+        f = ITEM_FIELDS.extract(tree)
+        return self.build_row(f["title"], f["sku"], f["price"], f["raw_desc"], f["quantity"], item_url, cat_url)
+
+    def row_from_product(self, product, cat_url):
+        """Maps a products.json entry onto the same row parse_item builds."""
+        variant = first_variant(product)
+        title = normalize_text(product.get("title", ""))
+        price = format_price(variant.get("price"))
+        if variant.get("compare_at_price"):
+            # price-list shows the sale price followed by the struck-through regular price
+            price = f"{price} {format_price(variant['compare_at_price'])}"
+        return self.build_row(title, variant.get("sku") or "", price, body_text(product), "1",
+                              product_url(BASE_URL, product), cat_url)
+
+    def build_row(self, title, sku, price, raw_desc, quantity, item_url, cat_url):
+        # Engine Model & Displacement Logic
+        emo = match_from_description(title, c_c_p_all)
+        disp = match_from_description(title, dis_all)
+
+        return {
+            "Page URL": cat_url,
+            "Item URL": item_url,
+            "Item description": title,
+            "SKU": sku,
+            "OEM Name": 'Bullet Proof Diesel',
+            "Engine Model": emo,
+            "Price": price,
+            "Certification": "",
+            "Horse Power": "",
+            "Displacement": disp,
+            "Warranty": "",
+            "Stock Availability": "",
+            "Lead Time": "",
+            "Active/Analytical (Auxiliary)": "",
+            "Clean Part Description": "", # Placeholder as per legacy row
+            "Clean OEM": "",             # Placeholder as per legacy row
+            "Clean Part Number": "",      # Placeholder as per legacy row
+            "Raw Description": raw_desc,
+            "Source Name": 'Bullet Proof Diesel',
+            "Currency": "USD",
+            "Quantity": quantity
+        }
 
     def scrape_item_worker(self, item_url, cat_url, scraper, logger):
         """Worker thread for individual product scraping following legacy extraction logic."""
-        driver = create_driver(headless=BULLETPROOF_HEADLESS, wait_time=BULLETPROOF_WAIT)
+        if not self.frontier.claim(item_url):
+            return
         try:
             logger.info(f"ITEM URL: {item_url}")
-            driver.get(item_url)
-            
-            # Wait for content meta
-            WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CLASS_NAME, "product-meta")))
-            
-            tree = html.fromstring(driver.page_source)
+            tree = self.fetcher.fetch_item(item_url, scraper, self.frontier, logger, mode=BULLETPROOF_ITEM_FETCH,
+                                           ready_xpath=ITEM_READY_XPATH, on_driver=self.wait_for_item,
+                                           recrawl=self.recrawl, archive_args=(cat_url,))
+            if tree is None:
+                return
 
-            # --- Extraction (Strictly following your provided logic) ---
-            title = get_xpath_first(tree, '//h1[@class="product-meta__title heading h1"]//text()')
-            sku = get_xpath_first(tree, '//span[@class="product-meta__sku-number"]//text()')
-            price = get_xpath_combined(tree, '//div[@class="price-list"]//text()')
-            raw_desc = get_xpath_combined(tree, '//div[@class = "product-block-list__item product-block-list__item--content"]//text()')
-            
-            # --- Added Quantity (from previous screenshot request) ---
-            quantity = get_xpath_first(tree, '//input[@name="quantity"]/@value') or "1"
-
-            # Engine Model & Displacement Logic
-            emo = ""
-            for mo in c_c_p_all:
-                if str(mo) in title:
-                    emo = str(mo)
-                    break
-            
-            disp = ""
-            for dis in dis_all:
-                if str(dis) in title:
-                    disp = str(dis)
-                    break
-
-            scraper.add_row({
-                "Page URL": cat_url,
-                "Item URL": item_url,
-                "Item description": title,
-                "SKU": sku,
-                "OEM Name": 'Bullet Proof Diesel',
-                "Engine Model": emo,
-                "Price": price,
-                "Certification": "",
-                "Horse Power": "",
-                "Displacement": disp,
-                "Warranty": "",
-                "Stock Availability": "",
-                "Lead Time": "",
-                "Active/Analytical (Auxiliary)": "",
-                "Clean Part Description": "", # Placeholder as per legacy row
-                "Clean OEM": "",             # Placeholder as per legacy row
-                "Clean Part Number": "",      # Placeholder as per legacy row
-                "Raw Description": raw_desc,
-                "Source Name": 'Bullet Proof Diesel',
-                "Currency": "USD",
-                "Quantity": quantity
-            })
-            logger.info(f"   SUCCESS -> SKU: {sku} | Qty: {quantity} | Price: {price[:15]}")
+            row = self.parse_item(tree, item_url, cat_url)
+            scraper.add_row(row)
+            logger.info(f"   SUCCESS -> SKU: {row['SKU']} | Qty: {row['Quantity']} | Price: {row['Price'][:15]}")
         except Exception as e:
             logger.error(f"Error scraping product {item_url}: {str(e)[:100]}")
-        finally:
-            driver.quit()
+            self.frontier.failed(item_url, e)
 
-    def run(self):
+    def run_catalog(self, scraper, logger):
+        """Bulk mode: one JSON request per 250 products instead of a browser per product."""
+        count = 0
+        for product in iter_collection_products(COLLECTION_URL, logger=logger):
+            try:
+                row = self.row_from_product(product, COLLECTION_URL)
+                if self.frontier.claim(row["Item URL"]):
+                    scraper.add_row(row)
+                count += 1
+            except Exception as e:
+                logger.error(f"Error mapping catalog product {product.get('handle')}: {e}")
+        logger.info(f"CATALOG MODE: {count} products")
+        return count > 0
+
+    def listing_links(self, url):
+        tree = self.fetcher.fetch_tree(url, mode=BULLETPROOF_LISTING_FETCH, ready_xpath=LISTING_READY_XPATH)
+        return self.parse_listing(tree) if tree is not None else []
+
+    def parse_listing(self, tree):
+        """Product URLs on a listing page tree."""
+        # Find product links using legacy XPath logic
+        links = tree.xpath('//div[@class="boost-pfs-filter-products product-list product-list--collection"]//a[@class="product-item__title text--strong link"]/@href')
+        return [BASE_URL + l if not l.startswith('http') else l for l in links]
+
+    def run(self, resume=False):
         logger = get_logger(SITE_NAME)
-        scraper = BaseScraper(SITE_NAME, BULLETPROOF_BATCH_SIZE, logger)
-        
-        pages = self.get_total_pages(logger)
-        nav_driver = create_driver(headless=BULLETPROOF_HEADLESS, wait_time=BULLETPROOF_WAIT)
+        self.frontier = Frontier(SITE_NAME, resume, logger=logger)
+        self.recrawl = RecrawlIndex(SITE_NAME, logger=logger)
+        scraper = BaseScraper(SITE_NAME, BULLETPROOF_BATCH_SIZE, logger, frontier=self.frontier, recrawl=self.recrawl)
+        self.pool = DriverPool(BULLETPROOF_THREADS, BULLETPROOF_HEADLESS, BULLETPROOF_WAIT, logger=logger,
+                               profile=BULLETPROOF_DRIVER_PROFILE)
+        self.fetcher = PageFetcher(self.pool, logger)
+        self.items = ItemPipeline(BULLETPROOF_THREADS, SITE_NAME, logger)
 
         logger.info(f"STARTING BULLETPROOF SCRAPER (Threads: {BULLETPROOF_THREADS})")
 
         try:
+            if BULLETPROOF_CATALOG_MODE:
+                try:
+                    if self.run_catalog(scraper, logger):
+                        return
+                    logger.warning("Catalog returned no products. Falling back to page scraping.")
+                except Exception as e:
+                    logger.error(f"Catalog mode failed ({e}). Falling back to page scraping.")
+
+            pages = self.get_total_pages(logger)
+
             # Iterating through all pages
             for page in range(1, pages + 1):
                 url = f"{COLLECTION_URL}?page={page}"
                 logger.info(f"FETCHING PAGE: {url}")
-                
-                nav_driver.get(url)
-                random_sleep(3, 4)
 
-                tree = html.fromstring(nav_driver.page_source)
-                # Find product links using legacy XPath logic
-                links = tree.xpath('//div[@class="boost-pfs-filter-products product-list product-list--collection"]//a[@class="product-item__title text--strong link"]/@href')
+                full_item_urls = self.frontier.listing(url, lambda: self.listing_links(url))
 
-                if not links:
+                if not full_item_urls:
                     logger.info(f"No products found on page {page}. Ending.")
                     break
 
-                logger.info(f"Page {page}: {len(links)} products found. Processing in parallel...")
-                
-                full_item_urls = [BASE_URL + l if not l.startswith('http') else l for l in links]
+                logger.info(f"Page {page}: {len(full_item_urls)} products found. Processing in parallel...")
+
+                for item_url in full_item_urls:
+                    self.items.submit(self.scrape_item_worker, item_url, url, scraper, logger)
+                logger.info(f"ITEM QUEUE DEPTH: {self.items.depth()}")
 
-                with ThreadPoolExecutor(max_workers=BULLETPROOF_THREADS) as executor:
-                    for item_url in full_item_urls:
-                        executor.submit(self.scrape_item_worker, item_url, url, scraper, logger)
-                
         finally:
-            nav_driver.quit()
-            scraper.finalize()
\ No newline at end of file
+            self.items.close()
+            self.pool.close()
+            scraper.finalize()
+            self.frontier.close()
+            self.recrawl.close()
\ No newline at end of file
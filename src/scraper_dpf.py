@@ -1,16 +1,21 @@
 # src/scraper_dpf.py
 import time
-from lxml import html
-from concurrent.futures import ThreadPoolExecutor
 
-from utils.selenium_factory import create_driver
+from utils.selenium_factory import DriverPool
+from utils.fetcher import PageFetcher
+from utils.pipeline import ItemPipeline
+from utils.extractor import Extractor, first, combined
+from utils.shopify import iter_collection_products, product_url, first_variant, body_text
 from utils.base_scraper import BaseScraper
+from utils.cleaning import Cleaner, col_remove_each, col_remove_punctuation
+from utils.frontier import Frontier
+from utils.recrawl import RecrawlIndex
 from utils.logger import get_logger
-from utils.utils import (
-    get_xpath_combined, get_xpath_first, 
-    random_sleep, extract_dpf_part, clean_dpf_desc
+from utils.utils import extract_dpf_part, normalize_text
+from config.settings import (
+    DPF_HEADLESS, DPF_WAIT, DPF_BATCH_SIZE, DPF_THREADS,
+    DPF_LISTING_FETCH, DPF_ITEM_FETCH, DPF_CATALOG_MODE, DPF_DRIVER_PROFILE
 )
-from config.settings import DPF_HEADLESS, DPF_WAIT, DPF_BATCH_SIZE, DPF_THREADS
 from utils.constants import oem_list 
 
 SITE_CODE = "DPF"
@@ -23,87 +28,159 @@ MANUFACTURERS = {
     'Durafit': 'https://www.dpfpartsdirect.com/collections/durafit-dpfs-docs?page={}'
 }
 
+# Nodes that prove an HTTP response holds the rendered page
+LISTING_READY_XPATH = '//div[@class="boost-pfs-filter-product-bottom"]'
+ITEM_READY_XPATH = '//*[@id="productPrice"]'
+
+# Product page fields, scoped to the schema.org Product block (legacy extraction logic)
+ITEM_FIELDS = Extractor(
+    container='//*[@itemtype="http://schema.org/Product"]',
+    item_number=first('.//h1/text()'),
+    # Theme rich text outside the product (announcement bar, footer) is also class="rte"
+    description=combined('//*[@class="rte"]//text() | //*[@class="prod_sku_vend"]//text()', document=True),
+    price=first('.//*[@id="productPrice"]/@content'),
+    # Targets the input element with id="quantity" as seen in your screenshot
+    quantity=first('.//input[@id="quantity"]/@value', default="1"),
+)
+
+def clean_columns(f):
+    part = [extract_dpf_part(t) for t in f["Raw Data"]]
+    return {
+        "Clean Part Number": part,
+        "Clean Part Description": col_remove_punctuation(col_remove_each(f["Item Number"], f["OEM Name"], part)),
+    }
+
+CLEANER = Cleaner(clean_columns, "Raw Data", "Item Number", "OEM Name")
+
 class DpfScraper:
+    cleaner = CLEANER
+
     def __init__(self, config):
         self.config = config
 
+    def parse_item(self, tree, item_url, cat_url, manufacturer):
+        """Builds the output row from a product page tree."""
+        f = ITEM_FIELDS.extract(tree)
+        return self.build_row(f["item_number"], f["description"], f["price"], f["quantity"], item_url, cat_url, manufacturer)
+
+    def row_from_product(self, product, cat_url, manufacturer):
+        """Maps a products.json entry onto the same row parse_item builds."""
+        item_number = normalize_text(product.get("title", ""))
+        variant = first_variant(product)
+        # Product pages render the description followed by the SKU / vendor line
+        description = normalize_text(f"{body_text(product)} {variant.get('sku') or ''} {product.get('vendor') or ''}")
+        price = str(variant.get("price") or "")
+        return self.build_row(item_number, description, price, "1", product_url(BASE_SITE_URL, product), cat_url, manufacturer)
+
+    def build_row(self, item_number, description, price, quantity, item_url, cat_url, manufacturer):
+        return {
+            "Page URL": cat_url,
+            "Item URL": item_url,
+            "OEM Name": manufacturer,
+            "Item Description": item_number,
+            "Item Number": item_number,
+            "Price": price,
+            "Quantity": quantity, # Added field
+            "Currency": "USD",
+            "Clean Part Number": "",
+            "Clean OEM": manufacturer,
+            "Clean Part Description": "",
+            "Source Name": "DPF Parts Direct",
+            "Raw Data": description
+        }
+
     def scrape_item_worker(self, item_url, cat_url, manufacturer, scraper, logger):
         """Worker thread to process individual product pages."""
-        driver = create_driver(headless=DPF_HEADLESS, wait_time=DPF_WAIT)
+        if not self.frontier.claim(item_url):
+            return
         try:
             logger.info(f"ITEM URL: {item_url}")
-            driver.get(item_url)
-            tree = html.fromstring(driver.page_source)
-
-            # Extraction logic matching your legacy code
-            item_number = get_xpath_first(tree, '//h1/text()')
-            description = get_xpath_combined(tree, '//*[@class="rte"]//text() | //*[@class="prod_sku_vend"]//text()')
-            price = get_xpath_first(tree, '//*[@id="productPrice"]/@content')
-
-            # --- NEW: Quantity Extraction ---
-            # Targets the input element with id="quantity" as seen in your screenshot
-            quantity = get_xpath_first(tree, '//input[@id="quantity"]/@value') or "1"
-
-            part_num = extract_dpf_part(description)
-            cleaned_desc = clean_dpf_desc(item_number, manufacturer, part_num)
-
-            scraper.add_row({
-                "Page URL": cat_url,
-                "Item URL": item_url,
-                "OEM Name": manufacturer,
-                "Item Description": item_number,
-                "Item Number": item_number,
-                "Price": price,
-                "Quantity": quantity, # Added field
-                "Currency": "USD",
-                "Clean Part Number": part_num,
-                "Clean OEM": manufacturer,
-                "Clean Part Description": cleaned_desc,
-                "Source Name": "DPF Parts Direct",
-                "Raw Data": description
-            })
-            logger.info(f"   SUCCESS -> {item_number} | Price: {price} | Qty: {quantity}")
+            tree = self.fetcher.fetch_item(item_url, scraper, self.frontier, logger, mode=DPF_ITEM_FETCH,
+                                           ready_xpath=ITEM_READY_XPATH, recrawl=self.recrawl,
+                                           archive_args=(cat_url, manufacturer))
+            if tree is None:
+                return
+
+            row = self.parse_item(tree, item_url, cat_url, manufacturer)
+            scraper.add_row(row)
+            logger.info(f"   SUCCESS -> {row['Item Number']} | Price: {row['Price']} | Qty: {row['Quantity']}")
         except Exception as e:
             logger.error(f"Error scraping {item_url}: {e}")
-        finally:
-            driver.quit()
+            self.frontier.failed(item_url, e)
+
+    def run_catalog(self, scraper, logger):
+        """Bulk mode: one JSON request per 250 products instead of a browser per product."""
+        count = 0
+        for manufacturer, url_template in MANUFACTURERS.items():
+            collection_url = url_template.split("?")[0]
+            for product in iter_collection_products(collection_url, logger=logger):
+                try:
+                    row = self.row_from_product(product, collection_url, manufacturer)
+                    if self.frontier.claim(row["Item URL"]):
+                        scraper.add_row(row)
+                    count += 1
+                except Exception as e:
+                    logger.error(f"Error mapping catalog product {product.get('handle')}: {e}")
+        logger.info(f"CATALOG MODE: {count} products")
+        return count > 0
+
+    def listing_links(self, url):
+        tree = self.fetcher.fetch_tree(url, mode=DPF_LISTING_FETCH, ready_xpath=LISTING_READY_XPATH)
+        return self.parse_listing(tree) if tree is not None else []
+
+    def parse_listing(self, tree):
+        """Product URLs on a listing page tree."""
+        # Get product links
+        relative_links = tree.xpath('//div[@class="boost-pfs-filter-product-bottom"]//a/@href')
+        # Convert to absolute URLs
+        return [BASE_SITE_URL + link for link in relative_links]
 
-    def run(self):
+    def run(self, resume=False):
         logger = get_logger(SITE_NAME)
-        scraper = BaseScraper(SITE_NAME, DPF_BATCH_SIZE, logger)
-        nav_driver = create_driver(headless=DPF_HEADLESS, wait_time=DPF_WAIT)
+        self.frontier = Frontier(SITE_NAME, resume, logger=logger)
+        self.recrawl = RecrawlIndex(SITE_NAME, logger=logger)
+        scraper = BaseScraper(SITE_NAME, DPF_BATCH_SIZE, logger, frontier=self.frontier, recrawl=self.recrawl,
+                              cleaner=CLEANER)
+        self.pool = DriverPool(DPF_THREADS, DPF_HEADLESS, DPF_WAIT, logger=logger,
+                               profile=DPF_DRIVER_PROFILE)
+        self.fetcher = PageFetcher(self.pool, logger)
+        self.items = ItemPipeline(DPF_THREADS, SITE_NAME, logger)
 
         logger.info(f"STARTING THREADED SCRAPER: {SITE_NAME}")
 
         try:
+            if DPF_CATALOG_MODE:
+                try:
+                    if self.run_catalog(scraper, logger):
+                        return
+                    logger.warning("Catalog returned no products. Falling back to page scraping.")
+                except Exception as e:
+                    logger.error(f"Catalog mode failed ({e}). Falling back to page scraping.")
+
             for manufacturer, url_template in MANUFACTURERS.items():
                 page = 1
                 while True:
                     url = url_template.format(page)
                     logger.info(f"FETCHING CATEGORY PAGE: {url}")
-                    
-                    nav_driver.get(url)
-                    random_sleep(3, 5)
-                    tree = html.fromstring(nav_driver.page_source)
 
-                    # Get product links
-                    relative_links = tree.xpath('//div[@class="boost-pfs-filter-product-bottom"]//a/@href')
-                    
-                    if not relative_links:
+                    item_urls = self.frontier.listing(url, lambda: self.listing_links(url))
+
+                    if not item_urls:
                         logger.info(f"No more products for {manufacturer}.")
                         break
 
-                    # Convert to absolute URLs
-                    item_urls = [BASE_SITE_URL + link for link in relative_links]
                     logger.info(f"Found {len(item_urls)} products for {manufacturer} on Page {page}")
 
                     # Multi-threaded product scraping
-                    with ThreadPoolExecutor(max_workers=DPF_THREADS) as executor:
-                        for item_url in item_urls:
-                            executor.submit(self.scrape_item_worker, item_url, url, manufacturer, scraper, logger)
+                    for item_url in item_urls:
+                        self.items.submit(self.scrape_item_worker, item_url, url, manufacturer, scraper, logger)
+                    logger.info(f"ITEM QUEUE DEPTH: {self.items.depth()}")
                     
                     page += 1
         finally:
-            nav_driver.quit()
+            self.items.close()
+            self.pool.close()
             scraper.finalize()
+            self.frontier.close()
+            self.recrawl.close()
             logger.info(f"FINISHED SCRAPER: {SITE_NAME}")
\ No newline at end of file
@@ -1,27 +1,122 @@
-# src/scraper_filter_service_supply.py
 import time
-from lxml import html
-from utils.selenium_factory import create_driver
+from utils.selenium_factory import DriverPool
+from utils.fetcher import PageFetcher, ARCHIVED
+from utils.extractor import Extractor, first, combined
+from utils.listing_cache import ListingCache
 from utils.base_scraper import BaseScraper
+from utils.cleaning import Cleaner, col_clean_oem, col_part_number, col_remove_each, col_remove_punctuation
+from utils.frontier import Frontier
 from utils.logger import get_logger
-from utils.utils import (
-    get_xpath_combined, get_xpath_first, extract_part_number,
-    clean_oem_from_text, match_from_description, random_sleep, remove_punctuation
+from utils.utils import get_xpath_first, match_from_description
+from config.settings import (
+    FSS_HEADLESS, FSS_WAIT, FSS_BATCH_SIZE, FSS_LISTING_FETCH, FSS_ITEM_FETCH, FSS_CARD_MODE,
+    FSS_DRIVER_PROFILE
 )
-from config.settings import FSS_BATCH_SIZE
-from utils.constants import oem_list, c_c_p_all, dis_all 
+from utils.constants import oem_list, c_c_p_all, dis_all
 
 SITE_CODE = "FSS"
 SITE_NAME = "filter_service_supply"
 
+# Nodes that prove an HTTP response holds the rendered page
+LISTING_READY_XPATH = '//ul[contains(@class, "productGrid")] | //h3[@class="card-title eq-h"]'
+ITEM_READY_XPATH = '//h1[@class="productView-title"]'
+
+# Listing card fields: the title comes from the card heading, the rest from the card root
+CARD_TITLE = combined('.//a//text()')
+CARD_FIELDS = Extractor(
+    price=combined('.//span[@data-product-price-without-tax]//text()',
+                   './/span[contains(@class, "price--withoutTax")]//text()'),
+    sku=first('.//*[@data-test-info-type="sku"]//text()', './/@data-product-sku'),
+)
+
+# Product page fields, scoped to the BigCommerce productView block (the description tab sits below it)
+DETAIL_FIELDS = Extractor(
+    container='//div[contains(@class, "productView")]',
+    sku=first('.//dd[@itemprop="sku"]/text()'),
+    price=first('.//meta[@itemprop="price"]/@content', './/span[@data-product-price-without-tax]/text()'),
+    quantity=first('.//input[@id="qty[]"]/@value'),
+    # Breadcrumb entries are itemprop="name" spans too, and always were part of this value
+    manufacturer=combined('//span[@itemprop="name"]//text()', document=True),
+    title=first('.//h1[@class="productView-title"]//text()'),
+    description=combined('//div[@itemprop="description"]//text()', document=True),
+    stock=combined('.//div[@class="line-item-details availability"]//dd/text()'),
+)
+
+def clean_columns(f):
+    part = col_part_number(f["OEM Name"])
+    return {
+        "Clean Part Number": part,
+        "Clean OEM": col_clean_oem(f["OEM Name"], oem_list),
+        "Clean Part Description": col_remove_punctuation(col_remove_each(f["Part Description"], f["Displacement"], part)),
+    }
+
+CLEANER = Cleaner(clean_columns, "OEM Name", "Part Description", "Displacement")
+
 class FilterServiceAndSupplyScraper:
+    cleaner = CLEANER
+
     def __init__(self, config):
         self.start_urls = config[SITE_CODE]["start_urls"]
 
-    def run(self):
+    def parse_cards(self, tree):
+        """Returns (link, card) for every product card on a listing page."""
+        cards = []
+        for heading in tree.xpath('//h3[@class="card-title eq-h"]'):
+            link = get_xpath_first(heading, './/a/@href')
+            if not link:
+                continue
+            root = (heading.xpath('ancestor::article[1]') or heading.xpath('ancestor::li[1]') or [heading])[0]
+            card = CARD_FIELDS.extract(root)
+            card["title"] = CARD_TITLE.extract(heading)
+            cards.append((link, card))
+        return cards
+
+    def parse_detail(self, tree_3):
+        """Fields only the product page has (plus its own view of title/price/sku)."""
+        return DETAIL_FIELDS.extract(tree_3)
+
+    def parse_item(self, tree_3, link, url, start_url, card=None):
+        """Builds the output row from a product page tree (and its listing card, when known)."""
+        return self.build_row(card or {}, self.parse_detail(tree_3), link, url, start_url)
+
+    def build_row(self, card, detail, link, url, start_url):
+        # The detail page wins where both have a value so rows match a full page scrape
+        sku = detail.get("sku") or card.get("sku", "")
+        price = detail.get("price") or card.get("price", "")
+        title = detail.get("title") or card.get("title", "")
+        manufacturer = detail.get("manufacturer", "")
+        description = detail.get("description", "")
+
+        engine_model = match_from_description(description, c_c_p_all)
+        displacement = match_from_description(description, dis_all)
+
+        return {
+            "Page URL": url,
+            "Item URL": link,
+            "OEM Name": manufacturer,
+            "SKU": sku,
+            "Part Description": title,
+            "Price": price,
+            "Currency": "USD",
+            "Quantity": detail.get("quantity", ""),
+            "Engine Model": engine_model,
+            "Displacement": displacement,
+            "Clean Part Number": "",
+            "Clean OEM": "",
+            "Clean Part Description": "",
+            "Stock Availability": detail.get("stock", ""),
+            "Source Name": "Filter Service And Supply (Skyline)",
+            "Category": start_url.split("/")[-2]
+        }
+
+    def run(self, resume=False):
         logger = get_logger(SITE_NAME)
-        scraper = BaseScraper(SITE_NAME, FSS_BATCH_SIZE, logger)
-        driver = create_driver()
+        frontier = Frontier(SITE_NAME, resume, logger=logger)
+        scraper = BaseScraper(SITE_NAME, FSS_BATCH_SIZE, logger, frontier=frontier, cleaner=CLEANER)
+        # One browser, only started if a page actually needs Selenium
+        pool = DriverPool(1, FSS_HEADLESS, FSS_WAIT, logger=logger, profile=FSS_DRIVER_PROFILE)
+        fetcher = PageFetcher(pool, logger)
+        cache = ListingCache(SITE_NAME)
 
         logger.info(f"STARTING SCRAPER: {SITE_NAME}")
 
@@ -31,64 +126,46 @@ class FilterServiceAndSupplyScraper:
                 while True:
                     url = start_url.format(page)
                     logger.info(f"FETCHING PAGE: {url}")
-                    
-                    driver.get(url)
-                    random_sleep(3, 5)
 
-                    tree = html.fromstring(driver.page_source)
-                    links = tree.xpath('//h3[@class="card-title eq-h"]//a/@href')
+                    def discover():
+                        tree = fetcher.fetch_tree(url, mode=FSS_LISTING_FETCH, ready_xpath=LISTING_READY_XPATH)
+                        return self.parse_cards(tree) if tree is not None else []
+
+                    cards = frontier.listing(url, discover)
 
-                    logger.info(f"PRODUCTS FOUND ON PAGE: {len(links)}")
+                    logger.info(f"PRODUCTS FOUND ON PAGE: {len(cards)}")
 
-                    if not links:
+                    if not cards:
                         logger.info("No more products. Stopping category.")
                         break
 
-                    for link in links:
-                        logger.info(f"ITEM URL: {link}")
-                        driver.get(link)
-                        random_sleep(2, 4)
-                        tree_3 = html.fromstring(driver.page_source)
-
-                        sku = get_xpath_first(tree_3, '//dd[@itemprop="sku"]/text()')
-                        price = get_xpath_first(tree_3, '//meta[@itemprop="price"]/@content')
-                        if not price:
-                             price = get_xpath_first(tree_3, '//span[@data-product-price-without-tax]/text()')
-
-                        quantity = get_xpath_first(tree_3, '//input[@id="qty[]"]/@value')
-
-                        logger.info(f"   DATA -> SKU: {sku} | PRICE: {price} | QTY: {quantity}")
-
-                        manufacturer = get_xpath_combined(tree_3, '//span[@itemprop="name"]//text()')
-                        title = get_xpath_first(tree_3, '//h1[@class="productView-title"]//text()')
-                        description = get_xpath_combined(tree_3, '//div[@itemprop="description"]//text()')
-                        stock = get_xpath_combined(tree_3, '//div[@class="line-item-details availability"]//dd/text()')
-
-                        engine_model = match_from_description(description, c_c_p_all)
-                        displacement = match_from_description(description, dis_all)
-                        clean_part = extract_part_number(manufacturer)
-                        clean_oem = clean_oem_from_text(manufacturer, oem_list)
-                        clean_desc = remove_punctuation(title.replace(displacement, "").replace(clean_part, ""))
-
-                        scraper.add_row({
-                            "Page URL": url,
-                            "Item URL": link,
-                            "OEM Name": manufacturer,
-                            "SKU": sku,
-                            "Part Description": title,
-                            "Price": price,
-                            "Currency": "USD",
-                            "Quantity": quantity,
-                            "Engine Model": engine_model,
-                            "Displacement": displacement,
-                            "Clean Part Number": clean_part,
-                            "Clean OEM": clean_oem,
-                            "Clean Part Description": clean_desc,
-                            "Stock Availability": stock,
-                            "Source Name": "Filter Service And Supply (Skyline)",
-                            "Category": start_url.split("/")[-2]
-                        })
+                    for link, card in cards:
+                        if not frontier.claim(link):
+                            continue
+                        # Only an unchanged card with a price is trusted to stand in for its detail page
+                        detail = cache.get(link, card) if FSS_CARD_MODE and card["price"] else None
+
+                        if detail is None:
+                            logger.info(f"ITEM URL: {link}")
+                            tree_3 = fetcher.fetch_tree(link, mode=FSS_ITEM_FETCH, ready_xpath=ITEM_READY_XPATH,
+                                                        archive_args=(url, start_url, card))
+                            if tree_3 is ARCHIVED:
+                                frontier.done(link)
+                                continue
+                            if tree_3 is None:
+                                logger.error(f"Product not found: {link}")
+                                frontier.failed(link, "not found")
+                                continue
+                            detail = self.parse_detail(tree_3)
+                            cache.put(link, card, detail)
+
+                        row = self.build_row(card, detail, link, url, start_url)
+                        logger.info(f"   DATA -> SKU: {row['SKU']} | PRICE: {row['Price']} | QTY: {row['Quantity']}")
+                        scraper.add_row(row)
                     page += 1
         finally:
+            cache.save()
+            logger.info(f"LISTING CACHE: {cache.hits} cards reused, {cache.misses} detail pages needed")
+            pool.close()
             scraper.finalize()
-            driver.quit()
\ No newline at end of file
+            frontier.close()
\ No newline at end of file
@@ -1,97 +1,114 @@
 # src/scraper_finditparts.py
 import pandas as pd
 import time
-from lxml import html
 from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-from utils.selenium_factory import create_driver
+from utils.selenium_factory import DriverPool
+from utils.waits import wait_until
+from utils.fetcher import PageFetcher
 from utils.base_scraper import BaseScraper
+from utils.frontier import Frontier
+from utils.recrawl import RecrawlIndex
 from utils.logger import get_logger
-from utils.utils import get_xpath_combined, get_xpath_first
+from utils.extractor import Extractor, first, combined
+from utils.metrics import metrics, STAGE_ITEM
 from config.settings import (
     FINDIT_HEADLESS, FINDIT_WAIT, 
     FINDIT_BATCH_SIZE, FINDIT_THREADS, 
-    FINDIT_INPUT_FILE, RESOURCES_DIR
+    FINDIT_INPUT_FILE, RESOURCES_DIR, FINDIT_ITEM_FETCH, FINDIT_DRIVER_PROFILE
 )
 
 SITE_CODE = "FINDIT"
 SITE_NAME = "find_it_parts"
 
+# Nodes that prove an HTTP response holds the rendered page
+ITEM_READY_XPATH = "//input[@id='order_quantity']"
+
+# Product page fields; the Tailwind layout has no stable product wrapper, so they run on the document
+ITEM_FIELDS = Extractor(
+    # 1. Title
+    title=first("//h1/text()"),
+    # 2. Price (Targeting Tailwind cent/dollar structure)
+    price=first("//span[contains(@class, 'price_tag')]/@aria-label",
+                combined("//*[contains(@class, 'price')]//text()")),
+    # 3. Quantity (Targeting the id from your snippet)
+    quantity=first("//input[@id='order_quantity']/@value", default="1"),
+    # 4. SKU / Part Number
+    sku=first("//span[contains(@class, 'sku')]//text()", "//div[contains(@class, 'productSKU')]//text()"),
+    raw_data=combined("//div[contains(@class, 'product-description')]//text()"),
+)
+
 class FindItPartsScraper:
     def __init__(self, config):
         self.config = config
         # Construct path strictly from .env variables
         self.input_path = RESOURCES_DIR / FINDIT_INPUT_FILE
 
+    def wait_for_item(self, driver):
+        # Wait for the quantity wrapper or order form seen in your screenshot
+        ready = EC.presence_of_element_located((By.XPATH, "//input[@id='order_quantity'] | //h1"))
+        wait_until(driver, 20, ready, "item_ready")
+
+    def parse_item(self, tree, item_url):
+        """Builds the output row from a product page tree."""
+        f = ITEM_FIELDS.extract(tree)
+        title, price, quantity, sku = f["title"], f["price"], f["quantity"], f["sku"]
+
+        # Robust Parsing for Manufacturer/Part Number
+        oem_name = ""
+        part_number = sku
+
+        if title:
+            # Handle "CASE 73131703 TURBINE" style (no dashes)
+            title_parts = title.strip().split()
+            if len(title_parts) >= 1:
+                oem_name = title_parts[0] # "CASE"
+            if len(title_parts) >= 2 and not part_number:
+                part_number = title_parts[1] # "73131703"
+
+        return {
+            "Item URL": item_url,
+            "Item description": title,
+            "Price": price,
+            "Quantity": quantity,
+            "Item number": part_number,
+            "Manufacturer Name": oem_name,
+            "Currency": "USD",
+            "Source Name": "FindItParts",
+            "Raw Data": f["raw_data"]
+        }
+
     def scrape_item_worker(self, item_url, scraper, logger):
         """Worker thread for parallel URL processing."""
-        driver = create_driver(headless=FINDIT_HEADLESS, wait_time=FINDIT_WAIT)
+        if not self.frontier.claim(item_url):
+            return
         try:
             logger.info(f"FETCHING ITEM: {item_url}")
-            driver.get(item_url)
-            
-            # Wait for the quantity wrapper or order form seen in your screenshot
             try:
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.XPATH, "//input[@id='order_quantity'] | //h1"))
-                )
+                tree = self.fetcher.fetch_item(item_url, scraper, self.frontier, logger, mode=FINDIT_ITEM_FETCH,
+                                               ready_xpath=ITEM_READY_XPATH, on_driver=self.wait_for_item,
+                                               recrawl=self.recrawl, archive_args=())
             except TimeoutException:
                 logger.error(f"Timeout: Page components not found for {item_url}")
+                self.frontier.failed(item_url, "timeout")
+                return
+
+            if tree is None:
                 return
 
-            tree = html.fromstring(driver.page_source)
-
-            # 1. Title
-            title = get_xpath_first(tree, "//h1/text()")
-            
-            # 2. Price (Targeting Tailwind cent/dollar structure)
-            price = get_xpath_first(tree, "//span[contains(@class, 'price_tag')]/@aria-label")
-            if not price:
-                price = get_xpath_combined(tree, "//*[contains(@class, 'price')]//text()")
-
-            # 3. Quantity (Targeting the id from your snippet)
-            quantity = get_xpath_first(tree, "//input[@id='order_quantity']/@value") or "1"
-
-            # 4. SKU / Part Number
-            sku = get_xpath_first(tree, "//span[contains(@class, 'sku')]//text()") or \
-                  get_xpath_first(tree, "//div[contains(@class, 'productSKU')]//text()")
-
-            # Robust Parsing for Manufacturer/Part Number
-            oem_name = ""
-            part_number = sku
-            
-            if title:
-                # Handle "CASE 73131703 TURBINE" style (no dashes)
-                title_parts = title.strip().split()
-                if len(title_parts) >= 1:
-                    oem_name = title_parts[0] # "CASE"
-                if len(title_parts) >= 2 and not part_number:
-                    part_number = title_parts[1] # "73131703"
-
-            scraper.add_row({
-                "Item URL": item_url,
-                "Item description": title,
-                "Price": price,
-                "Quantity": quantity,
-                "Item number": part_number,
-                "Manufacturer Name": oem_name,
-                "Currency": "USD",
-                "Source Name": "FindItParts",
-                "Raw Data": get_xpath_combined(tree, "//div[contains(@class, 'product-description')]//text()")
-            })
-            
-            logger.info(f"   SUCCESS -> SKU: {part_number} | Price: {price} | Qty: {quantity}")
+            row = self.parse_item(tree, item_url)
+            scraper.add_row(row)
+
+            logger.info(f"   SUCCESS -> SKU: {row['Item number']} | Price: {row['Price']} | Qty: {row['Quantity']}")
 
         except Exception as e:
             logger.error(f"Error at {item_url}: {str(e)[:100]}")
-        finally:
-            driver.quit()
+            self.frontier.failed(item_url, e)
 
-    def run(self):
+    def run(self, resume=False):
         logger = get_logger(SITE_NAME)
         
         if not self.input_path.exists():
@@ -106,11 +123,21 @@ class FindItPartsScraper:
             logger.error(f"Failed to read input Excel: {e}")
             return
 
-        scraper = BaseScraper(SITE_NAME, FINDIT_BATCH_SIZE, logger)
+        # The Excel list is the frontier's seed; a resumed run skips rows already saved
+        self.frontier = Frontier(SITE_NAME, resume, logger=logger)
+        self.recrawl = RecrawlIndex(SITE_NAME, logger=logger)
+        scraper = BaseScraper(SITE_NAME, FINDIT_BATCH_SIZE, logger, frontier=self.frontier, recrawl=self.recrawl)
+        self.pool = DriverPool(FINDIT_THREADS, FINDIT_HEADLESS, FINDIT_WAIT, logger=logger,
+                               profile=FINDIT_DRIVER_PROFILE)
+        self.fetcher = PageFetcher(self.pool, logger)
         logger.info(f"STARTING FINDIT SCRAPER (Threads: {FINDIT_THREADS})")
 
-        with ThreadPoolExecutor(max_workers=FINDIT_THREADS) as executor:
-            for url in source_urls:
-                executor.submit(self.scrape_item_worker, url, scraper, logger)
-        
-        scraper.finalize()
\ No newline at end of file
+        try:
+            with ThreadPoolExecutor(max_workers=FINDIT_THREADS) as executor:
+                for url in source_urls:
+                    executor.submit(metrics.call, STAGE_ITEM, self.scrape_item_worker, url, scraper, logger)
+        finally:
+            self.pool.close()
+            scraper.finalize()
+            self.frontier.close()
+            self.recrawl.close()
\ No newline at end of file
@@ -1,85 +1,164 @@
 import time
-from lxml import html
-from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-from utils.selenium_factory import create_driver
+from utils.selenium_factory import DriverPool
+from utils.waits import wait_until
+from utils.fetcher import PageFetcher
+from utils.pipeline import ItemPipeline
+from utils.extractor import Extractor, first, combined
+from utils.shopify import iter_collection_products, product_url, first_variant, body_text, format_price
 from utils.base_scraper import BaseScraper
+from utils.cleaning import Cleaner, col_remove_each, col_remove_punctuation
+from utils.frontier import Frontier
+from utils.recrawl import RecrawlIndex
 from utils.logger import get_logger
-from utils.utils import (
-    get_xpath_combined, get_xpath_first, get_last_token_if_digit,
-    clean_description_modular, random_sleep, match_from_description
+from utils.utils import get_last_token_if_digit, match_from_description, normalize_text
+from config.settings import (
+    GOECM_HEADLESS, GOECM_WAIT, GOECM_BATCH_SIZE, GOECM_THREADS,
+    GOECM_LISTING_FETCH, GOECM_ITEM_FETCH, GOECM_CATALOG_MODE, GOECM_DRIVER_PROFILE
 )
-from config.settings import GOECM_HEADLESS, GOECM_WAIT, GOECM_BATCH_SIZE, GOECM_THREADS
 from utils.constants import oem_list, c_c_p_all, dis_all 
 
 SITE_NAME = "goecm"
+STORE_URL = "https://goecm.com"
+COLLECTION_URL = "https://goecm.com/collections/all"
 START_URL_TEMPLATE = "https://goecm.com/collections/all?page={}"
 
+# Nodes that prove an HTTP response holds the rendered page
+LISTING_READY_XPATH = '//a[@class="grid-product__link"]'
+ITEM_READY_XPATH = '//*[contains(@class, "product-single__title")]'
+
+# Product page fields, scoped to the theme's product section
+ITEM_FIELDS = Extractor(
+    container='//div[contains(@class, "product-section")]',
+    title=first('.//h1[@class="h2 product-single__title"]//text()'),
+    # The theme wraps every rich-text table on the page, not just the description's
+    raw_data=combined('//div[@class="table-wrapper"]//text()', document=True),
+    price=combined('.//span[@class="product__price"]//text()'),
+)
+
+def clean_columns(f):
+    # clean_description_modular: the title without its OEM and part number
+    desc = col_remove_each(f["Item description"], f["OEM Name"], f["Clean Part Number"])
+    return {"Clean Part Description": col_remove_punctuation(desc)}
+
+CLEANER = Cleaner(clean_columns, "Item description", "OEM Name", "Clean Part Number")
+
 class GoecmScraper:
+    cleaner = CLEANER
+
     def __init__(self, config):
         self.config = config
 
+    def wait_for_item(self, driver):
+        wait_until(driver, 15, EC.presence_of_element_located((By.CLASS_NAME, "product-single__title")), "item_ready")
+
+    def parse_item(self, tree_3, item_url, cat_url):
+        """Builds the output row from a product page tree."""
+        f = ITEM_FIELDS.extract(tree_3)
+        return self.build_row(f["title"], f["raw_data"], f["price"], item_url, cat_url)
+
+    def row_from_product(self, product, cat_url):
+        """Maps a products.json entry onto the same row parse_item builds."""
+        title = normalize_text(product.get("title", ""))
+        # The theme wraps description tables in div.table-wrapper; the JSON has the bare tables
+        raw_data = body_text(product, "//table//text()")
+        price = format_price(first_variant(product).get("price"))
+        return self.build_row(title, raw_data, price, product_url(STORE_URL, product), cat_url)
+
+    def build_row(self, title, raw_data, price, item_url, cat_url):
+        found_oem = match_from_description(raw_data, oem_list)
+        found_eng = match_from_description(raw_data, c_c_p_all)
+        found_dis = match_from_description(raw_data, dis_all)
+        part = get_last_token_if_digit(title)
+
+        return {
+            "Page URL": cat_url, "Item URL": item_url, "Item description": title, "Part Number": raw_data,
+            "OEM Name": found_oem, "Engine Model": found_eng, "Price": price, "Displacement": found_dis,
+            "Active/Analytical (Auxiliary)": "USD", "Clean Part Number": part, "Clean OEM": found_oem,
+            "Clean Part Description": "", "Source Name": "GoECM", "Raw Data": raw_data
+        }
+
     def scrape_item_worker(self, item_url, cat_url, scraper, logger):
-        # Create driver per thread for speed
-        driver = create_driver(headless=GOECM_HEADLESS, wait_time=GOECM_WAIT)
+        if not self.frontier.claim(item_url):
+            return
         try:
             logger.info(f"ITEM URL: {item_url}")
-            driver.get(item_url)
-            WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CLASS_NAME, "product-single__title")))
-            
-            tree_3 = html.fromstring(driver.page_source)
-            title = get_xpath_first(tree_3, '//h1[@class="h2 product-single__title"]//text()')
-            raw_data = get_xpath_combined(tree_3, '//div[@class="table-wrapper"]//text()')
-            price = get_xpath_combined(tree_3, '//span[@class="product__price"]//text()')
-
-            found_oem = match_from_description(raw_data, oem_list)
-            found_eng = match_from_description(raw_data, c_c_p_all)
-            found_dis = match_from_description(raw_data, dis_all)
-            part = get_last_token_if_digit(title)
-            desc = clean_description_modular(title, found_oem, part)
-
-            scraper.add_row({
-                "Page URL": cat_url, "Item URL": item_url, "Item description": title, "Part Number": raw_data,
-                "OEM Name": found_oem, "Engine Model": found_eng, "Price": price, "Displacement": found_dis,
-                "Active/Analytical (Auxiliary)": "USD", "Clean Part Number": part, "Clean OEM": found_oem,
-                "Clean Part Description": desc, "Source Name": "GoECM", "Raw Data": raw_data
-            })
-            logger.info(f"   DATA -> {part} | {price}")
+            tree_3 = self.fetcher.fetch_item(item_url, scraper, self.frontier, logger, mode=GOECM_ITEM_FETCH,
+                                             ready_xpath=ITEM_READY_XPATH, on_driver=self.wait_for_item,
+                                             recrawl=self.recrawl, archive_args=(cat_url,))
+            if tree_3 is None:
+                return
+
+            row = self.parse_item(tree_3, item_url, cat_url)
+            scraper.add_row(row)
+            logger.info(f"   DATA -> {row['Clean Part Number']} | {row['Price']}")
         except Exception as e:
             logger.error(f"Error at {item_url}: {e}")
-        finally:
-            driver.quit()
+            self.frontier.failed(item_url, e)
+
+    def run_catalog(self, scraper, logger):
+        """Bulk mode: one JSON request per 250 products instead of a browser per product."""
+        count = 0
+        for product in iter_collection_products(COLLECTION_URL, logger=logger):
+            try:
+                row = self.row_from_product(product, COLLECTION_URL)
+                if self.frontier.claim(row["Item URL"]):
+                    scraper.add_row(row)
+                count += 1
+            except Exception as e:
+                logger.error(f"Error mapping catalog product {product.get('handle')}: {e}")
+        logger.info(f"CATALOG MODE: {count} products")
+        return count > 0
 
-    def run(self):
+    def listing_links(self, url):
+        tree = self.fetcher.fetch_tree(url, mode=GOECM_LISTING_FETCH, ready_xpath=LISTING_READY_XPATH)
+        return self.parse_listing(tree) if tree is not None else []
+
+    def parse_listing(self, tree):
+        """Product URLs on a listing page tree."""
+        links = tree.xpath('//a[@class="grid-product__link"]/@href')
+        return [l if l.startswith('http') else f"https://goecm.com{l}" for l in links]
+
+    def run(self, resume=False):
         logger = get_logger(SITE_NAME)
-        scraper = BaseScraper(SITE_NAME, GOECM_BATCH_SIZE, logger)
-        nav_driver = create_driver(headless=GOECM_HEADLESS, wait_time=GOECM_WAIT)
+        self.frontier = Frontier(SITE_NAME, resume, logger=logger)
+        self.recrawl = RecrawlIndex(SITE_NAME, logger=logger)
+        scraper = BaseScraper(SITE_NAME, GOECM_BATCH_SIZE, logger, frontier=self.frontier, recrawl=self.recrawl,
+                              cleaner=CLEANER)
+        self.pool = DriverPool(GOECM_THREADS, GOECM_HEADLESS, GOECM_WAIT, logger=logger,
+                               profile=GOECM_DRIVER_PROFILE)
+        self.fetcher = PageFetcher(self.pool, logger)
+        self.items = ItemPipeline(GOECM_THREADS, SITE_NAME, logger)
 
         logger.info(f"STARTING FAST SCRAPER: {SITE_NAME}")
 
         try:
+            if GOECM_CATALOG_MODE:
+                try:
+                    if self.run_catalog(scraper, logger):
+                        return
+                    logger.warning("Catalog returned no products. Falling back to page scraping.")
+                except Exception as e:
+                    logger.error(f"Catalog mode failed ({e}). Falling back to page scraping.")
+
             page = 1
             while True:
                 url = START_URL_TEMPLATE.format(page)
                 logger.info(f"FETCHING PAGE: {url}")
-                nav_driver.get(url)
-                random_sleep(2, 3)
-
-                tree = html.fromstring(nav_driver.page_source)
-                links = tree.xpath('//a[@class="grid-product__link"]/@href')
-                
-                if not links: break
+                item_urls = self.frontier.listing(url, lambda: self.listing_links(url))
 
-                item_urls = [l if l.startswith('http') else f"https://goecm.com{l}" for l in links]
+                if not item_urls: break
 
-                # Use threads from .env
-                with ThreadPoolExecutor(max_workers=GOECM_THREADS) as executor:
-                    for item_url in item_urls:
-                        executor.submit(self.scrape_item_worker, item_url, url, scraper, logger)
+                # Persistent workers pick these up while the next page loads
+                for item_url in item_urls:
+                    self.items.submit(self.scrape_item_worker, item_url, url, scraper, logger)
+                logger.info(f"ITEM QUEUE DEPTH: {self.items.depth()}")
                 page += 1
         finally:
-            nav_driver.quit()
-            scraper.finalize()
\ No newline at end of file
+            self.items.close()
+            self.pool.close()
+            scraper.finalize()
+            self.frontier.close()
+            self.recrawl.close()
\ No newline at end of file
@@ -1,27 +1,59 @@
 # src/scraper_hdturbo.py
 import time
-from lxml import html
-from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
 
-from utils.selenium_factory import create_driver
+from utils.selenium_factory import DriverPool
+from utils.waits import wait_until, probe
+from utils.fetcher import PageFetcher
+from utils.pipeline import ItemPipeline
+from utils.extractor import Extractor, first, combined, joined
+from utils.woocommerce import iter_store_products, html_text, product_price, product_currency, product_categories
 from utils.base_scraper import BaseScraper
+from utils.cleaning import Cleaner, col_remove_each, col_remove_punctuation, col_token
+from utils.frontier import Frontier
+from utils.recrawl import RecrawlIndex
 from utils.logger import get_logger
-from utils.utils import (
-    get_xpath_combined, get_xpath_first, 
-    random_sleep, match_from_description, remove_punctuation
+from utils.utils import match_from_description, normalize_text
+from config.settings import (
+    HDTURBO_HEADLESS, HDTURBO_WAIT, HDTURBO_BATCH_SIZE, HDTURBO_THREADS,
+    HDTURBO_LISTING_FETCH, HDTURBO_ITEM_FETCH, HDTURBO_CATALOG_MODE, HDTURBO_DRIVER_PROFILE
 )
-from config.settings import HDTURBO_HEADLESS, HDTURBO_WAIT, HDTURBO_BATCH_SIZE, HDTURBO_THREADS
 from utils.constants import oem_list, c_c_p_all
 
 SITE_CODE = "HDTURBO"
 SITE_NAME = "hd_turbo"
+STORE_URL = "https://hdturbo.com"
+SHOP_URL = "https://hdturbo.com/buy-turbo-store/"
 START_URL_TEMPLATE = "https://hdturbo.com/buy-turbo-store/?product-page={}"
 
+# Nodes that prove an HTTP response holds the rendered page
+LISTING_READY_XPATH = "//ul[contains(@class, 'products')]"
+ITEM_READY_XPATH = "//h1[contains(@class, 'product_title')] | //div[contains(@class, 'summary')]"
+
+# Product page fields, scoped to the WooCommerce product block
+ITEM_FIELDS = Extractor(
+    container='//div[contains(@class, "type-product")]',
+    title=first('.//h1[contains(@class, "product_title")]/text()'),
+    sku=first('.//span[@class="sku"]/text()', './/span[contains(@class, "product_id")]/text()'),
+    price=combined('.//p[contains(@class, "price")]//span[contains(@class, "amount")]//text()'),
+    # Quantity Extraction (Targets name="quantity" from your screenshot)
+    quantity=first('.//input[@name="quantity"]/@value', default="1"),
+    # Any "...summary" div on the page counted before scoping (mini-cart, order summary widgets)
+    raw_data=combined('//div[contains(@class, "summary")]//text()', document=True),
+    category=joined('.//span[@class="posted_in"]/a/text()'),
+)
+
+def clean_columns(f):
+    title = f["Item description"]
+    return {"Clean Part Description": col_remove_punctuation(col_remove_each(title, col_token(title, 0)))}
+
+CLEANER = Cleaner(clean_columns, "Item description")
+
 class HDTurboScraper:
+    cleaner = CLEANER
+
     def __init__(self, config):
         self.config = config
 
@@ -35,94 +67,144 @@ class HDTurboScraper:
                 "//span[contains(@class, 'close')]"
             ]
             for selector in close_selectors:
-                elements = driver.find_elements(By.XPATH, selector)
+                elements = probe(driver, selector, "popup_probe")
                 for el in elements:
                     if el.is_displayed():
                         el.click()
         except:
             pass
 
+    def wait_for_item(self, driver):
+        # Close any popups that might have appeared
+        self.close_modals(driver)
+
+        # Wait for content load - broad wait (Title or Summary)
+        ready = EC.presence_of_element_located((By.XPATH, "//h1 | //div[contains(@class, 'summary')]"))
+        wait_until(driver, 20, ready, "item_ready")
+
+    def parse_item(self, tree, item_url, cat_url):
+        """Builds the output row from a product page tree."""
+        f = ITEM_FIELDS.extract(tree)
+        return self.build_row(f["title"], f["sku"], f["price"], f["quantity"], f["raw_data"], f["category"],
+                              "USD", item_url, cat_url)
+
+    def row_from_product(self, product, cat_url):
+        """Maps a Store API product onto the same row parse_item builds."""
+        title = html_text(product.get("name", ""))
+        sku = product.get("sku") or ""
+        price = product_price(product)
+        category = product_categories(product)
+        # The summary block carries title, price, short description, SKU and categories
+        raw_data = normalize_text(" ".join([
+            title, price, html_text(product.get("short_description", "")),
+            f"SKU: {sku}" if sku else "", f"Categories: {category}" if category else ""
+        ]))
+        return self.build_row(title, sku, price, "1", raw_data, category, product_currency(product) or "USD",
+                              product.get("permalink", ""), cat_url)
+
+    def build_row(self, title, sku, price, quantity, raw_data, category, currency, item_url, cat_url):
+        found_oem = match_from_description(title, oem_list)
+        found_eng = match_from_description(raw_data, c_c_p_all)
+
+        clean_part = title.split()[0].strip() if title else ""
+
+        return {
+            "Page URL": cat_url,
+            "Item URL": item_url,
+            "Item description": title,
+            "Part Number": sku if sku else clean_part,
+            "OEM Name": found_oem,
+            "Engine Model": found_eng,
+            "Price": price,
+            "Quantity": quantity,
+            "Category": category,
+            "Currency": currency,
+            "Clean OEM": found_oem,
+            "Clean Part Number": sku if sku else clean_part,
+            "Clean Part Description": "",
+            "Source Name": "HD Turbo",
+            "Raw Data": raw_data
+        }
+
     def scrape_item_worker(self, item_url, cat_url, scraper, logger):
         """Worker thread to process individual product pages."""
-        driver = create_driver(headless=HDTURBO_HEADLESS, wait_time=HDTURBO_WAIT)
+        if not self.frontier.claim(item_url):
+            return
         try:
             logger.info(f"ITEM URL: {item_url}")
-            driver.get(item_url)
-            
-            # Close any popups that might have appeared
-            self.close_modals(driver)
-
-            # Wait for content load - broad wait (Title or Summary)
             try:
-                WebDriverWait(driver, 20).until(
-                    EC.presence_of_element_located((By.XPATH, "//h1 | //div[contains(@class, 'summary')]"))
-                )
+                tree = self.fetcher.fetch_item(item_url, scraper, self.frontier, logger, mode=HDTURBO_ITEM_FETCH,
+                                               ready_xpath=ITEM_READY_XPATH, on_driver=self.wait_for_item,
+                                               recrawl=self.recrawl, archive_args=(cat_url,))
             except TimeoutException:
                 logger.error(f"Timeout: Product components didn't load for {item_url}")
+                self.frontier.failed(item_url, "timeout")
                 return
-            
-            tree = html.fromstring(driver.page_source)
-
-            # --- Extraction Logic ---
-            title = get_xpath_first(tree, '//h1[contains(@class, "product_title")]/text()')
-            sku = get_xpath_first(tree, '//span[@class="sku"]/text()') or \
-                  get_xpath_first(tree, '//span[contains(@class, "product_id")]/text()')
-            
-            price = get_xpath_combined(tree, '//p[contains(@class, "price")]//span[contains(@class, "amount")]//text()')
-            
-            # Quantity Extraction (Targets name="quantity" from your screenshot)
-            quantity = get_xpath_first(tree, '//input[@name="quantity"]/@value') or "1"
-            
-            raw_data = get_xpath_combined(tree, '//div[contains(@class, "summary")]//text()')
-
-            found_oem = match_from_description(title, oem_list)
-            found_eng = match_from_description(raw_data, c_c_p_all)
-            
-            clean_part = title.split()[0].strip() if title else ""
-            clean_desc = remove_punctuation(title.replace(clean_part, "")) if title else ""
-
-            scraper.add_row({
-                "Page URL": cat_url,
-                "Item URL": item_url,
-                "Item description": title,
-                "Part Number": sku if sku else clean_part,
-                "OEM Name": found_oem,
-                "Engine Model": found_eng,
-                "Price": price,
-                "Quantity": quantity,
-                "Currency": "USD",
-                "Clean OEM": found_oem,
-                "Clean Part Number": sku if sku else clean_part,
-                "Clean Part Description": clean_desc,
-                "Source Name": "HD Turbo",
-                "Raw Data": raw_data
-            })
-            logger.info(f"   SUCCESS -> SKU: {sku} | Qty: {quantity} | Price: {price}")
+
+            if tree is None:
+                return
+
+            row = self.parse_item(tree, item_url, cat_url)
+            scraper.add_row(row)
+            logger.info(f"   SUCCESS -> SKU: {row['Part Number']} | Qty: {row['Quantity']} | Price: {row['Price']}")
         except Exception as e:
             logger.error(f"Error scraping {item_url}: {str(e)[:100]}")
-        finally:
-            driver.quit()
+            self.frontier.failed(item_url, e)
 
-    def run(self):
+    def run_catalog(self, scraper, logger):
+        """Store API mode: paged product JSON, no listing pages or browsers."""
+        count = 0
+        for product in iter_store_products(STORE_URL, logger=logger):
+            try:
+                row = self.row_from_product(product, SHOP_URL)
+                if self.frontier.claim(row["Item URL"]):
+                    scraper.add_row(row)
+                count += 1
+            except Exception as e:
+                logger.error(f"Error mapping catalog product {product.get('permalink')}: {e}")
+        logger.info(f"CATALOG MODE: {count} products")
+        return count > 0
+
+    def listing_links(self, url):
+        tree = self.fetcher.fetch_tree(url, mode=HDTURBO_LISTING_FETCH, ready_xpath=LISTING_READY_XPATH)
+        return self.parse_listing(tree) if tree is not None else []
+
+    def parse_listing(self, tree):
+        """Product URLs on a listing page tree."""
+        # Broader WooCommerce product link selector
+        links = tree.xpath("//li[contains(@class, 'product')]//a[contains(@class, 'link')]/@href") or \
+                tree.xpath("//ul[contains(@class, 'products')]//li//a[1]/@href")
+        # Skip pagination links that might get caught
+        return [l for l in links if "product-page=" not in l]
+
+    def run(self, resume=False):
         logger = get_logger(SITE_NAME)
-        scraper = BaseScraper(SITE_NAME, HDTURBO_BATCH_SIZE, logger)
-        nav_driver = create_driver(headless=HDTURBO_HEADLESS, wait_time=HDTURBO_WAIT)
+        self.frontier = Frontier(SITE_NAME, resume, logger=logger)
+        self.recrawl = RecrawlIndex(SITE_NAME, logger=logger)
+        scraper = BaseScraper(SITE_NAME, HDTURBO_BATCH_SIZE, logger, frontier=self.frontier, recrawl=self.recrawl,
+                              cleaner=CLEANER)
+        self.pool = DriverPool(HDTURBO_THREADS, HDTURBO_HEADLESS, HDTURBO_WAIT, logger=logger,
+                               profile=HDTURBO_DRIVER_PROFILE)
+        self.fetcher = PageFetcher(self.pool, logger)
+        self.items = ItemPipeline(HDTURBO_THREADS, SITE_NAME, logger)
 
         logger.info(f"STARTING MULTI-THREADED SCRAPER: {SITE_NAME}")
 
         try:
+            if HDTURBO_CATALOG_MODE:
+                try:
+                    if self.run_catalog(scraper, logger):
+                        return
+                    logger.warning("Catalog returned no products. Falling back to page scraping.")
+                except Exception as e:
+                    logger.error(f"Catalog mode failed ({e}). Falling back to page scraping.")
+
             page = 1
             while True:
                 url = START_URL_TEMPLATE.format(page)
                 logger.info(f"FETCHING CATEGORY PAGE: {url}")
-                
-                nav_driver.get(url)
-                random_sleep(3, 5)
 
-                tree = html.fromstring(nav_driver.page_source)
-                # Broader WooCommerce product link selector
-                links = tree.xpath("//li[contains(@class, 'product')]//a[contains(@class, 'link')]/@href") or \
-                        tree.xpath("//ul[contains(@class, 'products')]//li//a[1]/@href")
+                links = self.frontier.listing(url, lambda: self.listing_links(url))
 
                 if not links:
                     logger.info("No more products found.")
@@ -130,14 +212,15 @@ class HDTurboScraper:
 
                 logger.info(f"Processing {len(links)} items via {HDTURBO_THREADS} threads...")
 
-                with ThreadPoolExecutor(max_workers=HDTURBO_THREADS) as executor:
-                    for item_url in links:
-                        # Skip pagination links that might get caught
-                        if "product-page=" in item_url: continue
-                        executor.submit(self.scrape_item_worker, item_url, url, scraper, logger)
-                
+                for item_url in links:
+                    self.items.submit(self.scrape_item_worker, item_url, url, scraper, logger)
+                logger.info(f"ITEM QUEUE DEPTH: {self.items.depth()}")
+
                 page += 1
-                if page > 50: break 
+                if page > 50: break
         finally:
-            nav_driver.quit()
-            scraper.finalize()
\ No newline at end of file
+            self.items.close()
+            self.pool.close()
+            scraper.finalize()
+            self.frontier.close()
+            self.recrawl.close()
\ No newline at end of file
@@ -1,119 +1,163 @@
 # src/scraper_vanderhaags.py
 import time
-from lxml import html
 from concurrent.futures import ThreadPoolExecutor
+from lxml import etree
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-from utils.selenium_factory import create_driver
+from utils.selenium_factory import DriverPool
+from utils.waits import wait_until
+from utils.fetcher import PageFetcher
+from utils.extractor import Extractor, combined
+from utils.metrics import metrics, STAGE_ITEM
 from utils.base_scraper import BaseScraper
+from utils.cleaning import Cleaner, col_remove_each, col_remove_punctuation, col_token
+from utils.frontier import Frontier
+from utils.recrawl import RecrawlIndex
 from utils.logger import get_logger
-from utils.utils import (
-    get_xpath_combined, get_xpath_first, 
-    random_sleep, remove_punctuation,
-    extract_vander_part, extract_vander_oem
+from config.settings import (
+    VANDERHAAGS_HEADLESS, VANDERHAAGS_WAIT, VANDERHAAGS_BATCH_SIZE, VANDERHAAGS_THREADS,
+    VANDERHAAGS_LISTING_FETCH, VANDERHAAGS_ITEM_FETCH, VANDERHAAGS_DRIVER_PROFILE
 )
-from config.settings import VANDERHAAGS_HEADLESS, VANDERHAAGS_WAIT, VANDERHAAGS_BATCH_SIZE, VANDERHAAGS_THREADS
 
 SITE_CODE = "VANDERHAAGS"
 SITE_NAME = "vander_haags"
 BASE_URL = "https://www.vanderhaags.com/"
 LISTING_URL = "https://www.vanderhaags.com/Search-Unit.php?inventorytype=truck&items=500&order=Lowest+Price"
 
+# Nodes that prove an HTTP response holds the rendered page
+LISTING_READY_XPATH = '//div[@class="item-card "]'
+ITEM_READY_XPATH = '//*[@class="item-price"]'
+
+# Truck page fields; the page has no single wrapper around title, price and info tabs
+ITEM_FIELDS = Extractor(
+    desc=combined('//h1[1]//text()'),
+    price=combined('//*[@class="item-price"]//text()'),
+)
+INFO_TEXT_XPATH = etree.XPath('//*[@class="iteminfo"]//text() | //*[@id="panel2a"]//text() | //*[@class="accordion"]//text()')
+
+def clean_columns(f):
+    desc = f["Item description"]
+    # extract_vander_part / extract_vander_oem: after the last "=", and the second word
+    part = col_token(desc, -1, "=")
+    oem = col_token(desc, 1)
+    return {
+        "Clean Part Number": part,
+        "Clean OEM": oem,
+        "Clean Part Description": col_remove_punctuation(col_remove_each(desc, oem, part)),
+    }
+
+CLEANER = Cleaner(clean_columns, "Item description")
+
 class VanderHaagsScraper:
+    cleaner = CLEANER
+
     def __init__(self, config):
         self.config = config
 
+    def wait_for_item(self, driver):
+        # Wait for main description block
+        wait_until(driver, 15, EC.presence_of_element_located((By.XPATH, "//h1")), "item_ready")
+
+    def parse_item(self, tree, item_url, cat_url):
+        """Builds the output row from a truck page tree."""
+        # Core fields
+        f = ITEM_FIELDS.extract(tree)
+        desc, price = f["desc"], f["price"]
+
+        # Detailed Info Table Extraction (Legacy loop logic)
+        table_data = INFO_TEXT_XPATH(tree)
+        table_text = [t.strip() for t in table_data if t.strip()]
+
+        info = {
+            "Item #": "", "Sleeper": "", "Engine": "", 
+            "Mileage": "", "VIN": "", "GVW": ""
+        }
+
+        for i, text in enumerate(table_text):
+            if 'Item #:' in text: info["Item #"] = text.replace('Item #:', '').strip()
+            elif text == 'Sleeper:' and i+1 < len(table_text): info["Sleeper"] = table_text[i+1]
+            elif text == 'Engine:' and i+1 < len(table_text): info["Engine"] = table_text[i+1]
+            elif text == 'Mileage:' and i+1 < len(table_text): info["Mileage"] = table_text[i+1]
+            elif text == 'VIN:' and i+1 < len(table_text): info["VIN"] = table_text[i+1]
+            elif text == 'GVW:' and i+1 < len(table_text): info["GVW"] = table_text[i+1]
+
+        return {
+            "Page URL": cat_url,
+            "Item URL": item_url,
+            "Item description": desc,
+            "Price": price,
+            "Currency": "USD",
+            "Item #": info["Item #"],
+            "Sleeper": info["Sleeper"],
+            "Engine": info["Engine"],
+            "Mileage": info["Mileage"],
+            "VIN": info["VIN"],
+            "GVW": info["GVW"],
+            "Clean Part Number": "",
+            "Clean OEM": "",
+            "Clean Part Description": "",
+            "Source Name": "Vander Haags"
+        }
+
     def scrape_item_worker(self, item_url, cat_url, scraper, logger):
         """Worker thread to process individual truck pages."""
-        driver = create_driver(headless=VANDERHAAGS_HEADLESS, wait_time=VANDERHAAGS_WAIT)
+        if not self.frontier.claim(item_url):
+            return
         try:
             logger.info(f"ITEM URL: {item_url}")
-            driver.get(item_url)
-            
-            # Wait for main description block
-            WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.XPATH, "//h1")))
-            
-            tree = html.fromstring(driver.page_source)
-
-            # Core fields
-            desc = get_xpath_combined(tree, '//h1[1]//text()')
-            price = get_xpath_combined(tree, '//*[@class="item-price"]//text()')
-            
-            # Detailed Info Table Extraction (Legacy loop logic)
-            table_data = tree.xpath('//*[@class="iteminfo"]//text() | //*[@id="panel2a"]//text() | //*[@class="accordion"]//text()')
-            table_text = [t.strip() for t in table_data if t.strip()]
-            
-            info = {
-                "Item #": "", "Sleeper": "", "Engine": "", 
-                "Mileage": "", "VIN": "", "GVW": ""
-            }
-
-            for i, text in enumerate(table_text):
-                if 'Item #:' in text: info["Item #"] = text.replace('Item #:', '').strip()
-                elif text == 'Sleeper:' and i+1 < len(table_text): info["Sleeper"] = table_text[i+1]
-                elif text == 'Engine:' and i+1 < len(table_text): info["Engine"] = table_text[i+1]
-                elif text == 'Mileage:' and i+1 < len(table_text): info["Mileage"] = table_text[i+1]
-                elif text == 'VIN:' and i+1 < len(table_text): info["VIN"] = table_text[i+1]
-                elif text == 'GVW:' and i+1 < len(table_text): info["GVW"] = table_text[i+1]
-
-            # Processing Logic
-            part = extract_vander_part(desc)
-            oem = extract_vander_oem(desc)
-            clean_desc = desc.replace(str(oem), "").replace(str(part), "")
-            clean_desc = remove_punctuation(clean_desc).strip()
-
-            scraper.add_row({
-                "Page URL": cat_url,
-                "Item URL": item_url,
-                "Item description": desc,
-                "Price": price,
-                "Currency": "USD",
-                "Item #": info["Item #"],
-                "Sleeper": info["Sleeper"],
-                "Engine": info["Engine"],
-                "Mileage": info["Mileage"],
-                "VIN": info["VIN"],
-                "GVW": info["GVW"],
-                "Clean Part Number": part,
-                "Clean OEM": oem,
-                "Clean Part Description": clean_desc,
-                "Source Name": "Vander Haags"
-            })
-            logger.info(f"   SUCCESS -> Item #: {info['Item #']} | Price: {price}")
+            tree = self.fetcher.fetch_item(item_url, scraper, self.frontier, logger, missing="Truck page not found",
+                                           mode=VANDERHAAGS_ITEM_FETCH, ready_xpath=ITEM_READY_XPATH,
+                                           on_driver=self.wait_for_item, recrawl=self.recrawl,
+                                           archive_args=(cat_url,))
+            if tree is None:
+                return
+
+            row = self.parse_item(tree, item_url, cat_url)
+            scraper.add_row(row)
+            logger.info(f"   SUCCESS -> Item #: {row['Item #']} | Price: {row['Price']}")
         except Exception as e:
             logger.error(f"Error scraping {item_url}: {str(e)[:100]}")
-        finally:
-            driver.quit()
+            self.frontier.failed(item_url, e)
 
-    def run(self):
+    def listing_links(self):
+        tree = self.fetcher.fetch_tree(LISTING_URL, mode=VANDERHAAGS_LISTING_FETCH, ready_xpath=LISTING_READY_XPATH)
+        return self.parse_listing(tree) if tree is not None else []
+
+    def parse_listing(self, tree):
+        """Truck URLs on the listing page tree."""
+        # Find relative URLs for items
+        relative_links = tree.xpath('//div[@class="item-card "]//a/@href')
+
+        # Resolve to full URLs and remove duplicates
+        return list(set([BASE_URL + l.lstrip('/') for l in relative_links]))
+
+    def run(self, resume=False):
         logger = get_logger(SITE_NAME)
-        scraper = BaseScraper(SITE_NAME, VANDERHAAGS_BATCH_SIZE, logger)
-        nav_driver = create_driver(headless=VANDERHAAGS_HEADLESS, wait_time=VANDERHAAGS_WAIT)
+        self.frontier = Frontier(SITE_NAME, resume, logger=logger)
+        self.recrawl = RecrawlIndex(SITE_NAME, logger=logger)
+        scraper = BaseScraper(SITE_NAME, VANDERHAAGS_BATCH_SIZE, logger, frontier=self.frontier, recrawl=self.recrawl,
+                              cleaner=CLEANER)
+        self.pool = DriverPool(VANDERHAAGS_THREADS, VANDERHAAGS_HEADLESS, VANDERHAAGS_WAIT, logger=logger,
+                               profile=VANDERHAAGS_DRIVER_PROFILE)
+        self.fetcher = PageFetcher(self.pool, logger)
 
         logger.info(f"STARTING MULTI-THREADED SCRAPER: {SITE_NAME}")
 
         try:
             logger.info(f"FETCHING LISTING PAGE: {LISTING_URL}")
-            nav_driver.get(LISTING_URL)
-            random_sleep(4, 6)
-
-            tree = html.fromstring(nav_driver.page_source)
-            # Find relative URLs for items
-            relative_links = tree.xpath('//div[@class="item-card "]//a/@href')
-            
-            # Resolve to full URLs and remove duplicates
-            item_urls = list(set([BASE_URL + l.lstrip('/') for l in relative_links]))
-            
+            item_urls = self.frontier.listing(LISTING_URL, self.listing_links)
+
             logger.info(f"Found {len(item_urls)} trucks to process...")
 
             # Run in parallel using threads from .env
             with ThreadPoolExecutor(max_workers=VANDERHAAGS_THREADS) as executor:
                 for url in item_urls:
-                    executor.submit(self.scrape_item_worker, url, LISTING_URL, scraper, logger)
+                    executor.submit(metrics.call, STAGE_ITEM, self.scrape_item_worker, url, LISTING_URL, scraper, logger)
 
         finally:
-            nav_driver.quit()
+            self.pool.close()
             scraper.finalize()
+            self.frontier.close()
+            self.recrawl.close()
             logger.info(f"FINISHED SCRAPER: {SITE_NAME}")
\ No newline at end of file
@@ -0,0 +1,157 @@
+# utils/archive.py
+import gzip
+import json
+import threading
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+from utils.metrics import metrics
+from config.settings import DATA_DIR, RUN_MONTH, ARCHIVE_LEVEL
+
+# Record types, as in WARC: a fetched page body, or a finished row that needs no extraction
+RECORD_PAGE = "resource"
+RECORD_ROW = "metadata"
+RECORD_INFO = "warcinfo"
+
+def archive_path(name: str, run_month: str = RUN_MONTH):
+    return DATA_DIR / "archive" / f"{name}_{run_month}.warc.gz"
+
+def complete_length(path) -> int:
+    """Bytes up to the end of the last complete gzip member (record)."""
+    good = pos = 0
+    member = zlib.decompressobj(31)
+    with path.open("rb") as f:
+        while chunk := f.read(1 << 20):
+            while chunk:
+                member.decompress(chunk)
+                if not member.eof:
+                    pos += len(chunk)
+                    break
+                rest = member.unused_data
+                pos += len(chunk) - len(rest)
+                good = pos
+                member = zlib.decompressobj(31)
+                chunk = rest
+    return good
+
+
+class PageArchive:
+    """
+    Append-only fetch archive for one site and RUN_MONTH:
+    DATA_DIR/archive/<SITE>_<RUN_MONTH>.warc.gz.
+
+    The layout follows WARC: each record is its own gzip member holding a
+    `WARC/1.1` header block, a blank line and Content-Length bytes of payload,
+    so the file reads with standard WARC tools and a crash loses at most the
+    record being written. Pages are `resource` records carrying the arguments
+    the site's parse_item takes after (tree, url) in an X-Parse-Args header;
+    rows the fetch stage already finished (catalog mode, carried-forward or
+    card-only rows) are `metadata` records with the row as JSON.
+
+    Written by the fetch stage (main.py --fetch-only) through PageFetcher and
+    ArchiveSink; read back by utils/archive_extract.py.
+    """
+
+    def __init__(self, name: str, resume: bool = False, run_month: str = RUN_MONTH, level: int = ARCHIVE_LEVEL):
+        self.path = archive_path(name, run_month)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.level = level
+        self.counts = {"pages": 0, "rows": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        # A resumed fetch stage keeps what the interrupted one archived, minus a half-written last record
+        fresh = not resume or not self.path.exists()
+        if not fresh:
+            length = complete_length(self.path)
+            if length < self.path.stat().st_size:
+                with self.path.open("r+b") as f:
+                    f.truncate(length)
+        self._file = self.path.open("wb" if fresh else "ab")
+        if fresh:
+            self._write(RECORD_INFO, "", b"", "application/warc-fields",
+                        {"X-Run-Month": run_month, "X-Site": name})
+
+    def _write(self, kind: str, url: str, payload: bytes, content_type: str, extra: dict = None):
+        headers = {
+            "WARC-Type": kind,
+            "WARC-Target-URI": url,
+            "WARC-Date": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "WARC-Record-ID": f"<urn:uuid:{uuid.uuid4()}>",
+            "Content-Type": content_type,
+            **(extra or {}),
+            "Content-Length": str(len(payload)),
+        }
+        head = "WARC/1.1\r\n" + "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+        record = gzip.compress(head.encode("utf-8") + payload + b"\r\n\r\n", self.level)
+        with self._lock:
+            self._file.write(record)
+            self._file.flush()
+            self.counts["bytes"] += len(record)
+
+    def add_page(self, url: str, body, args=()):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self._write(RECORD_PAGE, url, body, "text/html",
+                    {"X-Parse-Args": json.dumps(list(args), ensure_ascii=True, default=str)})
+        with self._lock:
+            self.counts["pages"] += 1
+        metrics.inc("archive_records_total", kind="page")
+
+    def add_rows(self, rows: list):
+        for row in rows:
+            payload = json.dumps(row, ensure_ascii=False, default=str).encode("utf-8")
+            self._write(RECORD_ROW, str(row.get("Item URL", "")), payload, "application/json")
+        with self._lock:
+            self.counts["rows"] += len(rows)
+        metrics.inc("archive_records_total", len(rows), kind="row")
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_records(path, logger=None):
+    """
+    Yields (type, url, args, payload) for every page and row record in order.
+    A truncated last record (the fetch stage died mid-write) ends the stream.
+    """
+    with gzip.open(path, "rb") as f:
+        while True:
+            try:
+                line = f.readline()
+                if not line:
+                    return
+                if not line.startswith(b"WARC/"):
+                    raise ValueError(f"not a WARC record: {line[:40]!r}")
+                headers = {}
+                for line in iter(f.readline, b"\r\n"):
+                    if not line:
+                        raise EOFError("header block cut short")
+                    key, _, value = line.decode("utf-8").partition(":")
+                    headers[key.strip()] = value.strip()
+                length = int(headers["Content-Length"])
+                payload = f.read(length)
+                if len(payload) < length:
+                    raise EOFError("payload cut short")
+                f.read(4)
+            except (EOFError, gzip.BadGzipFile, ValueError) as e:
+                if logger:
+                    logger.warning(f"ARCHIVE ENDS EARLY ({e}): {path}")
+                return
+
+            kind = headers.get("WARC-Type")
+            if kind == RECORD_INFO:
+                continue
+            args = json.loads(headers.get("X-Parse-Args", "[]"))
+            yield kind, headers.get("WARC-Target-URI", ""), args, payload
+
+
+_attached = None
+
+def attach_archive(archive):
+    """Sends this process's item pages and rows to `archive` (the fetch stage), or back to normal with None."""
+    global _attached
+    _attached = archive
+
+def attached_archive():
+    return _attached
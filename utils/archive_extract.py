@@ -0,0 +1,117 @@
+# utils/archive_extract.py
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from lxml import html
+
+from utils.archive import archive_path, read_records, RECORD_PAGE, RECORD_ROW
+from utils.base_scraper import BaseScraper
+from utils.metrics import metrics, STAGE_ITEM
+from config.settings import ARCHIVE_WORKERS, ARCHIVE_CHUNK, ARCHIVE_BATCH_SIZE
+
+_scraper = None
+
+def _init_worker(scraper_cls, config):
+    global _scraper
+    _scraper = scraper_cls(config)
+
+def _extract_chunk(pages):
+    """[(url, args, body)] -> (clean rows, [(url, error)], [seconds per page]) in one worker process."""
+    rows, errors, seconds = [], [], []
+    for url, args, body in pages:
+        start = time.monotonic()
+        try:
+            tree = html.fromstring(body, base_url=url)
+            rows.append(_scraper.parse_item(tree, url, *args))
+        except Exception as e:
+            errors.append((url, f"{type(e).__name__}: {e}"[:200]))
+        seconds.append(time.monotonic() - start)
+    cleaner = getattr(_scraper, "cleaner", None)
+    if cleaner is not None:
+        cleaner(rows)
+    return rows, errors, seconds
+
+
+class ArchiveExtractor:
+    """
+    Extraction stage of the fetch archive (main.py --extract): reads
+    DATA_DIR/archive/<SITE>_<RUN_MONTH>.warc.gz and runs the site's parse_item
+    on every page record in a process pool, so parsing and the matching loops
+    use every core instead of sharing the fetch threads' GIL. The site's
+    Cleaner runs on each chunk in the worker too. Row records are passed
+    through as they are. Everything lands in a BaseScraper, so output,
+    batching and metrics are the same as a normal run's.
+
+    A row is kept once per (Page URL, Item URL), like a normal run: an item
+    listed under several categories keeps a row per listing page, while a page
+    archived twice for the same listing (a resumed fetch stage) yields one.
+    At most two chunks per worker are in flight, so the archive is streamed
+    rather than loaded.
+    """
+
+    def __init__(self, scraper_cls, config, name: str, site_name: str, logger,
+                 workers: int = ARCHIVE_WORKERS, chunk: int = ARCHIVE_CHUNK, batch_size: int = ARCHIVE_BATCH_SIZE):
+        self.scraper_cls = scraper_cls
+        self.config = config
+        self.path = archive_path(name)
+        self.site_name = site_name
+        self.logger = logger
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk = chunk
+        self.batch_size = batch_size
+        self.counts = {"pages": 0, "rows": 0, "duplicates": 0, "errors": 0}
+        self._seen = set()
+
+    def _add(self, row, scraper):
+        key = (row.get("Page URL"), row.get("Item URL"))
+        if key in self._seen:
+            self.counts["duplicates"] += 1
+            return
+        self._seen.add(key)
+        scraper.add_row(row)
+
+    def _collect(self, future, scraper):
+        rows, errors, seconds = future.result()
+        for row in rows:
+            self._add(row, scraper)
+        for s in seconds:
+            metrics.observe("stage_seconds", s, stage=STAGE_ITEM)
+        for url, error in errors:
+            self.logger.error(f"Extraction failed for {url}: {error}")
+            metrics.inc("stage_errors_total", stage=STAGE_ITEM)
+        self.counts["errors"] += len(errors)
+
+    def run(self):
+        if not self.path.exists():
+            raise FileNotFoundError(f"No fetch archive at {self.path}; run main.py --fetch-only first")
+
+        self.logger.info(f"EXTRACTING {self.path.name} with {self.workers} processes")
+        # Page rows come back clean; row records were cleaned by the fetch stage's writer
+        scraper = BaseScraper(self.site_name, self.batch_size, self.logger)
+        chunk, pending = [], deque()
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                     initargs=(self.scraper_cls, self.config)) as pool:
+                for kind, url, args, payload in read_records(self.path, self.logger):
+                    if kind == RECORD_ROW:
+                        self._add(json.loads(payload), scraper)
+                        self.counts["rows"] += 1
+                    elif kind == RECORD_PAGE:
+                        chunk.append((url, args, payload))
+                        self.counts["pages"] += 1
+                        if len(chunk) >= self.chunk:
+                            pending.append(pool.submit(_extract_chunk, chunk))
+                            chunk = []
+                            if len(pending) >= self.workers * 2:
+                                self._collect(pending.popleft(), scraper)
+                if chunk:
+                    pending.append(pool.submit(_extract_chunk, chunk))
+                while pending:
+                    self._collect(pending.popleft(), scraper)
+        finally:
+            self.logger.info(f"ARCHIVE EXTRACTION: {self.counts}")
+            metrics.attach("archive", dict(self.counts))
+            scraper.finalize()
@@ -1,43 +1,174 @@
 # utils/base_scraper.py
-import pandas as pd
-from config.settings import DATA_DIR, RUN_MONTH
+import queue
+import threading
+
+from utils.metrics import metrics, STAGE_CLEAN, STAGE_FLUSH
+from utils.page_cache import page_cache
+from utils.ratelimit import rate_stats
+from utils.records import Record
+from utils.sinks import make_sink
+from utils.waits import wait_stats
+from config.settings import DATA_DIR, RUN_MONTH, WRITER_QUEUE_SIZE
+
+_FLUSH = object()
+_STOP = object()
 
 class BaseScraper:
-    def __init__(self, site_name: str, batch_size: int, logger):
+    """
+    Collects rows from any number of worker threads and writes them in batches.
+
+    add_row turns the row into a compact Record (utils/records.py, with the
+    price parsed) and enqueues it; a single background writer thread owns the buffer
+    and hands full batches to the output sink (CSV files or a Parquet file, see
+    utils/sinks.py), so scraping threads never wait on pandas or disk. The
+    queue is bounded: when the writer falls behind, add_row blocks until there
+    is room again. finalize() drains everything still queued before returning.
+
+    With a Cleaner (utils/cleaning.py), each batch gets the site's clean
+    columns in one vectorized pass just before it is written.
+
+    With a Frontier attached, the item URLs of each saved batch are marked done
+    once the sink reports them on disk; with a RecrawlIndex, their rows are
+    remembered for next month's run.
+
+    Creating a BaseScraper starts this process's metrics for the site
+    (utils/metrics.py); they are exported after every batch and at finalize().
+    """
+
+    def __init__(self, site_name: str, batch_size: int, logger, queue_size: int = WRITER_QUEUE_SIZE, sink=None,
+                 frontier=None, recrawl=None, cleaner=None):
         self.site_name = site_name
+        metrics.start(site_name)
         self.batch_size = batch_size
         self.logger = logger
-        self.rows = []
-        self.total_processed = 0 
+        self.out_dir = DATA_DIR / f"{site_name}_{RUN_MONTH}"
+        self.frontier = frontier
+        self.recrawl = recrawl
+        self.sink = sink or make_sink(self.out_dir, logger, durable=frontier is not None or recrawl is not None)
+        self.cleaner = cleaner
+
+        self.rows = []  # Records, owned by the writer thread
+        self.total_processed = 0
+        self.batch_count = self.sink.last_seq() if frontier and frontier.resume else 0
+        self.stalls = 0
+
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closed = False
+        self._writer = threading.Thread(target=self._write_loop, name=f"{site_name}-writer", daemon=True)
+        self._writer.start()
 
     def add_row(self, row: dict):
-        self.rows.append(row)
-        if len(self.rows) >= self.batch_size:
-            self.flush_batch()
+        metrics.inc("rows_total")
+        row = Record.from_row(row)
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Back-pressure: wait for the writer instead of growing without bound
+            self.stalls += 1
+            metrics.inc("writer_stalls_total")
+            self._queue.put(row)
 
     def flush_batch(self):
+        """Asks the writer to write whatever it has buffered."""
+        self._queue.put(_FLUSH)
+
+    def _write_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._write_batch(final=True)
+                try:
+                    self._rows_saved(self.sink.close(), "final")
+                except Exception as e:
+                    self.logger.error(f"FAILED TO CLOSE OUTPUT for {self.site_name}: {e}")
+                return
+            if item is _FLUSH:
+                self._write_batch()
+                continue
+
+            self.rows.append(item)
+            if len(self.rows) >= self.batch_size:
+                self._write_batch()
+
+    def _write_batch(self, final: bool = False):
         if not self.rows:
             return
 
-        self.total_processed += len(self.rows)
-        df = pd.DataFrame(self.rows)
+        rows = self.rows
+        # Only this thread numbers batches, so sink names never repeat within a run
+        seq = self.batch_count + 1
+        if self.cleaner is not None:
+            try:
+                with metrics.stage(STAGE_CLEAN):
+                    self.cleaner(rows)
+            except Exception as e:
+                # Written without clean columns rather than not at all
+                self.logger.error(f"FAILED TO CLEAN BATCH {seq}: {e}")
+        try:
+            with metrics.stage(STAGE_FLUSH):
+                saved_to, durable = self.sink.write(rows, seq, self.total_processed + len(rows))
+        except Exception as e:
+            # Keep the rows buffered; the next batch (or finalize) retries them
+            self.logger.error(f"FAILED TO SAVE BATCH {seq}: {e}")
+            return
+
+        self.rows = []
+        self.batch_count += 1
+        self.total_processed += len(rows)
+        self._rows_saved(durable, seq)
+        if final:
+            self.logger.info(f"SAVED FINAL BATCH: {saved_to}")
+        else:
+            self.logger.info(f"SAVED BATCH: {saved_to} | Total rows: {self.total_processed}")
 
-        out_dir = DATA_DIR / f"{self.site_name}_{RUN_MONTH}"
-        out_dir.mkdir(parents=True, exist_ok=True)
+        metrics.inc("rows_saved_total", len(rows))
+        metrics.inc("batches_total")
+        metrics.gauge("writer_queue_depth", self._queue.qsize())
+        self._export_metrics()
 
-        batch_file = out_dir / f"batch_{self.total_processed}.csv"
-        df.to_csv(batch_file, index=False)
+    def _rows_saved(self, rows: list, seq):
+        # Only rows the sink reports on disk: a buffered Parquet row group dies with the process
+        if not rows:
+            return
+        for state in (self.frontier, self.recrawl):
+            if state is None:
+                continue
+            try:
+                state.rows_saved(rows)
+            except Exception as e:
+                self.logger.error(f"FAILED TO UPDATE {type(state).__name__.upper()} for batch {seq}: {e}")
 
-        self.logger.info(f"SAVED BATCH: {batch_file.name} | Total rows: {self.total_processed}")
-        self.rows = []
+    def _export_metrics(self):
+        try:
+            metrics.export()
+        except Exception as e:
+            self.logger.error(f"FAILED TO EXPORT METRICS for {self.site_name}: {e}")
 
     def finalize(self):
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._writer.join()
+
         if self.rows:
-            self.total_processed += len(self.rows)
-            df = pd.DataFrame(self.rows)
-            out_dir = DATA_DIR / f"{self.site_name}_{RUN_MONTH}"
-            batch_file = out_dir / f"batch_{self.total_processed}.csv"
-            df.to_csv(batch_file, index=False)
-            self.logger.info(f"SAVED FINAL BATCH: {batch_file.name}")
-        
-        self.logger.info(f"SCRAPING COMPLETE: {self.site_name} | TOTAL RECORDS: {self.total_processed}")
\ No newline at end of file
+            self.logger.error(f"{len(self.rows)} ROWS COULD NOT BE SAVED for {self.site_name}")
+        if self.stalls:
+            self.logger.info(f"WRITER QUEUE FULL {self.stalls} times (queue size {self._queue.maxsize})")
+        self.logger.info(f"SCRAPING COMPLETE: {self.site_name} | TOTAL RECORDS: {self.total_processed}")
+
+        metrics.attach("rate_limit", rate_stats())
+        metrics.attach("waits", wait_stats.summary())
+        try:
+            page_cache.evict()
+        except Exception as e:
+            self.logger.error(f"PAGE CACHE EVICTION FAILED: {e}")
+        metrics.attach("page_cache", page_cache.stats())
+        if self.recrawl is not None:
+            metrics.attach("recrawl", dict(self.recrawl.counts))
+        if self.frontier is not None:
+            try:
+                metrics.attach("frontier", self.frontier.stats())
+            except Exception:
+                pass
+        self._export_metrics()
+        self.logger.info(f"METRICS: {DATA_DIR / 'metrics' / f'{self.site_name}_{RUN_MONTH}'}.prom/.json")
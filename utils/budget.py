@@ -0,0 +1,138 @@
+# utils/budget.py
+import os
+import threading
+from multiprocessing.managers import BaseManager
+
+from config.settings import BROWSER_BUDGET, BROWSER_MEMORY_MB, BROWSER_SITE_MIN
+
+try:
+    import psutil
+except ImportError:  # optional: pip install psutil; /proc/meminfo is read otherwise
+    psutil = None
+
+def available_memory_mb():
+    """Memory available for new processes, or None when it cannot be read."""
+    if psutil is not None:
+        return psutil.virtual_memory().available // (1024 * 1024)
+    try:
+        with open("/proc/meminfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
+
+def browser_budget() -> int:
+    """
+    How many Chrome instances the whole machine may run at once: BROWSER_BUDGET
+    when set, otherwise available memory / BROWSER_MEMORY_MB, never more than
+    two per CPU.
+    """
+    if BROWSER_BUDGET > 0:
+        return BROWSER_BUDGET
+    by_cpu = 2 * (os.cpu_count() or 2)
+    memory = available_memory_mb()
+    if memory is None:
+        return by_cpu
+    return max(1, min(by_cpu, memory // BROWSER_MEMORY_MB))
+
+
+class BrowserBudget:
+    """
+    Machine-wide browser slots shared by every site process.
+
+    Lives in a manager process (see BudgetManager); DriverPools reach it through
+    a proxy and take a slot before starting Chrome. Slots are split between the
+    sites currently asking for browsers by water-filling: each gets at least
+    `site_min` (up to what it asked for), the rest is handed out one slot at a
+    time up to each site's pool size. When a site finishes, its share is spread
+    over the sites still running; a site holding more than its share gives
+    drivers back as they are checked in (see should_release).
+    """
+
+    def __init__(self, total: int, site_min: int = BROWSER_SITE_MIN):
+        self.total = max(1, int(total))
+        self.site_min = max(0, int(site_min))
+        self._cond = threading.Condition()
+        self._wanted = {}
+        self._in_use = {}
+        self._alloc = {}
+
+    def _reallocate(self):
+        caps = dict(self._wanted)
+        alloc = {site: min(self.site_min, cap) for site, cap in caps.items()}
+        remaining = self.total - sum(alloc.values())
+        while remaining > 0:
+            growing = [site for site in sorted(caps) if alloc[site] < caps[site]]
+            if not growing:
+                break
+            for site in growing:
+                if remaining == 0:
+                    break
+                alloc[site] += 1
+                remaining -= 1
+        self._alloc = alloc
+        self._cond.notify_all()
+
+    def _can_take(self, site) -> bool:
+        return (self._in_use.get(site, 0) < self._alloc.get(site, 0)
+                and sum(self._in_use.values()) < self.total)
+
+    def acquire(self, site: str, wanted: int, block: bool = True) -> bool:
+        """Takes a slot for one more of `site`'s browsers; `wanted` is its pool size."""
+        with self._cond:
+            if self._wanted.get(site) != wanted:
+                self._wanted[site] = max(1, int(wanted))
+                self._in_use.setdefault(site, 0)
+                self._reallocate()
+            while not self._can_take(site):
+                if not block:
+                    return False
+                self._cond.wait()
+            self._in_use[site] += 1
+            return True
+
+    def release(self, site: str):
+        with self._cond:
+            if self._in_use.get(site, 0) > 0:
+                self._in_use[site] -= 1
+            self._cond.notify_all()
+
+    def should_release(self, site: str) -> bool:
+        """True while `site` holds more browsers than its current share."""
+        with self._cond:
+            return self._in_use.get(site, 0) > self._alloc.get(site, 0)
+
+    def finish(self, site: str):
+        """The site is done; its share goes to the sites still running."""
+        with self._cond:
+            self._wanted.pop(site, None)
+            self._in_use.pop(site, None)
+            self._reallocate()
+
+    def snapshot(self) -> dict:
+        with self._cond:
+            return {
+                "total": self.total,
+                "in_use": dict(self._in_use),
+                "allocation": dict(self._alloc),
+            }
+
+
+class BudgetManager(BaseManager):
+    pass
+
+BudgetManager.register("BrowserBudget", BrowserBudget)
+
+
+# The budget proxy and site code of this process, set by main.run_scraper
+_attached = None
+
+def attach_budget(budget, site: str):
+    global _attached
+    _attached = (budget, site)
+
+def attached_budget():
+    """(budget proxy, site code) for this process, or None when running without a scheduler."""
+    return _attached
@@ -0,0 +1,79 @@
+# utils/cleaning.py
+from utils.matcher import OEM_SCAN_HEAD, get_matcher
+from utils.utils import PUNCTUATION_TABLE, extract_part_number
+
+# Columns are plain lists: pandas' string methods on object columns loop in Python
+# too, and cost more than the work itself at the writer's batch sizes
+
+def col_unique_map(values: list, fn) -> list:
+    """`fn` applied once per distinct value (manufacturer and OEM strings repeat across a batch)."""
+    memo = {value: fn(value) for value in set(values)}
+    return [memo[value] for value in values]
+
+def col_remove_each(text: list, *parts: list) -> list:
+    """Per row, `text` with every occurrence of each part removed, in order (str.replace)."""
+    for part in parts:
+        text = [t.replace(p, "") for t, p in zip(text, part)]
+    return text
+
+def col_remove_punctuation(values: list) -> list:
+    return [t.translate(PUNCTUATION_TABLE).strip() for t in values]
+
+def col_token(values: list, index: int, sep: str = None) -> list:
+    """t.split(sep)[index].strip(), "" where there is no such token."""
+    out = []
+    for t in values:
+        tokens = t.split(sep)
+        out.append(tokens[index].strip() if -len(tokens) <= index < len(tokens) else "")
+    return out
+
+def col_part_number(values: list) -> list:
+    return col_unique_map(values, extract_part_number)
+
+def col_first_match(values: list, names: list) -> list:
+    """The earliest-listed of `names` found in each value (case-insensitive), "" for none."""
+    return col_unique_map(values, get_matcher(names, ignore_case=True).first)
+
+def col_clean_oem(values: list, oem_list: list) -> list:
+    """clean_oem_from_text over a column."""
+    first = get_matcher(oem_list, ignore_case=True, scan_head=OEM_SCAN_HEAD).first
+
+    def one(text):
+        oem = first(text) if text else ""
+        if not oem:
+            return ""
+        if "volvo/mack" in text.lower():
+            return "Volvo/Mack"
+        return "Mercedes-Benz" if oem == "Mercedes" else oem
+
+    return col_unique_map(values, one)
+
+
+class Cleaner:
+    """
+    A site's "Clean ..." columns, computed for a whole batch at once by
+    BaseScraper's writer (or an extraction worker) instead of row by row in the
+    scraping threads.
+
+    `columns(f)` gets the batch's `raw` fields as {field: [str per row]} and
+    returns {column: [value per row]}; the values are written back into the row
+    dicts. Scrapers leave those columns as "" so the column order stays put.
+    Rows missing a raw field (saved by an older version) are left as they are.
+    Every column must depend only on its row's raw fields, so cleaning a row
+    twice is harmless.
+    """
+
+    def __init__(self, columns, *raw: str):
+        self.columns = columns
+        self.raw = raw
+        self._raw = frozenset(raw)
+
+    def __call__(self, rows: list) -> int:
+        todo = [row for row in rows if row.keys() >= self._raw]
+        if not todo:
+            return 0
+        f = {key: [row[key] or "" for row in todo] for key in self.raw}
+        for name, values in self.columns(f).items():
+            for row, value in zip(todo, values):
+                row[name] = value
+        return len(todo)
@@ -1,9 +1,27 @@
 # config/constants.py
+"""
+Lookup tables for the text matchers: oem_list, c_c_p_all (engine models) and
+dis_all (displacements).
 
-import pandas as pd
-from config.settings import BASE_DIR
+They are attributes loaded on first access (PEP 562), from a JSON file under
+DATA_DIR/cache. The file is rebuilt from the CSVs and OEM_NAMES whenever this
+file or the CSVs differ in mtime or size from when it was written, so only the
+first process after a change pays for pandas. Anything in the file that is not
+three lists of strings is ignored and rebuilt. The matcher automata are built
+from the tables on first use (utils/matcher.get_matcher).
+"""
+import json
+import os
+
+from config.settings import BASE_DIR, DATA_DIR
+
+ENGINE_MODEL_CSV = BASE_DIR / "Engine Model All.csv"
+DISPLACEMENT_CSV = BASE_DIR / "Engine Displacement All.csv"
+CACHE_FILE = DATA_DIR / "cache" / "constants.json"
+TABLES = ("oem_list", "c_c_p_all", "dis_all")
 
 def load_list(filename, column):
+    import pandas as pd  # only needed when the cache is rebuilt
     path = BASE_DIR / filename
     if not path.exists():
         print(f"File not found: {path}")
@@ -11,7 +29,7 @@ def load_list(filename, column):
     return pd.read_csv(path)[column].tolist()
 
 # List of OEMs to look for in text
-oem_list = ['Volvo', 'Mack', 'Volvo-Mack', 'Hino', 'Isuzu', 'Cummins', 'Road Choice', 'Rig Force',
+OEM_NAMES = ['Volvo', 'Mack', 'Volvo-Mack', 'Hino', 'Isuzu', 'Cummins', 'Road Choice', 'Rig Force',
             'Dorman', 'Autocar', 'Horton', 'Pai-Industries', 'Pai Industries','Fleetguard','Automann', 'Donaldson', 'Caterpillar',
             'Detroit-Diesel', 'International', 'Paccar', 'Dodge', 'Chevrolet','GMC','Chevrolet-GMC', 'Ford', 'Acura', 'Audi', 'BMW','BMW-Mini',
             'Buick', 'Chrysler', 'Honda', 'Hyundai', 'Jaguar', 'Jeep', 'Kia', 'Land Rover', 'Lincoln', 'Mazda',
@@ -140,14 +158,60 @@ oem_list = ['Volvo', 'Mack', 'Volvo-Mack', 'Hino', 'Isuzu', 'Cummins', 'Road Cho
             'USA', 'USA STANDARD', 'JOHNSON CONTROLS', 'SMC', 'WORLD AMERICAN',
             'WILLIAMS TECTRAN', 'Hydreco', 'BendPak']
 
-oem_list = [i.title() for i in oem_list]
+ext_cols = ['Clean Part Number','Clean OEM', 'Clean Part Description', 'Source Name']
+
+def _source_key():
+    """What the cached tables were built from; any change means a rebuild."""
+    key = []
+    for path in (__file__, ENGINE_MODEL_CSV, DISPLACEMENT_CSV):
+        try:
+            st = os.stat(path)
+            key.append([str(path), st.st_mtime_ns, st.st_size])
+        except OSError:
+            key.append([str(path), None, None])
+    return key
+
+def _build():
+    return {
+        "oem_list": [i.title() for i in OEM_NAMES],
+        # Engine Models (c_c_p_all stands for common engine models)
+        "c_c_p_all": [str(i) for i in load_list(ENGINE_MODEL_CSV.name, 'Engine Model')],
+        # Displacements
+        "dis_all": [str(i) for i in load_list(DISPLACEMENT_CSV.name, 'Eng Displacement')],
+    }
+
+def _valid(cached, key) -> bool:
+    if not isinstance(cached, dict) or cached.get("key") != key:
+        return False
+    tables = cached.get("tables")
+    return (isinstance(tables, dict) and set(tables) == set(TABLES)
+            and all(isinstance(v, list) and all(isinstance(i, str) for i in v) for v in tables.values()))
 
-# Engine Models (c_c_p_all stands for common engine models)
-c_c_p_all = load_list('Engine Model All.csv', 'Engine Model')
+def _load():
+    key = _source_key()
+    try:
+        with CACHE_FILE.open("r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if _valid(cached, key):
+            return cached["tables"]
+    except (OSError, ValueError):
+        pass
 
-c_c_p_all = [str(i) for i in c_c_p_all]
-# Displacements
-dis_all = load_list('Engine Displacement All.csv','Eng Displacement')
-dis_all = [str(i) for i in dis_all]
+    tables = _build()
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_FILE.with_name(f"{CACHE_FILE.name}.{os.getpid()}.tmp")
+        with tmp.open("w", encoding="utf-8") as f:
+            json.dump({"key": key, "tables": tables}, f, ensure_ascii=False)
+        tmp.replace(CACHE_FILE)
+    except OSError as e:
+        print(f"Could not cache lookup tables in {CACHE_FILE}: {e}")
+    return tables
 
-ext_cols = ['Clean Part Number','Clean OEM', 'Clean Part Description', 'Source Name']
\ No newline at end of file
+def __getattr__(name):
+    if name not in TABLES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    tables = _load()
+    # Plain module attributes from here on
+    globals().update(tables)
+    return tables[name]
@@ -0,0 +1,98 @@
+# utils/extractor.py
+from lxml import etree
+
+from utils.metrics import metrics, STAGE_EXTRACT
+from utils.utils import normalize_text
+
+FIRST = "first"
+COMBINED = "combined"
+JOINED = "joined"
+
+class Field:
+    """
+    One output field: an ordered chain of XPaths compiled once at import.
+    The first expression that yields a non-empty value wins (`A or B or default`).
+
+    Modes mirror the old helpers: FIRST is get_xpath_first, COMBINED is
+    get_xpath_combined and JOINED joins the raw values with `sep`.
+    A chain entry may itself be a Field, to fall back across modes.
+    Expressions should be relative (`.//span...`) so they stay inside the scope node.
+    """
+
+    def __init__(self, *xpaths, mode=FIRST, default="", sep=", ", document=False):
+        self.xpaths = [x if isinstance(x, Field) else etree.XPath(x) for x in xpaths]
+        self.mode = mode
+        self.default = default
+        self.sep = sep
+        self.document = document
+
+    def _value(self, xpath, node) -> str:
+        try:
+            values = xpath(node)
+        except Exception:
+            return ""
+        if not values or not isinstance(values, list):
+            return ""
+        if self.mode == COMBINED:
+            return normalize_text(" ".join([str(v) for v in values if v]))
+        if self.mode == JOINED:
+            return self.sep.join(str(v) for v in values)
+        return normalize_text(str(values[0]))
+
+    def extract(self, node) -> str:
+        for xpath in self.xpaths:
+            value = xpath.extract(node) if isinstance(xpath, Field) else self._value(xpath, node)
+            if value:
+                return value
+        return ""
+
+
+def first(*xpaths, **kwargs) -> Field:
+    return Field(*xpaths, mode=FIRST, **kwargs)
+
+def combined(*xpaths, **kwargs) -> Field:
+    return Field(*xpaths, mode=COMBINED, **kwargs)
+
+def joined(*xpaths, sep=", ", **kwargs) -> Field:
+    return Field(*xpaths, mode=JOINED, sep=sep, **kwargs)
+
+
+class Extractor:
+    """
+    A scraper's field selectors, declared once per module.
+
+    `container` locates the product block; fields are evaluated against it so
+    `.//` expressions only walk that subtree instead of the whole document.
+    When the container is missing, or a field finds nothing inside it, the field
+    is evaluated against the document so layout drift degrades to the old
+    full-page behaviour rather than to empty values. Fields declared with
+    `document=True` (breadcrumbs, page title...) always use the document.
+
+    Scoping only keeps the old output when nothing outside the block matches:
+    a COMBINED or JOINED field whose selector can also hit breadcrumbs, widgets
+    or footer text must be document=True, or it silently loses that text.
+    """
+
+    def __init__(self, container=None, **fields):
+        self.container = etree.XPath(container) if container else None
+        self.fields = fields
+
+    def scope(self, tree):
+        if self.container is None:
+            return tree
+        try:
+            nodes = self.container(tree)
+        except Exception:
+            return tree
+        return nodes[0] if nodes else tree
+
+    def extract(self, tree) -> dict:
+        with metrics.stage(STAGE_EXTRACT):
+            scope = self.scope(tree)
+            data = {}
+            for name, field in self.fields.items():
+                value = field.extract(tree if field.document else scope)
+                if not value and scope is not tree and not field.document:
+                    value = field.extract(tree)
+                data[name] = value or field.default
+        return data
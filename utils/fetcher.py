@@ -0,0 +1,335 @@
+# utils/fetcher.py
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import urllib3
+from lxml import html
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+
+from utils.metrics import (
+    metrics, STAGE_HTTP, STAGE_PAGE_LOAD, STAGE_PAGE_WAIT, STAGE_PAGE_SOURCE, STAGE_PARSE
+)
+from utils.archive import attached_archive
+from utils.page_cache import page_cache
+from utils.ratelimit import host_limiter, looks_blocked, title_blocked
+from utils.utils import get_random_user_agent
+from utils.waits import wait_until
+from config.settings import HTTP_TIMEOUT, HTTP_RETRIES, HTTP_POOL_SIZE, CATALOG_REPLAY_DIR, MOCK_SITE_URL
+
+FETCH_HTTP = "http"
+FETCH_SELENIUM = "selenium"
+
+# Statuses that mean the page genuinely does not exist; no point asking Chrome
+NOT_FOUND_STATUSES = (404, 410)
+
+# Returned by fetch_tree when a conditional request comes back 304
+NOT_MODIFIED = object()
+
+# Returned by fetch_tree when the page went to the fetch archive instead of being parsed
+ARCHIVED = object()
+
+# How long a Selenium page without its own on_driver wait may take to show ready_xpath,
+# when the fetcher has no DriverPool (whose wait_time applies otherwise)
+READY_TIMEOUT = 15
+
+_http_lock = threading.Lock()
+_http_pool = None
+
+def get_http_pool():
+    """Process-wide keep-alive connection pool, created on first use."""
+    global _http_pool
+    with _http_lock:
+        if _http_pool is None:
+            _http_pool = urllib3.PoolManager(
+                num_pools=20,
+                maxsize=HTTP_POOL_SIZE,
+                block=False,
+                timeout=urllib3.Timeout(connect=10, read=HTTP_TIMEOUT),
+                retries=urllib3.Retry(total=HTTP_RETRIES, backoff_factor=0.5, redirect=5),
+            )
+        return _http_pool
+
+def routed(url: str) -> str:
+    """
+    Where a request for `url` is actually sent: the URL itself, or with MOCK_SITE_URL
+    set, the mock server with the original host as the first path segment
+    (https://goecm.com/products/x?a=1 -> http://127.0.0.1:8765/goecm.com/products/x?a=1).
+    Rate limiting, the frontier and output rows keep using the original URL.
+    """
+    if not MOCK_SITE_URL or url.startswith(MOCK_SITE_URL):
+        return url
+    parts = urlsplit(url)
+    return f"{MOCK_SITE_URL}/{parts.netloc}{parts.path or '/'}" + (f"?{parts.query}" if parts.query else "")
+
+def report_rate(limiter, logger=None, **signal):
+    """Passes a response signal to the host limiter and logs when the rate drops."""
+    rate = limiter.report(**signal)
+    if rate is not None and logger:
+        reason = ", ".join(f"{k}={v}" for k, v in signal.items() if v and k != "latency")
+        logger.warning(f"RATE DOWN {limiter.host}: {rate:.2f} req/s ({reason or 'slow response'})")
+
+def http_get(url, headers=None, method="GET", logger=None):
+    """
+    Plain GET (or HEAD) through the shared pool, paced by the host's rate limiter.
+    Bodies are gzip/deflate decoded by urllib3.
+    """
+    request_headers = urllib3.util.make_headers(accept_encoding=True, user_agent=get_random_user_agent())
+    request_headers["Accept"] = "text/html,application/xhtml+xml,application/json;q=0.9,*/*;q=0.8"
+    request_headers["Accept-Language"] = "en-US,en;q=0.9"
+    if headers:
+        request_headers.update(headers)
+
+    limiter = host_limiter(url)
+    limiter.acquire()
+    start = time.monotonic()
+    try:
+        with metrics.stage(STAGE_HTTP):
+            resp = get_http_pool().request(method, routed(url), headers=request_headers)
+    except Exception:
+        report_rate(limiter, logger, error=True)
+        raise
+    metrics.inc("http_responses_total", status=resp.status)
+    report_rate(limiter, logger, status=resp.status, latency=time.monotonic() - start,
+                retry_after=resp.headers.get("Retry-After"))
+    return resp
+
+def paced_get(driver, url, logger=None):
+    """driver.get for drivers a scraper drives itself (nav drivers), paced like every other request."""
+    limiter = host_limiter(url)
+    limiter.acquire()
+    start = time.monotonic()
+    try:
+        with metrics.stage(STAGE_PAGE_LOAD):
+            driver.get(routed(url))
+    except Exception:
+        report_rate(limiter, logger, error=True)
+        raise
+    report_rate(limiter, logger, latency=time.monotonic() - start, blocked=title_blocked(driver.title))
+
+def replay_file(replay_dir, url: str) -> Path:
+    """Fixture file name for a JSON URL, e.g. goecm_com_collections_all_products_json_limit_250_page_1.json"""
+    key = re.sub(r"[^A-Za-z0-9]+", "_", url.split("://", 1)[-1]).strip("_")
+    return Path(replay_dir) / f"{key}.json"
+
+def get_json(url: str, replay_dir=CATALOG_REPLAY_DIR):
+    """
+    Fetches a JSON document, or reads it from the replay directory when one is set.
+    Goes through the page cache like any page; a miss in cache-only mode is an empty document.
+    """
+    if replay_dir:
+        path = replay_file(replay_dir, url)
+        if not path.exists():
+            return {}
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+
+    body = page_cache.get(url)
+    if body is None:
+        if page_cache.cache_only:
+            return {}
+        resp = http_get(url, headers={"Accept": "application/json"})
+        if resp.status != 200:
+            raise RuntimeError(f"HTTP {resp.status} for {url}")
+        body = resp.data
+        page_cache.put(url, body)
+    return json.loads(body.decode("utf-8"))
+
+
+class PageFetcher:
+    """
+    Fetches a page and returns its parsed lxml tree.
+
+    In `http` mode the page is pulled over the shared connection pool and only
+    handed to Selenium when the response is unusable or `ready_xpath` finds no
+    nodes (JS-rendered content, bot walls). In `selenium` mode a driver is
+    checked out of the DriverPool, or the caller's own driver is used.
+
+    Given a RecrawlIndex, the request carries last run's validators and a 304
+    returns NOT_MODIFIED. Selenium pages are checked with a conditional HEAD
+    first, so an unchanged page never opens a browser.
+
+    Pages are read from the page cache before anything else, and every usable
+    page (ready_xpath present, not a bot wall) is stored in it, whichever path
+    fetched it. In cache-only mode a miss is answered as a missing page.
+
+    In the fetch stage of `main.py --fetch-only` (a PageArchive attached to the
+    process), item pages fetched with `archive_args` are appended to the archive
+    and answered with ARCHIVED; `main.py --extract` parses them later.
+    """
+
+    def __init__(self, pool=None, logger=None):
+        self.pool = pool
+        self.logger = logger
+        self.archive = attached_archive()
+
+    def fetch_tree(self, url, mode=FETCH_SELENIUM, ready_xpath=None, on_driver=None, driver=None, recrawl=None,
+                   archive_args=None):
+        """
+        Returns the parsed tree for `url`, None when the page does not exist, or
+        NOT_MODIFIED when `recrawl` is given and the page is unchanged.
+
+        `on_driver(driver)` runs after `driver.get(url)` on the Selenium path and is
+        where per-site waits and popup handling live.
+
+        `archive_args` are the arguments after (tree, url) of the scraper's
+        parse_item for this page; with an archive attached the page is stored
+        with them and ARCHIVED is returned instead of a tree.
+        """
+        archiving = self.archive is not None and archive_args is not None
+        cached = page_cache.get(url)
+        if cached is not None:
+            if archiving:
+                return self._archive(url, cached, archive_args)
+            with metrics.stage(STAGE_PARSE):
+                return html.fromstring(cached, base_url=url)
+        if page_cache.cache_only:
+            if self.logger:
+                self.logger.info(f"NOT IN PAGE CACHE: {url}")
+            return None
+
+        if mode == FETCH_HTTP:
+            tree, status, headers, body = self._fetch_http(url, recrawl)
+            if status == 304:
+                return NOT_MODIFIED
+            if status in NOT_FOUND_STATUSES:
+                return None
+            if tree is not None and (not ready_xpath or tree.xpath(ready_xpath)):
+                # Only a real page's validators are worth sending next time, not a bot wall's
+                if recrawl is not None:
+                    recrawl.observe(url, headers)
+                page_cache.put(url, body)
+                if archiving and body is not None:
+                    return self._archive(url, body, archive_args)
+                return tree
+            if self.logger:
+                self.logger.info(f"HTTP FALLBACK -> SELENIUM ({status}): {url}")
+        elif recrawl is not None and recrawl.enabled and self._check_head(url, recrawl) == 304:
+            return NOT_MODIFIED
+
+        tree, body = self._fetch_selenium(url, on_driver, driver, ready_xpath)
+        if archiving and body is not None:
+            return self._archive(url, body, archive_args)
+        return tree
+
+    def fetch_item(self, url, scraper, frontier, logger, missing="Product not found", **fetch_args):
+        """
+        fetch_tree for an item worker. Returns the tree to parse, or None once the
+        item is settled: its last row carried forward after a 304, the page
+        archived, or the item marked failed because the page does not exist.
+        """
+        tree = self.fetch_tree(url, **fetch_args)
+        if tree is NOT_MODIFIED:
+            row = fetch_args["recrawl"].carry_forward(url)
+            if row is not None:
+                scraper.add_row(row)
+                logger.info(f"   NOT MODIFIED -> carried forward: {url}")
+                return None
+            # The stored row is gone (and its validators with it): fetch the page unconditionally
+            logger.warning(f"NOT MODIFIED without a stored row, fetching again: {url}")
+            tree = self.fetch_tree(url, **fetch_args)
+            if tree is NOT_MODIFIED:
+                frontier.failed(url, "not modified, no stored row")
+                return None
+
+        if tree is ARCHIVED:
+            frontier.done(url)
+            return None
+        if tree is None:
+            logger.error(f"{missing}: {url}")
+            frontier.failed(url, "not found")
+            return None
+        return tree
+
+    def _archive(self, url, body, args):
+        self.archive.add_page(url, body, args)
+        return ARCHIVED
+
+    def _check_head(self, url, recrawl):
+        """Conditional HEAD ahead of a browser load; also picks up validators for next run."""
+        try:
+            resp = http_get(url, headers=recrawl.validators(url), method="HEAD", logger=self.logger)
+        except Exception:
+            return None
+        if resp.status == 200:
+            recrawl.observe(url, resp.headers)
+        return resp.status
+
+    def _fetch_http(self, url, recrawl=None):
+        """(tree, status, headers, body); body is None unless the response is a page worth caching."""
+        try:
+            resp = http_get(url, headers=recrawl.validators(url) if recrawl is not None else None, logger=self.logger)
+        except Exception as e:
+            if self.logger:
+                self.logger.warning(f"HTTP fetch failed for {url}: {str(e)[:100]}")
+            return None, None, {}, None
+
+        if resp.status != 200 or not resp.data:
+            return None, resp.status, resp.headers, None
+        with metrics.stage(STAGE_PARSE):
+            tree = html.fromstring(resp.data, base_url=url)
+        if looks_blocked(tree):
+            report_rate(host_limiter(url), self.logger, blocked=True)
+            return tree, resp.status, resp.headers, None
+        return tree, resp.status, resp.headers, resp.data
+
+    def _fetch_selenium(self, url, on_driver=None, driver=None, ready_xpath=None):
+        """(tree, source); source is None unless the page is worth caching."""
+        if driver is not None:
+            return self._load(driver, url, on_driver, ready_xpath)
+        if self.pool is None:
+            raise RuntimeError(f"No driver available for Selenium fetch of {url}")
+
+        pooled = self.pool.checkout()
+        try:
+            return self._load(pooled, url, on_driver, ready_xpath)
+        finally:
+            self.pool.checkin(pooled)
+
+    def _load(self, driver, url, on_driver=None, ready_xpath=None):
+        limiter = host_limiter(url)
+        limiter.acquire()
+        start = time.monotonic()
+        try:
+            with metrics.stage(STAGE_PAGE_LOAD):
+                driver.get(routed(url))
+        except Exception:
+            report_rate(limiter, self.logger, error=True)
+            raise
+        latency = time.monotonic() - start
+
+        ready = True
+        try:
+            with metrics.stage(STAGE_PAGE_WAIT):
+                if on_driver:
+                    on_driver(driver)
+                elif ready_xpath:
+                    # Wait for the content itself instead of sleeping a fixed time
+                    timeout = self.pool.wait_time if self.pool is not None else READY_TIMEOUT
+                    try:
+                        wait_until(driver, timeout, EC.presence_of_element_located((By.XPATH, ready_xpath)),
+                                   "page_ready")
+                    except TimeoutException:
+                        ready = False
+        except TimeoutException:
+            ready = False
+            raise
+        finally:
+            if self.pool is not None:
+                self.pool.page_result(ready)
+
+        with metrics.stage(STAGE_PAGE_SOURCE):
+            source = driver.page_source
+        with metrics.stage(STAGE_PARSE):
+            tree = html.fromstring(source)
+        blocked = looks_blocked(tree)
+        report_rate(limiter, self.logger, latency=latency, blocked=blocked)
+        if ready and not blocked and (not ready_xpath or tree.xpath(ready_xpath)):
+            page_cache.put(url, source)
+            return tree, source
+        return tree, None
@@ -0,0 +1,138 @@
+# utils/frontier.py
+import json
+import sqlite3
+import threading
+import time
+
+from config.settings import DATA_DIR, RUN_MONTH
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+LISTING = "listing"
+ITEM = "item"
+
+class Frontier:
+    """
+    Crawl state for one site and RUN_MONTH, kept in SQLite under DATA_DIR/frontier.
+
+    Listing pages record the item links they produced; item URLs move through
+    pending -> in_flight -> done | failed. An item only becomes done once its row
+    has been written by BaseScraper (see rows_saved), so a crash never marks
+    unsaved work as finished.
+
+    A fresh run starts from an empty frontier. With resume=True the previous
+    state is kept: in-flight items go back to pending, finished listing pages are
+    answered from the frontier instead of being fetched again, and items finished
+    by an earlier run are skipped. Within a run nothing is deduplicated: an item
+    listed under several categories still gets a row per listing page.
+    """
+
+    def __init__(self, site_name: str, resume: bool = False, run_month: str = RUN_MONTH, logger=None):
+        self.path = DATA_DIR / "frontier" / f"{site_name}_{run_month}.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.resume = resume
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._started = time.time()
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                state TEXT NOT NULL,
+                parent TEXT,
+                meta TEXT,
+                error TEXT,
+                updated_at REAL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS urls_parent ON urls (parent)")
+
+        with self._db:
+            if resume:
+                self._db.execute("UPDATE urls SET state = ? WHERE state = ?", (PENDING, IN_FLIGHT))
+            else:
+                self._db.execute("DELETE FROM urls")
+
+        if resume and logger:
+            logger.info(f"RESUMING FROM FRONTIER: {self.stats()}")
+
+    def _state(self, url: str):
+        row = self._db.execute("SELECT state FROM urls WHERE url = ?", (url,)).fetchone()
+        return row[0] if row else None
+
+    def _upsert(self, url: str, kind: str, state: str, parent=None, meta=None, error=None):
+        self._db.execute("""
+            INSERT INTO urls (url, kind, state, parent, meta, error, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET state = excluded.state, error = excluded.error, updated_at = excluded.updated_at
+        """, (url, kind, state, parent, meta, error, time.time()))
+
+    def listing(self, url: str, discover) -> list:
+        """
+        Item links of a listing page. `discover()` fetches and parses the page and
+        returns its links, either URLs or (url, card) pairs; pages finished in an
+        earlier run are answered from the frontier without calling it.
+        """
+        with self._lock:
+            if self.resume and self._state(url) == DONE:
+                rows = self._db.execute(
+                    "SELECT url, meta FROM urls WHERE parent = ? AND kind = ? ORDER BY rowid", (url, ITEM)
+                ).fetchall()
+                return [(u, json.loads(m)) if m is not None else u for u, m in rows]
+
+        links = discover()
+        if not links:
+            # End of pagination or a failed fetch: not worth remembering, ask again next time
+            return links
+
+        with self._lock, self._db:
+            for link in links:
+                item_url, card = link if isinstance(link, tuple) else (link, None)
+                self._db.execute(
+                    "INSERT OR IGNORE INTO urls (url, kind, state, parent, meta, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (item_url, ITEM, PENDING, url, json.dumps(card) if card is not None else None, time.time())
+                )
+            self._upsert(url, LISTING, DONE)
+        return links
+
+    def claim(self, url: str) -> bool:
+        """Marks an item in flight; False only when resuming and an earlier run already finished it."""
+        with self._lock, self._db:
+            if self.resume:
+                row = self._db.execute("SELECT state, updated_at FROM urls WHERE url = ?", (url,)).fetchone()
+                if row and row[0] == DONE and row[1] < self._started:
+                    return False
+            self._upsert(url, ITEM, IN_FLIGHT)
+            return True
+
+    def done(self, url: str):
+        """Marks an item finished without a row, e.g. archived for offline extraction."""
+        with self._lock, self._db:
+            self._upsert(url, ITEM, DONE)
+
+    def failed(self, url: str, error: str = ""):
+        with self._lock, self._db:
+            self._upsert(url, ITEM, FAILED, error=str(error)[:500])
+
+    def rows_saved(self, rows: list, key: str = "Item URL"):
+        """Called by BaseScraper's writer once `rows` are on disk."""
+        with self._lock, self._db:
+            for row in rows:
+                if row.get(key):
+                    self._upsert(row[key], ITEM, DONE)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db.execute("SELECT kind, state, COUNT(*) FROM urls GROUP BY kind, state").fetchall()
+        return {f"{kind}_{state}": count for kind, state, count in rows}
+
+    def close(self):
+        if self.logger:
+            self.logger.info(f"FRONTIER: {self.stats()}")
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,66 @@
+# utils/listing_cache.py
+import hashlib
+import json
+import threading
+import time
+
+from config.settings import DATA_DIR, LISTING_CACHE_MAX_AGE_DAYS
+
+def card_fingerprint(card: dict) -> str:
+    """Stable hash of the fields a listing card shows (title, price, sku...)."""
+    payload = json.dumps(card, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ListingCache:
+    """
+    Remembers, per item URL, the last listing card fingerprint and the fields
+    that could only be read from the detail page.
+
+    When a card comes back unchanged the cached detail fields are reused and the
+    detail page is skipped. Entries older than LISTING_CACHE_MAX_AGE_DAYS are
+    treated as missing so slow-moving fields (description, stock) still refresh.
+    """
+
+    def __init__(self, site_name: str, max_age_days: int = LISTING_CACHE_MAX_AGE_DAYS):
+        self.path = DATA_DIR / "listing_cache" / f"{site_name}.json"
+        self.max_age = max_age_days * 86400
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+
+        if self.path.exists():
+            try:
+                with self.path.open("r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except Exception:
+                self._entries = {}
+
+    def get(self, url: str, card: dict):
+        """Cached detail fields for `url`, or None when the card is new, changed or stale."""
+        fingerprint = card_fingerprint(card)
+        with self._lock:
+            entry = self._entries.get(url)
+            fresh = entry and entry["fingerprint"] == fingerprint and time.time() - entry["fetched_at"] < self.max_age
+            if fresh:
+                self.hits += 1
+                return dict(entry["detail"])
+            self.misses += 1
+            return None
+
+    def put(self, url: str, card: dict, detail: dict):
+        with self._lock:
+            self._entries[url] = {
+                "fingerprint": card_fingerprint(card),
+                "fetched_at": time.time(),
+                "detail": detail,
+            }
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        with self._lock:
+            with tmp.open("w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+        tmp.replace(self.path)
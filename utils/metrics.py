@@ -0,0 +1,228 @@
+# utils/metrics.py
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from config.settings import DATA_DIR, RUN_MONTH
+
+PREFIX = "scraper"
+
+# Histogram upper bounds in seconds, from a fast xpath to a slow page load
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 7.5, 10, 15, 30, 60)
+
+# Stages timed by the shared code paths
+STAGE_DRIVER_START = "driver_start"  # create_driver
+STAGE_HTTP = "http"                  # http_get request, after the rate limiter's wait
+STAGE_PAGE_LOAD = "page_load"        # driver.get
+STAGE_PAGE_WAIT = "page_wait"        # ready_xpath / on_driver waits after driver.get
+STAGE_PAGE_SOURCE = "page_source"    # driver.page_source
+STAGE_PARSE = "parse"                # lxml html.fromstring
+STAGE_EXTRACT = "extract"            # Extractor.extract
+STAGE_ITEM = "item"                  # one item job (ItemPipeline or a scraper's own executor), end to end
+STAGE_CLEAN = "clean"                # a site's Cleaner over one batch
+STAGE_FLUSH = "flush"                # one batch written by the sink
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _number(value) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def _label_text(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation."""
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.max
+
+
+class Metrics:
+    """
+    Counters, gauges and histograms for the site this process is scraping.
+
+    BaseScraper calls start() with its site name, which resets the registry and
+    labels every series with the site, so a pool worker reused for a second site
+    starts clean. stage() is the usual entry point: it times a block into
+    `scraper_stage_seconds{stage=...}`, keeps `scraper_stage_in_flight` while the
+    block runs and counts exceptions in `scraper_stage_errors_total`.
+
+    export() writes DATA_DIR/metrics/<site>_<RUN_MONTH>.prom (Prometheus text
+    format, for a node_exporter textfile collector) and a .json run summary.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.start(None)
+
+    def start(self, site):
+        with self._lock:
+            self.site = site
+            self.started = time.time()
+            self._counters = {}
+            self._gauges = {}
+            self._histograms = {}
+            self._extra = {}
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, _key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[(name, _key(labels))] = value
+
+    def add_gauge(self, name: str, delta: float, **labels):
+        key = (name, _key(labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + delta
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, _key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(seconds)
+
+    @contextmanager
+    def stage(self, stage: str):
+        """Times the block as one `stage`; in-flight while it runs, an error if it raises."""
+        self.add_gauge("stage_in_flight", 1, stage=stage)
+        start = time.monotonic()
+        try:
+            yield
+        except BaseException:
+            self.inc("stage_errors_total", stage=stage)
+            raise
+        finally:
+            self.observe("stage_seconds", time.monotonic() - start, stage=stage)
+            self.add_gauge("stage_in_flight", -1, stage=stage)
+
+    def call(self, stage: str, fn, *args):
+        """fn(*args) timed as one `stage`; for handing to an executor."""
+        with self.stage(stage):
+            return fn(*args)
+
+    def attach(self, name: str, value):
+        """Extra JSON-only section for the run summary (rate limiter, waits, pool stats...)."""
+        with self._lock:
+            self._extra[name] = value
+
+    def summary(self) -> dict:
+        with self._lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            counters = {}
+            for (name, labels), value in self._counters.items():
+                counters.setdefault(name, {})[_label_text(labels) or "total"] = value
+            stages = {}
+            for (name, labels), hist in self._histograms.items():
+                label = dict(labels).get("stage") or _label_text(labels)
+                stages.setdefault(name, {})[label] = {
+                    "count": hist.count,
+                    "total_s": round(hist.sum, 2),
+                    "avg_s": round(hist.sum / hist.count, 4) if hist.count else 0,
+                    "p50_s": hist.quantile(0.5),
+                    "p95_s": hist.quantile(0.95),
+                    "p99_s": hist.quantile(0.99),
+                    "max_s": round(hist.max, 3),
+                }
+            errors = {dict(labels).get("stage"): v for (name, labels), v in self._counters.items()
+                      if name == "stage_errors_total"}
+            calls = stages.get("stage_seconds", {})
+            rows = sum(v for (name, _), v in self._counters.items() if name == "rows_total")
+            return {
+                "site": self.site,
+                "run_month": RUN_MONTH,
+                "started": self.started,
+                "elapsed_s": round(elapsed, 1),
+                "rows": rows,
+                "items_per_s": round(rows / elapsed, 3),
+                "stages": calls,
+                "error_rates": {stage: round(n / calls[stage]["count"], 4)
+                                for stage, n in errors.items() if calls.get(stage, {}).get("count")},
+                "counters": counters,
+                "gauges": {name + _label_text(labels): v for (name, labels), v in self._gauges.items()},
+                **self._extra,
+            }
+
+    def prometheus(self) -> str:
+        site = (("site", self.site or "unknown"),)
+        lines = []
+        with self._lock:
+            elapsed = max(time.time() - self.started, 1e-9)
+            rows = sum(v for (name, _), v in self._counters.items() if name == "rows_total")
+            series = {}
+            for (name, labels), value in self._counters.items():
+                series.setdefault((name, "counter"), []).append((site + labels, value))
+            for (name, labels), value in self._gauges.items():
+                series.setdefault((name, "gauge"), []).append((site + labels, value))
+            series[("items_per_second", "gauge")] = [(site, rows / elapsed)]
+            series[("run_started_timestamp_seconds", "gauge")] = [(site, self.started)]
+
+            for (name, kind), samples in sorted(series.items()):
+                lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{PREFIX}_{name}{_label_text(labels)} {_number(value)}")
+
+            by_name = {}
+            for (name, labels), hist in self._histograms.items():
+                by_name.setdefault(name, []).append((site + labels, hist))
+            for name, samples in sorted(by_name.items()):
+                lines.append(f"# TYPE {PREFIX}_{name} histogram")
+                for labels, hist in samples:
+                    cumulative = 0
+                    for bound, n in zip(BUCKETS, hist.counts):
+                        cumulative += n
+                        lines.append(f"{PREFIX}_{name}_bucket{_label_text(labels + (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{PREFIX}_{name}_bucket{_label_text(labels + (('le', '+Inf'),))} {hist.count}")
+                    lines.append(f"{PREFIX}_{name}_sum{_label_text(labels)} {_number(hist.sum)}")
+                    lines.append(f"{PREFIX}_{name}_count{_label_text(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self):
+        """Writes the .prom and .json files; each is replaced atomically so a collector never reads half a file."""
+        if not self.site:
+            return
+        out_dir = DATA_DIR / "metrics"
+        out_dir.mkdir(parents=True, exist_ok=True)
+        base = f"{self.site}_{RUN_MONTH}"
+        for path, text in (
+            (out_dir / f"{base}.prom", self.prometheus()),
+            (out_dir / f"{base}.json", json.dumps(self.summary(), indent=2, default=str)),
+        ):
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_text(text, encoding="utf-8")
+            tmp.replace(path)
+
+
+metrics = Metrics()
@@ -0,0 +1,239 @@
+# utils/page_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from utils.metrics import metrics
+from config.settings import DATA_DIR, PAGE_CACHE, PAGE_CACHE_TTL_DAYS, PAGE_CACHE_MAX_MB, PAGE_CACHE_LEVEL
+
+CODEC_ZSTD = "zst"
+CODEC_ZLIB = "zz"
+
+# Query parameters that never change what a page shows
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "_ga")
+
+# Stores between two size checks
+EVICT_EVERY = 200
+# Eviction trims the cache to this share of PAGE_CACHE_MAX_MB, so it does not run on every store
+EVICT_TO = 0.9
+
+def normalize_url(url: str, part: str = None) -> str:
+    """
+    Cache key for a URL: scheme and host lowercased, default port, fragment and
+    tracking parameters dropped, remaining query parameters sorted. `part` names a
+    page state that has no URL of its own (an AJAX listing page) and is appended
+    as the fragment.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not k.startswith(TRACKING_PARAMS))
+    key = urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+    return f"{key}#{part}" if part else key
+
+def _compress(body: bytes, level: int):
+    if zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=level).compress(body)
+    return CODEC_ZLIB, zlib.compress(body, min(level, 9))
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("page cached with zstd but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+class PageCache:
+    """
+    Raw page bodies from earlier fetches, under DATA_DIR/page_cache, so an
+    extractor fix can be re-run over a month's pages without the network.
+
+    Bodies are stored once per content hash (objects/ab/<sha256>.zst, zstd when
+    zstandard is installed, zlib otherwise); index.sqlite maps each normalized
+    URL to its body with fetch and last-use times. Entries older than
+    PAGE_CACHE_TTL_DAYS are fetched again on a normal run, and once the bodies
+    pass PAGE_CACHE_MAX_MB the least recently used URLs are dropped.
+
+    replay_only() turns on cache-only mode (main.py --cache-only): every entry is
+    served regardless of age, nothing is stored, and callers treat a miss as a
+    page that does not exist instead of going to the network.
+
+    One instance per process (page_cache); the SQLite connection is opened on
+    first use, so a forked pool worker never shares its parent's.
+    """
+
+    def __init__(self, root=DATA_DIR / "page_cache", enabled: bool = PAGE_CACHE,
+                 ttl_days: float = PAGE_CACHE_TTL_DAYS, max_mb: int = PAGE_CACHE_MAX_MB,
+                 level: int = PAGE_CACHE_LEVEL):
+        self.root = root
+        self.enabled = enabled
+        self.cache_only = False
+        self.ttl = ttl_days * 86400
+        self.max_bytes = max_mb * 1024 * 1024
+        self.level = level
+        self._lock = threading.Lock()
+        self._db = None
+        self._pid = None
+        self._stores = 0
+        self.counts = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+    def replay_only(self):
+        self.enabled = True
+        self.cache_only = True
+
+    def _conn(self):
+        if self._db is None or self._pid != os.getpid():
+            self.root.mkdir(parents=True, exist_ok=True)
+            # Several site processes share the index; wait out each other's writes
+            self._db = sqlite3.connect(self.root / "index.sqlite", timeout=60, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS pages (
+                    key TEXT PRIMARY KEY,
+                    digest TEXT NOT NULL,
+                    codec TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS pages_digest ON pages (digest)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used)")
+            self._db.commit()
+            self._pid = os.getpid()
+        return self._db
+
+    def _path(self, digest: str, codec: str):
+        return self.root / "objects" / digest[:2] / f"{digest}.{codec}"
+
+    def _miss(self):
+        with self._lock:
+            self.counts["misses"] += 1
+        metrics.inc("page_cache_total", result="miss")
+        return None
+
+    def get(self, url: str, part: str = None):
+        """Cached body of `url` as bytes, or None."""
+        if not self.enabled:
+            return None
+        key = normalize_url(url, part)
+        with self._lock:
+            entry = self._conn().execute(
+                "SELECT digest, codec, fetched_at FROM pages WHERE key = ?", (key,)
+            ).fetchone()
+        if entry is None or (not self.cache_only and self.ttl and time.time() - entry[2] >= self.ttl):
+            return self._miss()
+
+        digest, codec, _ = entry
+        try:
+            body = _decompress(codec, self._path(digest, codec).read_bytes())
+        except Exception:
+            # Evicted by another process, or written with a codec this one lacks
+            return self._miss()
+
+        with self._lock:
+            db = self._conn()
+            with db:
+                db.execute("UPDATE pages SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.counts["hits"] += 1
+        metrics.inc("page_cache_total", result="hit")
+        return body
+
+    def put(self, url: str, body, part: str = None):
+        """Stores a good page body (bytes or str). No-op when disabled or replaying."""
+        if not self.enabled or self.cache_only or not body:
+            return
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+
+        digest = hashlib.sha256(body).hexdigest()
+        codec, data = _compress(body, self.level)
+        path = self._path(digest, codec)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+
+        key = normalize_url(url, part)
+        now = time.time()
+        with self._lock:
+            db = self._conn()
+            with db:
+                old = db.execute("SELECT digest, codec FROM pages WHERE key = ?", (key,)).fetchone()
+                db.execute(
+                    "INSERT OR REPLACE INTO pages (key, digest, codec, size, fetched_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, digest, codec, len(data), now, now)
+                )
+                if old and old[0] != digest:
+                    self._drop_unreferenced(db, *old)
+            self.counts["stored"] += 1
+            self._stores += 1
+            check = self._stores % EVICT_EVERY == 0
+        metrics.inc("page_cache_total", result="store")
+        if check:
+            self.evict()
+
+    def _drop_unreferenced(self, db, digest: str, codec: str) -> bool:
+        if db.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+            return False
+        self._path(digest, codec).unlink(missing_ok=True)
+        return True
+
+    def size(self) -> int:
+        """Bytes of stored (compressed) bodies, each counted once."""
+        with self._lock:
+            total = self._conn().execute(
+                "SELECT SUM(size) FROM (SELECT DISTINCT digest, size FROM pages)"
+            ).fetchone()[0]
+        return total or 0
+
+    def evict(self):
+        """Drops least recently used URLs until the bodies fit under EVICT_TO of the cap."""
+        if not self.enabled or self.cache_only or not self.max_bytes:
+            return
+        total = self.size()
+        if total <= self.max_bytes:
+            return
+
+        target = self.max_bytes * EVICT_TO
+        with self._lock:
+            db = self._conn()
+            with db:
+                entries = db.execute("SELECT key, digest, codec, size FROM pages ORDER BY last_used").fetchall()
+                for key, digest, codec, size in entries:
+                    if total <= target:
+                        break
+                    db.execute("DELETE FROM pages WHERE key = ?", (key,))
+                    self.counts["evicted"] += 1
+                    if self._drop_unreferenced(db, digest, codec):
+                        total -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+        return {**counts, "codec": CODEC_ZSTD if zstandard is not None else CODEC_ZLIB,
+                "cache_only": self.cache_only}
+
+    def close(self):
+        with self._lock:
+            if self._db is not None and self._pid == os.getpid():
+                self._db.close()
+            self._db = None
+
+
+page_cache = PageCache()
@@ -0,0 +1,119 @@
+# utils/pipeline.py
+import queue
+import threading
+import time
+
+from utils.metrics import metrics, STAGE_ITEM
+from config.settings import PIPELINE_QUEUE_SIZE
+
+_STOP = object()
+
+class ItemPipeline:
+    """
+    Long-lived worker threads fed by a bounded queue of item jobs.
+
+    Listing pagination submits item jobs as it discovers them and moves on to
+    the next page straight away; the workers stay busy across page boundaries
+    instead of waiting at a per-page executor barrier for the slowest product.
+    When the queue is full, submit() blocks, so the listing never runs more
+    than `queue_size` items ahead of the workers.
+
+    close() waits for every queued job, stops the workers and logs the queue
+    metrics (see stats()).
+    """
+
+    def __init__(self, workers: int, name: str, logger, queue_size: int = PIPELINE_QUEUE_SIZE):
+        self.name = name
+        self.logger = logger
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self.submitted = 0
+        self.processed = 0
+        self.failed = 0
+        self.max_depth = 0
+        self._depth_total = 0
+        self.producer_waits = 0
+        self.producer_wait_seconds = 0.0
+        self.worker_idle_seconds = 0.0
+
+        self._workers = [
+            threading.Thread(target=self._work, name=f"{name}-item-{i}", daemon=True)
+            for i in range(max(1, int(workers)))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def submit(self, fn, *args):
+        """Queues fn(*args) for the workers; blocks while the queue is full."""
+        if self._closed:
+            raise RuntimeError(f"ItemPipeline {self.name} is closed")
+        job = (fn, args)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            start = time.monotonic()
+            self._queue.put(job)
+            with self._lock:
+                self.producer_waits += 1
+                self.producer_wait_seconds += time.monotonic() - start
+
+        depth = self._queue.qsize()
+        metrics.gauge("item_queue_depth", depth)
+        with self._lock:
+            self.submitted += 1
+            self._depth_total += depth
+            self.max_depth = max(self.max_depth, depth)
+
+    def _work(self):
+        while True:
+            start = time.monotonic()
+            job = self._queue.get()
+            idle = time.monotonic() - start
+            if job is _STOP:
+                return
+
+            fn, args = job
+            metrics.gauge("item_queue_depth", self._queue.qsize())
+            ok = True
+            try:
+                with metrics.stage(STAGE_ITEM):
+                    fn(*args)
+            except Exception as e:
+                ok = False
+                self.logger.error(f"{self.name} item job failed: {str(e)[:100]}")
+            with self._lock:
+                self.worker_idle_seconds += idle
+                self.processed += 1
+                self.failed += not ok
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "avg_depth": round(self._depth_total / self.submitted, 1) if self.submitted else 0,
+                "submitted": self.submitted,
+                "processed": self.processed,
+                "failed": self.failed,
+                "producer_waits": self.producer_waits,
+                "producer_wait_s": round(self.producer_wait_seconds, 1),
+                "worker_idle_s": round(self.worker_idle_seconds, 1),
+            }
+
+    def close(self):
+        """Lets the workers finish everything queued, then stops them."""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._workers:
+            self._queue.put(_STOP)
+        for worker in self._workers:
+            worker.join()
+        stats = self.stats()
+        self.logger.info(f"ITEM PIPELINE: {stats}")
+        metrics.attach("item_pipeline", stats)
@@ -0,0 +1,149 @@
+# utils/ratelimit.py
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from config.settings import (
+    RATE_INITIAL, RATE_MIN, RATE_MAX, RATE_BURST,
+    RATE_INCREASE, RATE_DECREASE, RATE_LATENCY_TARGET
+)
+
+# Statuses a server uses to say "slow down", or that it is blocking or failing (plus every 5xx)
+THROTTLE_STATUSES = (403, 429)
+
+# Page titles of bot walls and challenge pages, lowercase
+BLOCK_TITLE_MARKERS = (
+    "access denied", "attention required", "just a moment", "are you a robot",
+    "captcha", "request blocked", "too many requests", "pardon our interruption",
+)
+BLOCK_XPATH = '//*[@id="challenge-form" or @id="cf-challenge-running" or @id="px-captcha"]'
+
+# A slow response is a mild congestion signal; a 429 or a block page is a strong one
+LATENCY_DECREASE = 0.8
+# Responses already in flight when the rate drops describe the old rate; ignore them for this long
+DECREASE_HOLD = 5.0
+# Longest Retry-After honoured, in seconds
+MAX_PAUSE = 300
+
+def title_blocked(title: str) -> bool:
+    title = (title or "").lower()
+    return any(m in title for m in BLOCK_TITLE_MARKERS)
+
+def looks_blocked(tree) -> bool:
+    """True for a challenge or bot-wall page instead of the content asked for."""
+    try:
+        return title_blocked(" ".join(tree.xpath("//title//text()"))) or bool(tree.xpath(BLOCK_XPATH))
+    except Exception:
+        return False
+
+def _retry_after_seconds(value):
+    if not value:
+        return None
+    try:
+        return min(MAX_PAUSE, max(0.0, float(value)))
+    except ValueError:
+        pass
+    try:
+        return min(MAX_PAUSE, max(0.0, parsedate_to_datetime(value).timestamp() - time.time()))
+    except Exception:
+        return None
+
+
+class HostLimiter:
+    """
+    Token bucket for one host whose rate follows AIMD.
+
+    Every request takes a token first; tokens refill at `rate` per second up to
+    `burst`. Each healthy response (2xx/304, or a browser load) adds
+    RATE_INCREASE to the rate; other statuses such as 404 leave it alone. A
+    403/429/5xx, a block page or a connection error multiplies it by
+    RATE_DECREASE (a response
+    slower than RATE_LATENCY_TARGET by LATENCY_DECREASE), and a Retry-After
+    header pauses the host outright. Worker threads, nav drivers and HTTP calls
+    all share the host's bucket, so the site sees one paced stream.
+    """
+
+    def __init__(self, host: str, rate: float = RATE_INITIAL, min_rate: float = RATE_MIN,
+                 max_rate: float = RATE_MAX, burst: float = RATE_BURST):
+        self.host = host
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = max(1.0, burst)
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "waited": 0.0, "throttled": 0, "blocked": 0, "slow": 0, "errors": 0}
+
+    def acquire(self):
+        """Blocks until the host may be sent another request."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                wait = self._paused_until - now
+                if wait <= 0 and self._tokens >= 1:
+                    self._tokens -= 1
+                    self.stats["requests"] += 1
+                    self.stats["waited"] += waited
+                    return
+                if wait <= 0:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+    def _decrease(self, factor: float) -> bool:
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_HOLD:
+            return False
+        self._last_decrease = now
+        self.rate = max(self.min_rate, self.rate * factor)
+        self._tokens = min(self._tokens, 0.0)
+        return True
+
+    def report(self, status=None, latency=None, blocked=False, error=False, retry_after=None):
+        """
+        Feeds one response back into the rate. Returns the new rate when it went
+        down, None otherwise.
+        """
+        with self._lock:
+            pause = _retry_after_seconds(retry_after)
+            if pause:
+                self._paused_until = max(self._paused_until, time.monotonic() + pause)
+
+            if blocked or error or status in THROTTLE_STATUSES or (status is not None and status >= 500):
+                key = "blocked" if blocked else "errors" if error else "throttled"
+                self.stats[key] += 1
+                return self.rate if self._decrease(RATE_DECREASE) else None
+
+            if latency is not None and latency > RATE_LATENCY_TARGET:
+                self.stats["slow"] += 1
+                return self.rate if self._decrease(LATENCY_DECREASE) else None
+
+            if status is None or 200 <= status < 300 or status == 304:
+                self.rate = min(self.max_rate, self.rate + RATE_INCREASE)
+            return None
+
+
+_limiters_lock = threading.Lock()
+_limiters = {}
+
+def host_limiter(url: str) -> HostLimiter:
+    """The process-wide limiter for `url`'s host, created on first use."""
+    host = urlsplit(url).netloc.lower()
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = HostLimiter(host)
+        return limiter
+
+def rate_stats() -> dict:
+    """Current rate and counters of every host seen by this process."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {l.host: {"rate": round(l.rate, 2), **{k: round(v, 1) for k, v in l.stats.items()}} for l in limiters}
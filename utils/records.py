@@ -0,0 +1,200 @@
+# utils/records.py
+import re
+import sys
+from collections.abc import Mapping
+from functools import lru_cache
+
+import pandas as pd
+
+PRICE = "Price"
+PRICE_VALUE = "Price Value"
+QUANTITY = "Quantity"
+QUANTITY_VALUE = "Quantity Value"
+CURRENCY = "Currency"
+
+# Few distinct values per site: one shared string per value in memory, category dtype in frames
+CATEGORICAL = ("Source Name", "OEM Name", CURRENCY)
+
+CURRENCY_CODES = re.compile(r"\b(USD|CAD|AUD|EUR|GBP|MXN)\b")
+# Longest first, so "C$" is not read as "$"
+CURRENCY_SYMBOLS = (("US$", "USD"), ("CA$", "CAD"), ("C$", "CAD"), ("A$", "AUD"), ("$", "USD"), ("€", "EUR"), ("£", "GBP"))
+AMOUNT = re.compile(r"\d[\d.,]*")
+# Shopify themes label the price charged ("Sale price$99.00 Regular price$129.00")
+SALE_LABEL = re.compile(r"\b(?:sale price|special price|now)\b", re.IGNORECASE)
+COUNT = re.compile(r"\d+")
+
+def _amount(token: str):
+    token = token.rstrip(".,")
+    if "," in token and "." in token:
+        # Whichever separator comes last is the decimal point: 1,234.50 / 1.234,50
+        decimal = "." if token.rfind(".") > token.rfind(",") else ","
+        token = token.replace("," if decimal == "." else ".", "").replace(decimal, ".")
+    elif "," in token:
+        # 1,234 and 1,234,567 are thousands; 12,50 is a decimal comma
+        token = token.replace(",", "") if len(token.rpartition(",")[2]) == 3 else token.replace(",", ".")
+    elif token.count(".") > 1:
+        token = token.replace(".", "")
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+def _is_pair_gap(gap: str) -> bool:
+    """True when only currency marks and spaces sit between two amounts (no range dash, no words)."""
+    gap = CURRENCY_CODES.sub("", gap)
+    for symbol, _ in CURRENCY_SYMBOLS:
+        gap = gap.replace(symbol, "")
+    return not gap.strip()
+
+def _current_amount(text: str):
+    """The amount the item sells for, as a match, or None."""
+    label = SALE_LABEL.search(text)
+    if label:
+        match = AMOUNT.search(text, label.end())
+        if match:
+            return match
+    matches = list(AMOUNT.finditer(text))
+    if len(matches) == 2 and _is_pair_gap(text[matches[0].end():matches[1].start()]):
+        # WooCommerce's <del>regular</del> <ins>sale</ins>: the second amount is charged
+        return matches[1]
+    return matches[0] if matches else None
+
+@lru_cache(maxsize=4096)
+def parse_price(text) -> tuple:
+    """
+    (amount, currency code) from a scraped price: "$1,234.00", "12,50 €".
+    The amount is the price charged: the labelled one in
+    "Sale price$99.00 Regular price$129.00" (99.0), the second of a WooCommerce
+    regular/sale pair "$ 129.00 $ 99.00" (99.0), otherwise the first ("from"
+    price of a range "$10 – $20"). (None, "") when there is no amount; "" when
+    no currency is named.
+    """
+    if not text or not isinstance(text, str):
+        return None, ""
+    match = _current_amount(text)
+    amount = _amount(match.group()) if match else None
+
+    code = CURRENCY_CODES.search(text)
+    if code:
+        currency = code.group(1)
+    else:
+        currency = next((c for symbol, c in CURRENCY_SYMBOLS if symbol in text), "")
+    return amount, currency
+
+@lru_cache(maxsize=1024)
+def parse_quantity(text):
+    """The add-to-cart quantity as an int: "1", " 2 ", 3; None when there is no number."""
+    if isinstance(text, int) and not isinstance(text, bool):
+        return text
+    if not text or not isinstance(text, str):
+        return None
+    match = COUNT.search(text)
+    return int(match.group()) if match else None
+
+def _insert_after(row: dict, column: str, name: str, value) -> dict:
+    """`row` with `name` placed right after `column`, next to the text it was parsed from."""
+    items = list(row.items())
+    at = list(row).index(column) + 1
+    return dict(items[:at] + [(name, value)] + items[at:])
+
+
+class RecordSchema:
+    """Column names and positions shared by every Record with the same columns (one per site, in practice)."""
+
+    __slots__ = ("columns", "index")
+    _known = {}
+
+    def __init__(self, columns: tuple):
+        self.columns = columns
+        self.index = {name: i for i, name in enumerate(columns)}
+
+    @classmethod
+    def of(cls, columns: tuple) -> "RecordSchema":
+        schema = cls._known.get(columns)
+        if schema is None:
+            schema = cls._known.setdefault(columns, cls(columns))
+        return schema
+
+
+class Record(Mapping):
+    """
+    One output row as BaseScraper buffers it: a value list plus a shared
+    RecordSchema, instead of a dict per row. Reads like a read-only dict;
+    existing columns can be assigned (the site's Cleaner fills its columns in
+    place).
+
+    from_row() adds "Price Value" (float, after "Price") parsed once from the
+    price text, fills an empty "Currency" from it, adds "Quantity Value" (int,
+    after "Quantity"), and interns the CATEGORICAL columns so the rows of a
+    batch share their Source Name / OEM / Currency strings.
+    """
+
+    __slots__ = ("schema", "values")
+
+    def __init__(self, schema: RecordSchema, values: list):
+        self.schema = schema
+        self.values = values
+
+    @classmethod
+    def from_row(cls, row) -> "Record":
+        if isinstance(row, Record):
+            return row
+        row = dict(row)
+        if PRICE in row and PRICE_VALUE not in row:
+            amount, currency = parse_price(row[PRICE])
+            if CURRENCY in row and not row[CURRENCY] and currency:
+                row[CURRENCY] = currency
+            row = _insert_after(row, PRICE, PRICE_VALUE, amount)
+        if QUANTITY in row and QUANTITY_VALUE not in row:
+            row = _insert_after(row, QUANTITY, QUANTITY_VALUE, parse_quantity(row[QUANTITY]))
+        for name in CATEGORICAL:
+            value = row.get(name)
+            if type(value) is str:
+                row[name] = sys.intern(value)
+        return cls(RecordSchema.of(tuple(row)), list(row.values()))
+
+    def __getitem__(self, name):
+        return self.values[self.schema.index[name]]
+
+    def __setitem__(self, name, value):
+        self.values[self.schema.index[name]] = value
+
+    def __iter__(self):
+        return iter(self.schema.columns)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __contains__(self, name):
+        return name in self.schema.index
+
+    def keys(self):
+        return self.schema.index.keys()
+
+    def get(self, name, default=None):
+        i = self.schema.index.get(name)
+        return default if i is None else self.values[i]
+
+    def as_dict(self) -> dict:
+        return dict(zip(self.schema.columns, self.values))
+
+
+def records_frame(rows: list) -> pd.DataFrame:
+    """
+    A batch as a typed DataFrame: CATEGORICAL columns as category, Price Value
+    as float64, Quantity Value as nullable Int64, the rest as scraped. Rows may
+    be Records or dicts.
+    """
+    schemas = {row.schema for row in rows if isinstance(row, Record)}
+    if len(schemas) == 1 and all(isinstance(row, Record) for row in rows):
+        frame = pd.DataFrame.from_records([row.values for row in rows], columns=list(schemas.pop().columns))
+    else:
+        frame = pd.DataFrame([row.as_dict() if isinstance(row, Record) else row for row in rows])
+    for name in CATEGORICAL:
+        if name in frame.columns:
+            frame[name] = frame[name].astype("category")
+    if PRICE_VALUE in frame.columns:
+        frame[PRICE_VALUE] = pd.to_numeric(frame[PRICE_VALUE], errors="coerce").astype("float64")
+    if QUANTITY_VALUE in frame.columns:
+        frame[QUANTITY_VALUE] = pd.to_numeric(frame[QUANTITY_VALUE], errors="coerce").astype("Int64")
+    return frame
@@ -0,0 +1,134 @@
+# utils/recrawl.py
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from config.settings import DATA_DIR, RUN_MONTH, INCREMENTAL_RECRAWL, INCREMENTAL_MAX_AGE_DAYS
+
+def row_fingerprint(row: dict) -> str:
+    payload = json.dumps(dict(row), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class RecrawlIndex:
+    """
+    What each item page looked like the last time it was scraped, kept across
+    RUN_MONTHs in DATA_DIR/recrawl/<site>.sqlite: the ETag and Last-Modified the
+    server sent, a fingerprint of the row, and the row itself.
+
+    PageFetcher sends the stored validators as a conditional request; a 304
+    means the page has not changed and carry_forward() hands back last month's
+    row instead of fetching and parsing it again. Validators and rows are only
+    stored once BaseScraper has written the row (see rows_saved).
+
+    Rows older than INCREMENTAL_MAX_AGE_DAYS are fetched in full regardless, so
+    a server that answers 304 too eagerly cannot freeze a row forever.
+    """
+
+    def __init__(self, site_name: str, enabled: bool = INCREMENTAL_RECRAWL,
+                 max_age_days: int = INCREMENTAL_MAX_AGE_DAYS, run_month: str = RUN_MONTH, logger=None):
+        self.path = DATA_DIR / "recrawl" / f"{site_name}.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.enabled = enabled
+        self.max_age = max_age_days * 86400
+        self.run_month = run_month
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._pending = {}  # url -> (etag, last_modified) seen on this run's responses
+        self._carried = set()
+        self.counts = {"carried": 0, "new": 0, "changed": 0, "unchanged": 0}
+
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS pages (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                fingerprint TEXT NOT NULL,
+                row TEXT NOT NULL,
+                run_month TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            )
+        """)
+        self._db.commit()
+
+    def validators(self, url: str) -> dict:
+        """Conditional request headers for `url`; empty when there is nothing usable to compare against."""
+        if not self.enabled:
+            return {}
+        with self._lock:
+            entry = self._db.execute(
+                "SELECT etag, last_modified, fetched_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if not entry or time.time() - entry[2] >= self.max_age:
+            return {}
+
+        etag, last_modified, _ = entry
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def observe(self, url: str, headers):
+        """Remembers the validators of a fresh response until its row is saved."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if etag or last_modified:
+            with self._lock:
+                self._pending[url] = (etag, last_modified)
+
+    def carry_forward(self, url: str):
+        """Last saved row for `url` (after a 304), or None."""
+        with self._lock:
+            entry = self._db.execute("SELECT row FROM pages WHERE url = ?", (url,)).fetchone()
+            if entry is None:
+                return None
+            self._carried.add(url)
+        return json.loads(entry[0])
+
+    def rows_saved(self, rows: list, key: str = "Item URL"):
+        """Called by BaseScraper's writer once `rows` are on disk."""
+        now = time.time()
+        with self._lock, self._db:
+            for row in rows:
+                url = row.get(key)
+                if not url:
+                    continue
+
+                if url in self._carried:
+                    # Same row, same validators, same fetch time; only the month it last appeared in moves
+                    self._carried.discard(url)
+                    self._db.execute("UPDATE pages SET run_month = ? WHERE url = ?", (self.run_month, url))
+                    self.counts["carried"] += 1
+                    continue
+
+                fingerprint = row_fingerprint(row)
+                previous = self._db.execute("SELECT fingerprint FROM pages WHERE url = ?", (url,)).fetchone()
+                if previous is None:
+                    self.counts["new"] += 1
+                elif previous[0] != fingerprint:
+                    self.counts["changed"] += 1
+                else:
+                    self.counts["unchanged"] += 1
+
+                etag, last_modified = self._pending.pop(url, (None, None))
+                self._db.execute("""
+                    INSERT OR REPLACE INTO pages (url, etag, last_modified, fingerprint, row, run_month, fetched_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                """, (url, etag, last_modified, fingerprint, json.dumps(dict(row), ensure_ascii=False, default=str),
+                      self.run_month, now))
+
+    def close(self):
+        if self.logger:
+            c = self.counts
+            self.logger.info(
+                f"RECRAWL: {c['carried']} carried forward (not modified), {c['new']} new, "
+                f"{c['changed']} changed, {c['unchanged']} refetched unchanged"
+            )
+        with self._lock:
+            self._db.close()
@@ -1,14 +1,53 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 
 from utils.utils import get_random_user_agent
+from utils.waits import wait_stats
+from utils.budget import attached_budget
+from utils.metrics import metrics, STAGE_DRIVER_START
+from config.settings import DRIVER_POOL_MAX_PAGES, LEAN_BLOCKED_URLS, LEAN_FALLBACK_FAILURES
+
+# "full" loads pages like a desktop browser; "lean" only waits for the DOM and skips what scraping never reads
+PROFILE_FULL = "full"
+PROFILE_LEAN = "lean"
+
+# Resource types a lean driver never downloads (Network.setBlockedURLs wildcards)
+LEAN_BLOCKED_RESOURCES = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.css", "*.mp4", "*.webm",
+]
+# Third-party analytics, ads, chat and tracking hosts
+LEAN_BLOCKED_HOSTS = [
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*facebook.net*", "*connect.facebook.*", "*hotjar.com*", "*clarity.ms*", "*bat.bing.com*",
+    "*klaviyo.com*", "*tiktok.com*", "*pinterest.com*", "*snapchat.com*", "*criteo.*",
+    "*tawk.to*", "*intercom.io*", "*zendesk.com*", "*youtube.com*", "*vimeo.com*",
+]
 
-def create_driver(headless: bool, wait_time: int):
+def create_driver(headless: bool, profile: str = PROFILE_FULL):
+    """
+    A configured Chrome with no implicit wait: a lookup for a missing element
+    returns immediately, and waiting is done explicitly (utils/waits.py).
+
+    The lean profile uses the eager page-load strategy
+    (driver.get returns at DOMContentLoaded), disables images and blocks the
+    LEAN_BLOCKED_* patterns plus LEAN_BLOCKED_URLS through the DevTools protocol.
+    """
     options = Options()
     if headless:
         options.add_argument("--headless=new")
-    
+    if profile == PROFILE_LEAN:
+        options.page_load_strategy = "eager"
+        options.add_argument("--blink-settings=imagesEnabled=false")
+        options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
     options.add_argument(f"user-agent={get_random_user_agent()}")
     options.add_argument("--no-sandbox")
     options.add_argument("--disable-dev-shm-usage")
@@ -18,6 +57,262 @@ def create_driver(headless: bool, wait_time: int):
     options.add_experimental_option('useAutomationExtension', False)
 
     service = Service()
-    driver = webdriver.Chrome(service=service, options=options)
-    driver.implicitly_wait(wait_time)
-    return driver
\ No newline at end of file
+    with metrics.stage(STAGE_DRIVER_START):
+        driver = webdriver.Chrome(service=service, options=options)
+    driver.implicitly_wait(0)
+    if profile == PROFILE_LEAN:
+        try:
+            driver.execute_cdp_cmd("Network.enable", {})
+            driver.execute_cdp_cmd("Network.setBlockedURLs", {
+                "urls": LEAN_BLOCKED_RESOURCES + LEAN_BLOCKED_HOSTS + LEAN_BLOCKED_URLS
+            })
+        except Exception:
+            pass  # still eager and image-free without DevTools
+    return driver
+
+
+# How often a thread waiting for a busy driver re-checks whether it may start one instead
+IDLE_RECHECK = 2.0
+
+class DriverPool:
+    """
+    Fixed-size pool of warm Chrome drivers shared by worker threads.
+
+    Drivers are created lazily up to `size`, handed out with `checkout()` and
+    given back with `checkin()`. A driver that fails its health check or has
+    served `max_pages` pages is quit and replaced on the next checkout.
+    `wait_time` is the longest PageFetcher waits for a page's ready_xpath.
+
+    With the lean profile, `page_result()` counts pages whose content never
+    showed up; after `fallback_failures` in a row the pool switches to the full
+    profile and replaces its lean drivers as they come back.
+
+    When main.py runs a BrowserBudget (utils/budget.py), every driver also
+    holds one of the machine-wide browser slots: the pool grows past its first
+    driver only while the site's share allows it, and gives drivers back at
+    checkin when other sites need the slots.
+    """
+
+    def __init__(self, size: int, headless: bool, wait_time: int, max_pages: int = DRIVER_POOL_MAX_PAGES, logger=None,
+                 profile: str = PROFILE_FULL, fallback_failures: int = LEAN_FALLBACK_FAILURES):
+        self.size = max(1, int(size))
+        self.headless = headless
+        self.wait_time = wait_time
+        self.max_pages = max_pages
+        self.logger = logger
+        self.profile = profile
+        self.fallback_failures = fallback_failures
+        self._failures = 0
+
+        attached = attached_budget()
+        self.budget, self.site = attached if attached else (None, None)
+
+        self._idle = queue.LifoQueue()
+        self._uses = {}
+        self._profiles = {}
+        self._lock = threading.Lock()
+        self._live = 0
+        self._held = 0
+        self._closed = False
+
+        self.stats = {
+            "created": 0,
+            "checkouts": 0,
+            "recycled": 0,
+            "unhealthy": 0,
+            "create_failures": 0,
+            "profile_fallbacks": 0,
+            "budget_denied": 0,
+            "budget_returned": 0,
+        }
+
+    def _log(self, msg):
+        if self.logger:
+            self.logger.info(msg)
+
+    def _bump(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def _reserve(self, block: bool) -> bool:
+        """Takes a browser slot from the global budget; always succeeds without one."""
+        if self.budget is None:
+            return True
+        try:
+            return self.budget.acquire(self.site, self.size, block)
+        except Exception as e:
+            self._log(f"BROWSER BUDGET unreachable, running unbudgeted: {str(e)[:100]}")
+            self.budget = None
+            return True
+
+    def _release(self):
+        if self.budget is None:
+            return
+        try:
+            self.budget.release(self.site)
+        except Exception:
+            pass
+
+    def _over_budget(self) -> bool:
+        if self.budget is None or self._closed:
+            return False
+        try:
+            return self.budget.should_release(self.site)
+        except Exception:
+            return False
+
+    def _new_driver(self):
+        profile = self.profile
+        try:
+            driver = create_driver(headless=self.headless, profile=profile)
+        except Exception:
+            with self._lock:
+                self._live -= 1
+            self._release()
+            self._bump("create_failures")
+            raise
+        with self._lock:
+            self._uses[id(driver)] = 0
+            self._profiles[id(driver)] = profile
+            self.stats["created"] += 1
+        metrics.add_gauge("drivers_live", 1)
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+            self._profiles.pop(id(driver), None)
+            self._live -= 1
+        metrics.add_gauge("drivers_live", -1)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        self._release()
+
+    @staticmethod
+    def is_healthy(driver) -> bool:
+        """A driver is healthy if its session still answers a trivial command."""
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def checkout(self, timeout=None):
+        """Returns a warm driver, creating one if the pool is not yet full."""
+        if self._closed:
+            raise RuntimeError("DriverPool is closed")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_create = self._live < self.size
+                    if can_create:
+                        self._live += 1
+                        first = self._live - self._held == 1
+                # Only a pool with no driver in rotation waits for a slot; the others wait for a driver
+                if can_create and not self._reserve(block=first):
+                    with self._lock:
+                        self._live -= 1
+                        self.stats["budget_denied"] += 1
+                    can_create = False
+                if can_create:
+                    driver = self._new_driver()
+                else:
+                    wait = IDLE_RECHECK if deadline is None else min(IDLE_RECHECK, deadline - time.monotonic())
+                    try:
+                        driver = self._idle.get(timeout=max(0.0, wait))
+                    except queue.Empty:
+                        if deadline is not None and time.monotonic() >= deadline:
+                            raise
+                        continue
+
+            if self._profiles.get(id(driver)) != self.profile:
+                # Left over from before a profile fallback
+                self._discard(driver)
+                continue
+            if self.is_healthy(driver):
+                break
+            self._bump("unhealthy")
+            self._discard(driver)
+
+        self._bump("checkouts")
+        return driver
+
+    def checkin(self, driver):
+        """Returns a driver to the pool, recycling it if it is worn out or broken."""
+        with self._lock:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+
+        if self._closed:
+            self._discard(driver)
+        elif self.max_pages and uses >= self.max_pages:
+            self._bump("recycled")
+            self._discard(driver)
+        elif not self.is_healthy(driver):
+            self._bump("unhealthy")
+            self._discard(driver)
+        elif self._live > 1 and self._over_budget():
+            self._bump("budget_returned")
+            self._discard(driver)
+        else:
+            self._idle.put(driver)
+
+    def hold(self, timeout=None):
+        """
+        Checks out a driver kept for the whole run (a long-lived navigation
+        browser). It holds a budget slot like any other; the pool's first driver
+        in rotation still waits for a slot of its own.
+        """
+        driver = self.checkout(timeout)
+        with self._lock:
+            self._held += 1
+        return driver
+
+    def unhold(self, driver):
+        """Returns a driver taken with hold()."""
+        with self._lock:
+            self._held -= 1
+        self.checkin(driver)
+
+    def page_result(self, ok: bool):
+        """Feeds whether a page's content appeared; may switch a lean pool to the full profile."""
+        with self._lock:
+            if ok or self.profile != PROFILE_LEAN:
+                self._failures = 0
+                return
+            self._failures += 1
+            if self._failures < self.fallback_failures:
+                return
+            self.profile = PROFILE_FULL
+            self.stats["profile_fallbacks"] += 1
+        if self.logger:
+            self.logger.warning(f"LEAN DRIVER PROFILE: {self.fallback_failures} pages in a row never became ready. "
+                                f"Switching to the full profile.")
+
+    @contextmanager
+    def driver(self):
+        """Context manager wrapping checkout/checkin for a single page."""
+        driver = self.checkout()
+        try:
+            yield driver
+        finally:
+            self.checkin(driver)
+
+    def close(self):
+        """Quits every idle driver and logs the pool stats."""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+        self._log(f"DRIVER POOL CLOSED | {self.stats}")
+        metrics.attach("driver_pool", dict(self.stats))
+        self._log(f"SELENIUM WAITS | {wait_stats.summary()}")
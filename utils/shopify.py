@@ -0,0 +1,52 @@
+# utils/shopify.py
+from lxml import html
+
+from utils.fetcher import get_json
+from utils.utils import normalize_text
+from config.settings import SHOPIFY_PAGE_SIZE, CATALOG_REPLAY_DIR
+
+def iter_collection_products(collection_url: str, page_size: int = SHOPIFY_PAGE_SIZE, replay_dir=CATALOG_REPLAY_DIR, logger=None):
+    """Yields every product of a collection from the paged /products.json endpoint."""
+    base = collection_url.split("?")[0].rstrip("/")
+    page = 1
+    while True:
+        url = f"{base}/products.json?limit={page_size}&page={page}"
+        if logger:
+            logger.info(f"FETCHING CATALOG PAGE: {url}")
+
+        products = get_json(url, replay_dir).get("products") or []
+        for product in products:
+            yield product
+
+        if len(products) < page_size:
+            break
+        page += 1
+
+def product_url(store_url: str, product: dict) -> str:
+    return f"{store_url.rstrip('/')}/products/{product['handle']}"
+
+def first_variant(product: dict) -> dict:
+    variants = product.get("variants") or []
+    return variants[0] if variants else {}
+
+def body_tree(product: dict):
+    """Parsed body_html, or None for products without a description."""
+    body = product.get("body_html") or ""
+    if not body.strip():
+        return None
+    return html.fromstring(f"<div>{body}</div>")
+
+def body_text(product: dict, xpath: str = "//text()") -> str:
+    tree = body_tree(product)
+    if tree is None:
+        return ""
+    return normalize_text(" ".join(str(t) for t in tree.xpath(xpath) if t))
+
+def format_price(value) -> str:
+    """Shopify JSON prices are plain decimals ("1234.50"); storefronts show "$1,234.50"."""
+    if value in (None, ""):
+        return ""
+    try:
+        return f"${float(value):,.2f}"
+    except (TypeError, ValueError):
+        return str(value)
@@ -0,0 +1,220 @@
+# utils/sinks.py
+import math
+import os
+import re
+import time
+
+from utils.archive import attached_archive
+from utils.records import CATEGORICAL, PRICE_VALUE, QUANTITY_VALUE, records_frame
+from config.settings import OUTPUT_FORMAT, PARQUET_ROW_GROUP_BYTES
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: pip install pyarrow (or the "parquet" extra)
+    pa = pq = None
+
+FORMAT_CSV = "csv"
+FORMAT_PARQUET = "parquet"
+
+class CsvSink:
+    """One CSV per batch, same layout concat.py has always read."""
+
+    def __init__(self, out_dir, logger):
+        self.out_dir = out_dir
+        self.logger = logger
+
+    def last_seq(self) -> int:
+        """Highest batch number already in out_dir, so a resumed run appends after it."""
+        seqs = [int(m.group(1)) for f in self.out_dir.glob("batch_*_*.csv") if (m := re.match(r"batch_(\d+)_\d+\.csv$", f.name))]
+        return max(seqs, default=0)
+
+    def write(self, rows: list, seq: int, total: int):
+        batch_file = self.out_dir / f"batch_{seq:05d}_{total}.csv"
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        records_frame(rows).to_csv(batch_file, index=False)
+        return batch_file.name, rows
+
+    def close(self) -> list:
+        return []
+
+
+class ParquetSink:
+    """
+    Append-only Parquet output per run, written through a ParquetWriter.
+
+    Batches are buffered as Arrow tables and written as a row group once they
+    hold PARQUET_ROW_GROUP_BYTES, so row groups stay a sensible size whatever
+    the scraper's batch size is. The site's schema is fixed from the columns
+    first seen: Price Value is a double, Quantity Value an int64, the
+    categorical columns of utils/records.py are dictionary-encoded strings and
+    everything else is a nullable string, as scraped. Later rows missing a
+    column get nulls and unknown columns are reported and dropped.
+
+    The file is written as *.parquet.tmp and renamed on close, so readers never
+    see a file without its footer. Rows in the .tmp file are lost with a crash,
+    so with `durable` (a Frontier or RecrawlIndex is attached) every row group
+    is closed out as its own part file and only then reported back as saved;
+    otherwise the run writes one part and reports nothing.
+    """
+
+    def __init__(self, out_dir, logger, row_group_bytes: int = PARQUET_ROW_GROUP_BYTES, durable: bool = False):
+        if pa is None:
+            raise ImportError("pyarrow is required for OUTPUT_FORMAT=parquet")
+        self.out_dir = out_dir
+        self.logger = logger
+        self.row_group_bytes = row_group_bytes
+        self.durable = durable
+        self._stem = f"part_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}"
+        self.parts = 0
+        self._next_part()
+
+        self.schema = None
+        self._writer = None
+        self._pending = []
+        self._pending_rows = []  # the rows behind _pending, kept only when durable
+        self._pending_bytes = 0
+        self._dropped = set()
+        self.row_groups = 0
+
+    def last_seq(self) -> int:
+        # Part files are named per run, nothing to continue from
+        return 0
+
+    @staticmethod
+    def _cell(value):
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return None
+        return str(value)
+
+    @staticmethod
+    def _number(value):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        return None if math.isnan(value) else value
+
+    @classmethod
+    def _integer(cls, value):
+        value = cls._number(value)
+        return None if value is None else int(value)
+
+    @staticmethod
+    def _type(column):
+        if column == PRICE_VALUE:
+            return pa.float64()
+        if column == QUANTITY_VALUE:
+            return pa.int64()
+        if column in CATEGORICAL:
+            return pa.dictionary(pa.int32(), pa.string())
+        return pa.string()
+
+    def _table(self, rows: list):
+        if self.schema is None:
+            columns = list(dict.fromkeys(key for row in rows for key in row))
+            self.schema = pa.schema([pa.field(c, self._type(c)) for c in columns])
+
+        names = self.schema.names
+        unknown = {key for row in rows for key in row} - set(names) - self._dropped
+        if unknown:
+            self._dropped |= unknown
+            self.logger.warning(f"PARQUET SCHEMA: dropping columns not in the site schema: {sorted(unknown)}")
+
+        convert = {PRICE_VALUE: self._number, QUANTITY_VALUE: self._integer}
+        data = {c: [convert.get(c, self._cell)(row.get(c)) for row in rows] for c in names}
+        return pa.Table.from_pydict(data, schema=self.schema)
+
+    def _next_part(self):
+        self.parts += 1
+        suffix = f"_{self.parts:05d}" if self.durable else ""
+        self.path = self.out_dir / f"{self._stem}{suffix}.parquet"
+        self.tmp_path = self.path.with_suffix(".parquet.tmp")
+
+    def write(self, rows: list, seq: int, total: int):
+        table = self._table(rows)
+        self._pending.append(table)
+        if self.durable:
+            self._pending_rows.extend(rows)
+        self._pending_bytes += table.nbytes
+        if self._pending_bytes >= self.row_group_bytes:
+            name = self.path.name
+            try:
+                saved = self._flush_row_group()
+            except Exception as e:
+                # The rows stay pending and go out with the next row group
+                self.logger.error(f"FAILED TO WRITE ROW GROUP to {self.tmp_path.name}: {e}")
+                return f"{name} (row group pending)", []
+            return f"{name} (row group {self.row_groups})", saved
+        return f"{self.path.name} (buffered {self._pending_bytes} bytes)", []
+
+    def _flush_row_group(self) -> list:
+        """Writes the pending rows; returns those now durable (see `durable`)."""
+        if not self._pending:
+            return []
+        table = pa.concat_tables(self._pending)
+        if self._writer is None:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+        self._writer.write_table(table, row_group_size=table.num_rows)
+        self.row_groups += 1
+        saved = self._pending_rows
+        self._pending = []
+        self._pending_rows = []
+        self._pending_bytes = 0
+        if self.durable:
+            self._close_part()
+            self._next_part()
+        return saved
+
+    def _close_part(self):
+        self._writer.close()
+        self._writer = None
+        self.tmp_path.replace(self.path)
+
+    def close(self) -> list:
+        """Writes what is still pending; returns the rows that became durable."""
+        saved = self._flush_row_group()
+        if self._writer is not None:
+            self._close_part()
+            self.logger.info(f"SAVED PARQUET: {self.path.name} | {self.row_groups} row groups")
+        elif self.durable and self.row_groups:
+            self.logger.info(f"SAVED PARQUET: {self._stem}_*.parquet | {self.row_groups} parts")
+        return saved
+
+
+class ArchiveSink:
+    """Fetch stage (main.py --fetch-only): rows go into the fetch archive as finished records."""
+
+    def __init__(self, archive, logger):
+        self.archive = archive
+        self.logger = logger
+
+    def last_seq(self) -> int:
+        return 0
+
+    def write(self, rows: list, seq: int, total: int):
+        self.archive.add_rows([dict(row) for row in rows])
+        return f"{self.archive.path.name} (+{len(rows)} rows)", rows
+
+    def close(self) -> list:
+        return []
+
+
+def make_sink(out_dir, logger, output_format: str = OUTPUT_FORMAT, durable: bool = False):
+    """
+    The configured sink; Parquet falls back to CSV when pyarrow is missing.
+    While a fetch archive is attached, rows go to the archive instead.
+
+    write() returns (where the batch went, the rows now on disk) and close()
+    the rows it put on disk, so the Frontier only marks items done that would
+    survive a crash; `durable` asks Parquet to report them before close.
+    """
+    archive = attached_archive()
+    if archive is not None:
+        return ArchiveSink(archive, logger)
+    if output_format == FORMAT_PARQUET:
+        if pa is not None:
+            return ParquetSink(out_dir, logger, durable=durable)
+        logger.warning("OUTPUT_FORMAT=parquet but pyarrow is not installed. Writing CSV batches.")
+    return CsvSink(out_dir, logger)
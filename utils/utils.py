@@ -4,6 +4,13 @@ import re
 import string
 import time
 import random
+from functools import lru_cache
+
+from lxml import etree
+
+from utils.matcher import OEM_SCAN_HEAD, get_matcher
+
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
 
 def normalize_text(text: str) -> str:
     if not text:
@@ -14,12 +21,16 @@ def normalize_text(text: str) -> str:
 def remove_punctuation(text: str) -> str:
     if not text:
         return ""
-    chars = re.escape(string.punctuation)
-    return re.sub(f"[{chars}]", "", text).strip()
+    return text.translate(PUNCTUATION_TABLE).strip()
+
+@lru_cache(maxsize=512)
+def compile_xpath(xpath: str) -> etree.XPath:
+    """Ad-hoc expressions are compiled once and reused; declared fields live in utils/extractor.py."""
+    return etree.XPath(xpath)
 
 def get_xpath_combined(tree, xpath: str) -> str:
     try:
-        values = tree.xpath(xpath)
+        values = compile_xpath(xpath)(tree)
         if not values:
             return ""
         return normalize_text(" ".join([str(v) for v in values if v]))
@@ -28,7 +39,7 @@ def get_xpath_combined(tree, xpath: str) -> str:
 
 def get_xpath_first(tree, xpath: str) -> str:
     try:
-        values = tree.xpath(xpath)
+        values = compile_xpath(xpath)(tree)
         return normalize_text(str(values[0])) if values else ""
     except Exception:
         return ""
@@ -46,30 +57,31 @@ def clean_oem_from_text(text: str, oem_list: list) -> str:
     if not text:
         return ""
     try:
-        text_lower = text.lower()
-        for oem in oem_list:
-            oem_lower = oem.lower()
-
-            if oem_lower in text_lower and "volvo/mack" in text_lower:
-                return "Volvo/Mack"
+        oem = get_matcher(oem_list, ignore_case=True, scan_head=OEM_SCAN_HEAD).first(text)
+        if not oem:
+            return ""
 
-            if oem == "Mercedes" and oem_lower in text_lower:
-                return "Mercedes-Benz"
+        if "volvo/mack" in text.lower():
+            return "Volvo/Mack"
 
-            if oem_lower in text_lower:
-                return oem
+        if oem == "Mercedes":
+            return "Mercedes-Benz"
 
-        return ""
+        return oem
     except Exception:
         return ""
 
-def match_from_description(description: str, candidates: list) -> str:
+def match_from_description(description: str, candidates: list, longest: bool = False, word_boundary: bool = False) -> str:
+    """
+    First candidate (in list order) found in the description. With `longest` the
+    longest occurrence wins instead, optionally restricted to whole words.
+    """
     if not description:
         return ""
-    for c in candidates:
-        if str(c) in description:
-            return str(c)
-    return ""
+    matcher = get_matcher(candidates)
+    if longest or word_boundary:
+        return matcher.longest(description, word_boundary=word_boundary)
+    return matcher.first(description)
 
 
 def get_last_token_if_digit(text: str) -> str:
@@ -85,8 +97,7 @@ def clean_description_modular(desc, oem, part):
     """Old clean_desc logic: removes oem/part and punctuation."""
     if not desc: return ""
     text = desc.replace(str(oem), "").replace(str(part), "")
-    chars = re.escape(string.punctuation)
-    return re.sub(f'[{chars}]', '', text).strip()
+    return text.translate(PUNCTUATION_TABLE).strip()
 
 def random_sleep(min_sec=2.5, max_sec=4.5):
     time.sleep(random.uniform(min_sec, max_sec))
@@ -105,8 +116,7 @@ def clean_dpf_desc(item_num, manufacturer, part_num):
     """Legacy clean_desc logic: Removes manufacturer and part number from title."""
     if not item_num: return ""
     text = str(item_num).replace(str(manufacturer), "").replace(str(part_num), "")
-    chars = re.escape(string.punctuation)
-    return re.sub(f'[{chars}]', '', text).strip()
+    return text.translate(PUNCTUATION_TABLE).strip()
 
 #findit parts
 def get_random_user_agent():
@@ -0,0 +1,66 @@
+# utils/waits.py
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+
+from utils.metrics import metrics
+
+# Drivers run with an implicit wait of 0, so a lookup for something absent
+# returns at once; every real wait is one of these, named and timed.
+POLL_SECONDS = 0.1
+
+class WaitStats:
+    """Count, total/max seconds and timeouts per wait name, shared by all threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waits = {}
+
+    def record(self, name: str, seconds: float, timed_out: bool = False):
+        metrics.observe("wait_seconds", seconds, wait=name)
+        if timed_out:
+            metrics.inc("wait_timeouts_total", wait=name)
+        with self._lock:
+            entry = self._waits.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0, "timeouts": 0})
+            entry["count"] += 1
+            entry["total_s"] += seconds
+            entry["max_s"] = max(entry["max_s"], seconds)
+            entry["timeouts"] += timed_out
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                name: {
+                    "count": e["count"],
+                    "avg_s": round(e["total_s"] / e["count"], 2),
+                    "max_s": round(e["max_s"], 2),
+                    "total_s": round(e["total_s"], 1),
+                    "timeouts": e["timeouts"],
+                }
+                for name, e in self._waits.items()
+            }
+
+
+wait_stats = WaitStats()
+
+def wait_until(driver, timeout: float, condition, name: str):
+    """WebDriverWait(driver, timeout).until(condition), recorded under `name`. Raises TimeoutException."""
+    start = time.monotonic()
+    try:
+        result = WebDriverWait(driver, timeout, poll_frequency=POLL_SECONDS).until(condition)
+    except TimeoutException:
+        wait_stats.record(name, time.monotonic() - start, timed_out=True)
+        raise
+    wait_stats.record(name, time.monotonic() - start)
+    return result
+
+def probe(driver, xpath: str, name: str) -> list:
+    """find_elements for something that is usually absent (popups, optional controls), recorded under `name`."""
+    start = time.monotonic()
+    try:
+        return driver.find_elements(By.XPATH, xpath)
+    finally:
+        wait_stats.record(name, time.monotonic() - start)
@@ -0,0 +1,78 @@
+# utils/woocommerce.py
+from lxml import html
+
+from utils.fetcher import get_json
+from utils.utils import normalize_text
+from config.settings import WOOCOMMERCE_PAGE_SIZE, CATALOG_REPLAY_DIR
+
+STORE_API = "wp-json/wc/store/v1"
+
+def _iter_pages(url: str, page_size: int, replay_dir, logger=None):
+    page = 1
+    while True:
+        page_url = f"{url}{'&' if '?' in url else '?'}per_page={page_size}&page={page}"
+        if logger:
+            logger.info(f"FETCHING CATALOG PAGE: {page_url}")
+
+        items = get_json(page_url, replay_dir) or []
+        for item in items:
+            yield item
+
+        if len(items) < page_size:
+            break
+        page += 1
+
+def iter_categories(store_url: str, page_size: int = WOOCOMMERCE_PAGE_SIZE, replay_dir=CATALOG_REPLAY_DIR, logger=None):
+    """Yields every product category of the store (id, slug, parent, permalink...)."""
+    yield from _iter_pages(f"{store_url.rstrip('/')}/{STORE_API}/products/categories", page_size, replay_dir, logger)
+
+def iter_store_products(store_url: str, category_id=None, page_size: int = WOOCOMMERCE_PAGE_SIZE, replay_dir=CATALOG_REPLAY_DIR, logger=None):
+    """Yields every product from the paged Store API, optionally limited to one category."""
+    url = f"{store_url.rstrip('/')}/{STORE_API}/products"
+    if category_id is not None:
+        url += f"?category={category_id}"
+    yield from _iter_pages(url, page_size, replay_dir, logger)
+
+def html_text(fragment: str) -> str:
+    if not fragment or not fragment.strip():
+        return ""
+    tree = html.fromstring(f"<div>{fragment}</div>")
+    return normalize_text(" ".join(str(t) for t in tree.xpath("//text()") if t))
+
+def _money(amount: str, prices: dict) -> str:
+    """Store API amounts are integers in minor units; render them the way the price span does ("$ 1,234.00")."""
+    if amount in (None, ""):
+        return ""
+    minor_unit = int(prices.get("currency_minor_unit", 2))
+    value = int(amount) / (10 ** minor_unit)
+    return normalize_text(f"{prices.get('currency_prefix', '')} {value:,.{minor_unit}f}{prices.get('currency_suffix', '')}")
+
+def product_price(product: dict) -> str:
+    """Regular price followed by the sale price when on sale, same order as the <del>/<ins> markup."""
+    prices = product.get("prices") or {}
+    price = _money(prices.get("price"), prices)
+    regular = _money(prices.get("regular_price"), prices)
+    if product.get("on_sale") and regular and regular != price:
+        return f"{regular} {price}"
+    return price
+
+def product_currency(product: dict) -> str:
+    return (product.get("prices") or {}).get("currency_code", "")
+
+def product_stock(product: dict) -> str:
+    availability = product.get("stock_availability") or {}
+    if availability.get("text"):
+        return availability["text"]
+    return "In Stock" if product.get("is_in_stock", True) else "Out of stock"
+
+def product_categories(product: dict) -> str:
+    return ", ".join(c.get("name", "") for c in product.get("categories") or [])
+
+def attribute_value(product: dict, key: str) -> str:
+    """Terms of the first attribute whose name or taxonomy mentions `key` (e.g. "horsepower")."""
+    key = key.lower()
+    for attr in product.get("attributes") or []:
+        label = f"{attr.get('name', '')} {attr.get('taxonomy', '')}".lower()
+        if key in label:
+            return ", ".join(t.get("name", "") for t in attr.get("terms") or [])
+    return ""